@@ -18,10 +18,45 @@
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
-from pkg_resources import get_distribution, DistributionNotFound
 from .api import PlentyApi
+from .decoder import JsonDecoder
+from .metrics import InMemoryMetrics, MetricsSink
+from .ratelimit import RateLimiter
+from .registry import ReferenceRegistry
+from .response_cache import ResponseCache
+from .retry import RetryPolicy
+from .token_cache import TokenCache
+from .utils import PageFetchError
+
+# Classes with heavier dependencies (asyncio, sqlite3, ..), their modules
+# are imported on the first access
+LAZY_CLASSES = {
+    'AsyncPlentyApi': 'plenty_api.async_api',
+    'ArrowSink': 'plenty_api.export',
+    'CatalogueSnapshot': 'plenty_api.catalogue',
+    'ChangeFeed': 'plenty_api.change_feed',
+    'OrderMirror': 'plenty_api.mirror',
+}
+
+
+def __getattr__(name: str):
+    if name not in LAZY_CLASSES:
+        raise AttributeError(f"module {__name__!r} has no attribute "
+                             f"{name!r}")
+    import importlib
+    return getattr(importlib.import_module(LAZY_CLASSES[name]), name)
+
+
+try:
+    from importlib.metadata import version, PackageNotFoundError
+except ImportError:  # Python 3.7
+    from pkg_resources import get_distribution, DistributionNotFound
+
+    def version(name):
+        return get_distribution(name).version
+    PackageNotFoundError = DistributionNotFound
 
 try:
-    __version__ = get_distribution('plenty_api').version
-except DistributionNotFound:
+    __version__ = version('plenty_api')
+except PackageNotFoundError:
     __version__ = '(local)'
@@ -20,13 +20,29 @@
 """
 
 import time
+import collections
+import concurrent.futures
+import contextvars
+import threading
 from typing import List
 import requests
-import simplejson
-import gnupg
+import urllib3
 
 import plenty_api.keyring
+import plenty_api.constants as constants
+import plenty_api.profiling as profiling
+import plenty_api.tracing as tracing
 import plenty_api.utils as utils
+from plenty_api.decoder import (
+    CountingReader, DecodeError, JsonDecoder, iter_entries)
+from plenty_api.metrics import InMemoryMetrics, MetricsSink
+from plenty_api.profiling import profiled
+from plenty_api.tracing import traced
+from plenty_api.ratelimit import RateLimiter
+from plenty_api.registry import ReferenceRegistry
+from plenty_api.response_cache import ResponseCache
+from plenty_api.retry import RetryPolicy, parse_retry_after
+from plenty_api.token_cache import TokenCache, build_key
 
 
 class PlentyApi():
@@ -127,6 +143,19 @@ class PlentyApi():
                 Reference:
                 (https://developers.plentymarkets.com/rest-doc#/Item/get_rest_items_variations)
 
+            ITERATORS
+            **plenty_api_iter_orders_by_date**
+            **plenty_api_iter_items**
+            **plenty_api_iter_variations**
+                Generators with the parameters of the corresponding GET
+                request, which yield the records (or the list of records
+                of each page with [pages]) as soon as a page arrives,
+                instead of collecting all pages in memory.
+                A failed page raises a PageFetchError (yields None with
+                [pages]).
+                [pages]         -   Yield a list of records per page
+                [prefetch]      -   Amount of pages fetched in advance
+
             POST REQUESTS
             **plenty_api_set_image_availability**
                 Update the availability of an image for a marketplace, client
@@ -143,7 +172,17 @@ class PlentyApi():
     """
     def __init__(self, base_url: str, use_keyring: bool = True,
                  data_format: str = 'json', debug: bool = False,
-                 username: str = '', password: str = ''):
+                 username: str = '', password: str = '',
+                 pool_connections: int = 10, pool_maxsize: int = 10,
+                 keep_alive: bool = True, concurrency: int = 1,
+                 rate_limiter: RateLimiter = None,
+                 retry_policy: RetryPolicy = None, timeout: float = None,
+                 prefetch: int = 0, token_cache: TokenCache = None,
+                 json_decoder: JsonDecoder = None,
+                 response_cache: ResponseCache = None,
+                 registry_refresh: float = 0,
+                 metrics: MetricsSink = None, profile: bool = False,
+                 tracer=None):
         """
             Initialize the object and directly authenticate to the API to get
             the bearer token.
@@ -155,22 +194,151 @@ class PlentyApi():
                 use_keyring [bool]  -   Save the credentials temporarily or
                                         permanently
                 data_format [str]   -   Output format of the response
+                                        {json, dataframe, arrow, polars}
                 debug       [bool]  -   Print out additional information
                                         about the request URL and parameters
                 username    [str]   -   skip the keyring and directly enter
                                         the username to the REST-API
                 password    [str]   -   path to a gpg-encrypted file that
                                         contains the key.
+                pool_connections [int] - Number of host connection pools
+                                        kept by the HTTP session
+                pool_maxsize [int]  -   Maximum amount of connections kept
+                                        open per host, at least
+                                        [concurrency]
+                keep_alive  [bool]  -   Reuse the TCP/TLS connection for
+                                        subsequent requests
+                concurrency [int]   -   Default amount of pages fetched in
+                                        parallel by paginated requests
+                rate_limiter [RateLimiter] - Pace the requests with the call
+                                        limit headers of the responses,
+                                        can be shared by multiple objects
+                retry_policy [RetryPolicy] - Repeat requests after transient
+                                        errors
+                timeout     [float] -   Seconds to wait for the connection
+                                        and for data from the server
+                prefetch    [int]   -   Default amount of pages fetched in
+                                        advance by the iterators, while the
+                                        current page is processed
+                token_cache [TokenCache] - Share the bearer token with other
+                                        processes until it expires, the
+                                        token is renewed in the background
+                json_decoder [JsonDecoder] - Parser of the response bodies
+                                        (default: fastest installed library)
+                response_cache [ResponseCache] - Keep the responses of
+                                        reference data (VAT, referrers, ..)
+                                        on disk
+                registry_refresh [float] - Refresh the reference data of
+                                        `self.registry` every N seconds in
+                                        the background (0: disabled)
+                metrics     [MetricsSink] - Receiver of the request metrics
+                                        (default: InMemoryMetrics)
+                profile     [bool]  -   Print the time spent per phase and
+                                        the peak memory of each GET method
+                                        call (kept in `self.last_profile`)
+                tracer      [Tracer] -  OpenTelemetry tracer, which records
+                                        a span per method call and request
+                                        (`plenty_api.tracing.get_tracer()`)
 
         """
         self.url = base_url
+        self.concurrency = max(1, concurrency)
+        # Every parallel request needs its own connection, surplus
+        # connections would be discarded after each request
+        self.session = utils.build_session(
+            pool_connections=pool_connections,
+            pool_maxsize=max(pool_maxsize, self.concurrency),
+            keep_alive=keep_alive)
         self.keyring = plenty_api.keyring.CredentialManager()
         self.debug = debug
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.timeout = timeout
+        self.prefetch = max(0, prefetch)
+        self.json_decoder = json_decoder or JsonDecoder()
+        self.response_cache = response_cache
+        self.metrics = metrics or InMemoryMetrics()
+        self.profile = profile
+        self.last_profile = None
+        self.tracer = tracer
+        self.registry = ReferenceRegistry(
+            fetch=self.__get_reference_data,
+            refresh_interval=registry_refresh)
         self.data_format = data_format.lower()
-        if data_format.lower() not in ['json', 'dataframe']:
+        if data_format.lower() not in constants.VALID_DATA_FORMATS:
             self.data_format = 'json'
         self.creds = {'Authorization': ''}
-        self.__authenticate(persistent=use_keyring, user=username, pw=password)
+        self.token_cache = token_cache
+        self.__token_key = build_key(base_url=base_url, username=username)
+        self.__login_args = {'persistent': use_keyring, 'user': username,
+                             'pw': password}
+        self.__auth_lock = threading.Lock()
+        self.__refresh_timer = None
+        self.__authenticate(**self.__login_args)
+        if registry_refresh > 0:
+            self.registry.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+            Close the pooled HTTP session and release all open connections.
+        """
+        if self.__refresh_timer:
+            self.__refresh_timer.cancel()
+        self.registry.stop()
+        self.session.close()
+
+    def __schedule_refresh(self, expires_at: float) -> None:
+        """
+            Renew the token in the background shortly before it is considered
+            outdated by the token cache. Not possible with credentials from
+            STDIN, as the user would be asked in the background.
+
+            Parameter:
+                expires_at  [float] -   Unix timestamp of the token expiry
+        """
+        if not self.token_cache:
+            return
+        if not (self.__login_args['persistent'] or
+                (self.__login_args['user'] and self.__login_args['pw'])):
+            return
+        if self.__refresh_timer:
+            self.__refresh_timer.cancel()
+        delay = max(0, expires_at - self.token_cache.margin - time.time()) + 1
+        self.__refresh_timer = threading.Timer(delay, self.__refresh_token)
+        self.__refresh_timer.daemon = True
+        self.__refresh_timer.start()
+
+    def __refresh_token(self) -> None:
+        with self.__auth_lock:
+            if self.debug:
+                print("DEBUG: Renew the bearer token")
+            self.__authenticate(**self.__login_args)
+
+    def __renew_token(self, rejected: str) -> bool:
+        """
+            Login again after the API rejected the bearer token.
+
+            Parameter:
+                rejected    [str]   -   The rejected bearer token
+
+            Return:
+                [bool]
+        """
+        with self.__auth_lock:
+            if self.creds['Authorization'] != rejected:
+                # Renewed by another thread in the meantime
+                return True
+            print("API:Bearer token rejected, renew the login")
+            if self.token_cache:
+                self.token_cache.delete(key=self.__token_key, token=rejected)
+            with profiling.measure(phase='auth'):
+                return self.__authenticate(**self.__login_args)
 
     def __authenticate(self, persistent: str, user: str, pw: str):
         """
@@ -194,35 +362,52 @@ class PlentyApi():
                                         the username to the REST-API
                 pw          [str]   -   path to a gpg-encrypted file that
                                         contains the key.
+
+            With a token cache, a valid token from the cache is used instead
+            of a new login. The login holds the login lock of the cache, so
+            that other processes wait for the new token instead of logging
+            in themselves.
+        """
+        if not self.token_cache:
+            return self.__login(persistent=persistent, user=user, pw=pw)
+
+        if self.__use_cached_token():
+            return True
+        with self.token_cache.login_lock():
+            # Another process might have logged in in the meantime
+            if self.__use_cached_token():
+                return True
+            return self.__login(persistent=persistent, user=user, pw=pw)
+
+    def __use_cached_token(self) -> bool:
         """
+            Use a valid token of the token cache.
+
+            Return:
+                [bool]      -   False without a valid token
+        """
+        entry = self.token_cache.get(key=self.__token_key)
+        if not entry:
+            return False
+        self.creds['Authorization'] = entry['token']
+        self.__schedule_refresh(expires_at=entry['expires_at'])
+        return True
 
+    def __login(self, persistent: str, user: str, pw: str) -> bool:
+        """
+            Login with the credentials and store the token in the token
+            cache (see `__authenticate`).
+        """
         token = ''
-        decrypt_pw = None
-
-        if persistent and not (user and pw):
-            creds = self.keyring.get_credentials()
-            if not creds:
-                creds = utils.new_keyring_creds(keyring=self.keyring)
-        elif not persistent and not (user and pw):
-            creds = utils.get_temp_creds()
-        elif user and pw:
-            gpg = gnupg.GPG()
-            try:
-                with open(pw, 'rb') as pw_file:
-                    decrypt_pw = gpg.decrypt_file(pw_file)
-            except FileNotFoundError as err:
-                print("ERROR Login to API failed: Provided gpg file is not "
-                      f"valid\n=> {err}")
-                return False
-            if not decrypt_pw:
-                print("ERROR Login to API failed: Decryption of password file"
-                      " failed.")
-                return False
-            password = decrypt_pw.data.decode('utf-8').strip('\n')
-            creds = {'username': user, 'password': password}
+
+        creds = utils.get_login_credentials(keyring=self.keyring,
+                                            persistent=persistent,
+                                            user=user, pw=pw)
+        if not creds:
+            return False
 
         endpoint = self.url + '/rest/login'
-        response = requests.post(endpoint, params=creds)
+        response = self.session.post(endpoint, params=creds)
         if response.status_code == 403:
             print("ERROR: Login to API failed: your account is locked")
             print("unlock @ Setup->settings->accounts->{user}->unlock login")
@@ -233,7 +418,7 @@ class PlentyApi():
                 if response.json()['error'] == 'invalid_credentials':
                     print("Wrong credentials: Please enter valid credentials.")
                     creds = utils.update_keyring_creds(keyring=self.keyring)
-                    response = requests.post(endpoint, params=creds)
+                    response = self.session.post(endpoint, params=creds)
                     token = utils.build_login_token(
                         response_json=response.json())
                 else:
@@ -253,6 +438,14 @@ class PlentyApi():
             return False
 
         self.creds['Authorization'] = token
+
+        if self.token_cache:
+            expires_in = response.json().get('expires_in', 0)
+            if expires_in:
+                entry = self.token_cache.set(key=self.__token_key,
+                                             token=token,
+                                             expires_in=int(expires_in))
+                self.__schedule_refresh(expires_at=entry['expires_at'])
         return True
 
     def __plenty_api_request(self,
@@ -260,7 +453,9 @@ class PlentyApi():
                              domain: str,
                              query: dict = None,
                              data: dict = None,
-                             path: str = '') -> dict:
+                             path: str = '',
+                             stream: bool = False,
+                             revalidate: bool = False) -> dict:
         """
             Make a request to the PlentyMarkets API.
 
@@ -270,6 +465,33 @@ class PlentyApi():
             (Optional)
                 query       [dict]  -   Additional options for the request
                 data        [dict]  -   Data body for post requests
+                stream      [bool]  -   Return the response object before
+                                        the body is downloaded
+                revalidate  [bool]  -   Skip the response cache lookup and
+                                        renew the cached response
+        """
+        route = utils.get_route(domain=domain)
+        attributes = {'http.request.method': method.upper(),
+                      'http.route': route, 'plenty.domain': domain,
+                      'plenty.page': (query or {}).get('page', 1)}
+        with tracing.start_span(tracer=self.tracer,
+                                name=f"{method.upper()} {route}",
+                                attributes=attributes) as span:
+            response = self.__send_request(method=method, domain=domain,
+                                           query=query, data=data,
+                                           path=path, stream=stream,
+                                           revalidate=revalidate, span=span)
+            if response is None:
+                tracing.set_error(span=span, description='request failed')
+            return response
+
+    def __send_request(self, method: str, domain: str, query: dict,
+                       data: dict, path: str, stream: bool, revalidate: bool,
+                       span) -> dict:
+        """
+            Perform a request including the response cache lookup, the
+            call limit and the retries (see `__plenty_api_request`), the
+            details are added as attributes of the [span].
         """
         route = ''
         endpoint = ''
@@ -281,77 +503,581 @@ class PlentyApi():
         if self.debug:
             print(f"DEBUG: Endpoint: {endpoint}")
             print(f"DEBUG: Params: {query}")
+        labels = {'domain': domain, 'route': route}
+
+        cache_key = ''
+        cached: dict = {}
+        if self.response_cache and method.lower() == 'get' and not stream:
+            cache_key = self.response_cache.build_key(route=route, path=path,
+                                                      query=query,
+                                                      url=self.url)
+            if not revalidate:
+                cached = self.response_cache.get(domain=domain,
+                                                 key=cache_key)
+            if cached:
+                span.set_attribute('plenty.cache', cached['state'])
+            if cached.get('state') == 'fresh':
+                return cached['response']
+            if cached.get('state') == 'stale':
+                if self.response_cache.start_revalidation(key=cache_key):
+                    threading.Thread(
+                        target=self.__revalidate, daemon=True,
+                        kwargs={'domain': domain, 'query': dict(query or {}),
+                                'path': path, 'key': cache_key}).start()
+                return cached['response']
+            if not self.response_cache.offline:
+                cached = {}
+
+        attempt = 0
+        renewed = False
+        throttle_delay = 0.0
         while True:
-            if method.lower() == 'get':
-                raw_response = requests.get(endpoint, headers=self.creds,
-                                            params=query)
-
-            if method.lower() == 'post':
-                raw_response = requests.post(endpoint, headers=self.creds,
-                                             params=query, json=data)
-            if raw_response.status_code != 429:
+            attempt += 1
+            span.set_attribute('plenty.attempts', attempt)
+            delay = self.rate_limiter.acquire()
+            if delay > 0 and cached:
+                print("API:Call limit reached, serve cached response")
+                return cached['response']
+            if delay > 0:
+                if self.debug:
+                    print(f"DEBUG: Call limit reached, wait {delay:.2f}s")
+                self.metrics.observe(name='plenty_api_throttle_wait_seconds',
+                                     value=delay,
+                                     labels=dict(labels, reason='limit'))
+                profiling.record(phase='throttle', seconds=delay)
+                throttle_delay += delay
+                span.set_attribute('plenty.throttle_delay', throttle_delay)
+                time.sleep(delay)
+
+            token = self.creds['Authorization']
+            started = time.perf_counter()
+            try:
+                if method.lower() == 'get':
+                    raw_response = self.session.get(endpoint,
+                                                    headers=self.creds,
+                                                    params=query,
+                                                    timeout=self.timeout,
+                                                    stream=stream)
+
+                if method.lower() == 'post':
+                    raw_response = self.session.post(endpoint,
+                                                     headers=self.creds,
+                                                     params=query, json=data,
+                                                     timeout=self.timeout)
+            except (requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError,
+                    requests.exceptions.ContentDecodingError) as err:
+                self.__record_request(labels=labels, method=method,
+                                      status='error', started=started)
+                if cached:
+                    print(f"API:Connection failed, serve cached response: "
+                          f"{err}")
+                    return cached['response']
+                if not (self.retry_policy.is_retryable(method=method) and
+                        self.retry_policy.allows(attempt=attempt)):
+                    print(f"ERROR: {method} request at {endpoint} failed "
+                          f"after {attempt} attempt(s): {err}")
+                    return None
+                delay = self.retry_policy.delay(attempt=attempt)
+                print(f"API:Connection failed, retry in {delay:.1f}s: {err}")
+                self.metrics.increment(name='plenty_api_retries_total',
+                                       labels=dict(labels,
+                                                   reason='connection'))
+                profiling.record(phase='retry', seconds=delay)
+                time.sleep(delay)
+                continue
+
+            status = raw_response.status_code
+            self.__record_request(labels=labels, method=method,
+                                  status=status, started=started)
+            span.set_attribute('http.response.status_code', status)
+            if status != 429:
+                self.rate_limiter.update(headers=raw_response.headers)
+            if status == 401 and not renewed:
+                renewed = True
+                if self.__renew_token(rejected=token):
+                    raw_response.close()
+                    attempt -= 1
+                    continue
+            if not self.retry_policy.is_retryable(method=method,
+                                                  status=status):
                 break
-            print("API:Request throttled, limit for subscription reached")
-            time.sleep(3)
+            # Release the connection of a discarded (streamed) response
+            raw_response.close()
+            if cached:
+                print(f"API:Request failed with status {status}, serve "
+                      "cached response")
+                return cached['response']
+            if not self.retry_policy.allows(attempt=attempt, status=status):
+                print(f"ERROR: {method} request at {endpoint} failed after "
+                      f"{attempt} attempt(s) with status {status}")
+                return None
+            if status == 429:
+                delay = self.rate_limiter.throttled(
+                    headers=raw_response.headers)
+                if self.retry_policy.respect_retry_after:
+                    delay = max(delay, parse_retry_after(
+                        headers=raw_response.headers) or 0)
+                print("API:Request throttled, limit for subscription reached")
+                self.metrics.observe(name='plenty_api_throttle_wait_seconds',
+                                     value=delay,
+                                     labels=dict(labels, reason='429'))
+                profiling.record(phase='throttle', seconds=delay)
+                throttle_delay += delay
+                span.set_attribute('plenty.throttle_delay', throttle_delay)
+            else:
+                delay = self.retry_policy.delay(attempt=attempt,
+                                                headers=raw_response.headers)
+                print(f"API:Request failed with status {status}, retry in "
+                      f"{delay:.1f}s")
+                profiling.record(phase='retry', seconds=delay)
+            self.metrics.increment(name='plenty_api_retries_total',
+                                   labels=dict(labels, reason=status))
+            time.sleep(delay)
 
         if self.debug:
             print(f"DEBUG: request url: {raw_response.request.url}")
+        if stream:
+            return raw_response
+        self.metrics.increment(name='plenty_api_response_bytes_total',
+                               value=len(raw_response.content), labels=labels)
+        span.set_attribute('plenty.response_bytes', len(raw_response.content))
+        started = time.perf_counter()
         try:
-            response = raw_response.json()
-        except simplejson.errors.JSONDecodeError:
+            response = self.json_decoder.decode(content=raw_response.content)
+        except DecodeError:
             print(f"ERROR: No response for request {method} at {endpoint}")
             return None
+        duration = time.perf_counter() - started
+        self.metrics.observe(name='plenty_api_decode_duration_seconds',
+                             value=duration, labels=labels)
+        profiling.record(phase='decode', seconds=duration)
 
         if domain == 'referrer':
             # The referrer request responds with a different format
+            if cache_key:
+                self.response_cache.set(domain=domain, key=cache_key,
+                                        response=response)
             return response
 
         if 'error' in response.keys():
             print(f"ERROR: Request failed:\n{response['error']['message']}")
             return None
 
+        if 'entries' in response:
+            self.metrics.increment(name='plenty_api_pages_total',
+                                   labels=labels)
+        if cache_key:
+            self.response_cache.set(domain=domain, key=cache_key,
+                                    response=response)
         return response
 
+    def __record_request(self, labels: dict, method: str, status,
+                         started: float) -> None:
+        """
+            Count a finished HTTP request and record its duration.
+
+            Parameter:
+                labels      [dict]  -   Domain and route of the request
+                method      [str]   -   GET/POST
+                status      [int]   -   HTTP status code / 'error'
+                started     [float] -   `time.perf_counter` before the
+                                        request
+        """
+        method = method.upper()
+        duration = time.perf_counter() - started
+        self.metrics.observe(name='plenty_api_request_duration_seconds',
+                             value=duration,
+                             labels=dict(labels, method=method))
+        profiling.record(phase='request', seconds=duration)
+        self.metrics.increment(name='plenty_api_requests_total',
+                               labels=dict(labels, method=method,
+                                           status=status))
+
+    def __transform_data(self, data, domain: str, fields: list = None):
+        """
+            Convert a response into the data format of the object and record
+            the duration of the conversion.
+
+            Parameter:
+                data        [list/dict] -   JSON response data
+                domain      [str]       -   Domain of the records
+                fields      [list]      -   Projected fields of the records
+
+            Return:
+                [JSON(Dict) / DataFrame / Table] <= self.data_format
+        """
+        started = time.perf_counter()
+        data = utils.transform_data_type(data=data,
+                                         data_format=self.data_format,
+                                         domain=domain, fields=fields)
+        duration = time.perf_counter() - started
+        self.metrics.observe(name='plenty_api_transform_duration_seconds',
+                             value=duration,
+                             labels={'domain': domain,
+                                     'format': self.data_format})
+        profiling.record(phase='conversion', seconds=duration)
+        return data
+
+    def __revalidate(self, domain: str, query: dict, path: str,
+                     key: str) -> None:
+        """
+            Renew a stale cached response in the background.
+
+            Parameter:
+                domain      [str]   -   Orders/Items...
+                query       [dict]  -   Query of the cached request
+                path        [str]   -   Additional path of the endpoint
+                key         [str]   -   Identifier of the cached response
+        """
+        try:
+            self.__plenty_api_request(method='get', domain=domain,
+                                      query=query, path=path,
+                                      revalidate=True)
+        finally:
+            self.response_cache.finish_revalidation(key=key)
+
+    def __get_reference_data(self, domain: str, query: dict,
+                             revalidate: bool = False) -> list:
+        """
+            Request all records of a reference data domain in JSON format,
+            independent of the data format of the object.
+
+            Parameter:
+                domain      [str]   -   vat/referrer/prices/manufacturer
+                query       [dict]  -   Additional options for the request
+                revalidate  [bool]  -   Skip the response cache lookup
+
+            Return:
+                            [list]/None
+        """
+        if domain == 'referrer':
+            # This request doesn't export in form of pages
+            return self.__plenty_api_request(method='get', domain=domain,
+                                             query=query,
+                                             revalidate=revalidate)
+        return self.__repeat_get_request_for_all_records(
+            domain=domain, query=query, revalidate=revalidate)
+
 # GET REQUESTS
 
-    def __repeat_get_request_for_all_records(self,
-                                             domain: str,
-                                             query: dict) -> dict:
+    def __get_page(self, domain: str, query: dict,
+                   projection: dict = None, revalidate: bool = False) -> dict:
         """
-            Collect data records from multiple API requests in a single JSON
-            data structure.
+            Request a single page and reduce its records to the fields of
+            the [projection], before the page is handed on.
 
             Parameter:
                 domain      [str]   -   Orders/Items/..
                 query       [dict]  -   Additional options for the request
+                projection  [dict]  -   Nested projection of the fields
+                                        (`utils.build_projection`)
+                revalidate  [bool]  -   Skip the response cache lookup
 
             Return:
-                            [dict]  -   API response in as javascript object
-                                        notation
+                            [dict]/None
         """
         response = self.__plenty_api_request(method='get',
                                              domain=domain,
-                                             query=query)
-        if not response:
-            return None
+                                             query=query,
+                                             revalidate=revalidate)
+        if response and projection:
+            with profiling.measure(phase='post_process'):
+                response['entries'] = utils.project_record(
+                    record=response['entries'], projection=projection)
+        return response
 
-        entries = response['entries']
+    def __iter_pages(self, domain: str, query: dict,
+                     concurrency: int = None, fields: list = None,
+                     revalidate: bool = False):
+        """
+            Iterate over the pages of a paginated request.
+
+            The first page is always requested on its own, as it contains
+            the total amount of pages. With a concurrency above 1 the
+            remaining pages are fetched in parallel by a bounded pool of
+            workers, with at most [concurrency] pages in flight, while the
+            pages are yielded in order.
+            A failed page is yielded as None and ends the iteration.
+
+            Parameter:
+                domain      [str]   -   Orders/Items/..
+                query       [dict]  -   Additional options for the request
+                concurrency [int]   -   Amount of pages fetched in parallel
+                                        (default: self.concurrency)
+                fields      [list]  -   Only keep these fields (dotted
+                                        paths) of the records
+                revalidate  [bool]  -   Skip the response cache lookup
+
+            Return:
+                            [generator] -   API response of each page
+        """
+        if not concurrency:
+            concurrency = self.concurrency
+        projection = utils.build_projection(fields=fields)
+
+        response = self.__get_page(domain=domain, query=query,
+                                   projection=projection,
+                                   revalidate=revalidate)
+        yield response
+        if not response or response['isLastPage']:
+            return
+
+        if concurrency > 1:
+            pages = range(response['page'] + 1,
+                          response['lastPageNumber'] + 1)
+            executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=concurrency)
+            pending: collections.deque = collections.deque()
+            try:
+                for page in pages:
+                    # Keep the profile of the call within the worker
+                    pending.append(executor.submit(
+                        contextvars.copy_context().run, self.__get_page,
+                        domain=domain, query=dict(query, page=page),
+                        projection=projection, revalidate=revalidate))
+                    if len(pending) < concurrency:
+                        continue
+                    response = pending.popleft().result()
+                    if not response:
+                        print(f"ERROR: subsequent {domain} API requests "
+                              "failed.")
+                        yield None
+                        return
+                    yield response
+                while pending:
+                    response = pending.popleft().result()
+                    if not response:
+                        print(f"ERROR: subsequent {domain} API requests "
+                              "failed.")
+                        yield None
+                        return
+                    yield response
+            finally:
+                for future in pending:
+                    future.cancel()
+                executor.shutdown(wait=False)
+            return
 
         while not response['isLastPage']:
             query.update({'page': response['page'] + 1})
-            response = self.__plenty_api_request(method='get',
-                                                 domain=domain,
-                                                 query=query)
+            response = self.__get_page(domain=domain, query=query,
+                                       projection=projection,
+                                       revalidate=revalidate)
             if not response:
                 print(f"ERROR: subsequent {domain} API requests failed.")
-                return None
+                yield None
+                return
+            yield response
+
+    def __iter_stream_records(self, domain: str, query: dict,
+                              pages: bool = False, fields: list = None):
+        """
+            Iterate over the records of a paginated request, while the body
+            of each page is downloaded and parsed incrementally. The pages
+            are fetched one after the other.
 
+            A failed page ends the iteration with None in place of the
+            page with [pages], otherwise a `utils.PageFetchError` is
+            raised.
+
+            Parameter:
+                domain      [str]   -   Orders/Items/..
+                query       [dict]  -   Additional options for the request
+                pages       [bool]  -   Yield the records page by page
+                fields      [list]  -   Only keep these fields of the records
+        """
+        projection = utils.build_projection(fields=fields)
+        query = dict(query)
+        labels = {'domain': domain, 'route': utils.get_route(domain=domain)}
+        while True:
+            raw_response = self.__plenty_api_request(method='get',
+                                                     domain=domain,
+                                                     query=query,
+                                                     stream=True)
+            if raw_response is None:
+                print(f"ERROR: subsequent {domain} API requests failed.")
+                break
+            meta: dict = {}
+            entries: list = []
+            with raw_response:
+                raw_response.raw.decode_content = True
+                body = CountingReader(stream=raw_response.raw)
+                try:
+                    for entry in iter_entries(stream=body, meta=meta):
+                        record = utils.project_record(record=entry,
+                                                      projection=projection)
+                        if pages:
+                            entries.append(record)
+                        else:
+                            yield record
+                except DecodeError as err:
+                    print(f"ERROR: Invalid response for {domain} page "
+                          f"{query.get('page', 1)}: {err}")
+                    break
+                except (urllib3.exceptions.HTTPError,
+                        requests.exceptions.RequestException) as err:
+                    print(f"ERROR: Download of {domain} page "
+                          f"{query.get('page', 1)} failed: {err}")
+                    break
+            if 'error' in meta:
+                print(f"ERROR: Request failed:\n{meta['error']}")
+                break
+            self.metrics.increment(name='plenty_api_pages_total',
+                                   labels=labels)
+            self.metrics.increment(name='plenty_api_response_bytes_total',
+                                   value=body.bytes_read, labels=labels)
+            if pages:
+                yield entries
+            if meta.get('isLastPage', True):
+                return
+            query['page'] = meta['page'] + 1
+
+        if pages:
+            # Tell the consumer, that the records are incomplete
+            yield None
+            return
+        raise utils.PageFetchError(domain=domain, page=query.get('page', 1))
+
+    def __iter_records(self, domain: str, query: dict,
+                       concurrency: int = None, pages: bool = False,
+                       prefetch: int = None, chunk_size: int = 0,
+                       record_type: str = '', fields: list = None,
+                       stream: bool = False, columns: list = None):
+        """
+            Iterate over the records of a paginated request, or over the
+            list of records of each page with [pages], or over chunks of
+            [chunk_size] records in the data format of the object.
+
+            With [prefetch], the pages are fetched on a background thread
+            into a bounded queue, so that the next pages are already in
+            flight while the consumer processes the current page.
+            With [stream], the pages are fetched one after the other, the
+            [concurrency] of the object doesn't apply and an explicit
+            [concurrency] above 1 is rejected.
+
+            A failed page ends the iteration with None in place of the
+            page with [pages], otherwise a `utils.PageFetchError` is
+            raised.
+
+            Parameter:
+                domain      [str]   -   Orders/Items/..
+                query       [dict]  -   Additional options for the request
+                concurrency [int]   -   Amount of pages fetched in parallel
+                pages       [bool]  -   Yield the records page by page
+                prefetch    [int]   -   Amount of pages fetched in advance
+                                        (default: self.prefetch)
+                chunk_size  [int]   -   Amount of records per chunk
+                record_type [str]   -   Schema of the chunks {order/item/..}
+                fields      [list]  -   Only keep these fields of the records
+                stream      [bool]  -   Parse the records incrementally
+                                        while each page is downloaded
+                columns     [list]  -   Fixed columns of DataFrame chunks
+        """
+        if chunk_size > 0:
+            yield from utils.chunk_records(
+                records=self.__iter_records(domain=domain, query=query,
+                                            concurrency=concurrency,
+                                            prefetch=prefetch,
+                                            fields=fields, stream=stream),
+                chunk_size=chunk_size, data_format=self.data_format,
+                domain=record_type, columns=columns, fields=fields)
+            return
+
+        if prefetch is None:
+            prefetch = self.prefetch
+
+        if stream:
+            if concurrency is not None and concurrency > 1:
+                raise ValueError("Streamed pages are fetched one after the "
+                                 "other, use concurrency=1 or stream=False")
+            if prefetch <= 0:
+                yield from self.__iter_stream_records(domain=domain,
+                                                      query=query,
+                                                      pages=pages,
+                                                      fields=fields)
+                return
+            # Fetch whole pages in advance instead of single records
+            page_lists = utils.prefetch(
+                iterable=self.__iter_stream_records(domain=domain,
+                                                    query=query, pages=True,
+                                                    fields=fields),
+                depth=prefetch)
+            page = query.get('page', 1)
+            for entries in page_lists:
+                if entries is None:
+                    if pages:
+                        yield None
+                        return
+                    raise utils.PageFetchError(domain=domain, page=page)
+                page += 1
+                if pages:
+                    yield entries
+                    continue
+                yield from entries
+            return
+
+        responses = self.__iter_pages(domain=domain, query=query,
+                                      concurrency=concurrency, fields=fields)
+        if prefetch > 0:
+            responses = utils.prefetch(iterable=responses, depth=prefetch)
+
+        page = query.get('page', 1)
+        for response in responses:
+            if not response:
+                if pages:
+                    # Tell the consumer, that the records are incomplete
+                    yield None
+                    return
+                raise utils.PageFetchError(domain=domain, page=page)
+            page = response['page'] + 1
+            if pages:
+                yield response['entries']
+                continue
+            yield from response['entries']
+
+    def __repeat_get_request_for_all_records(self,
+                                             domain: str,
+                                             query: dict,
+                                             concurrency: int = None,
+                                             fields: list = None,
+                                             revalidate: bool = False) -> dict:
+        """
+            Collect data records from multiple API requests in a single JSON
+            data structure.
+
+            Parameter:
+                domain      [str]   -   Orders/Items/..
+                query       [dict]  -   Additional options for the request
+                concurrency [int]   -   Amount of pages fetched in parallel
+                                        (default: self.concurrency)
+                fields      [list]  -   Only keep these fields of the records
+                revalidate  [bool]  -   Skip the response cache lookup
+
+            Return:
+                            [dict]  -   API response in as javascript object
+                                        notation
+        """
+        entries: list = []
+        for response in self.__iter_pages(domain=domain, query=query,
+                                          concurrency=concurrency,
+                                          fields=fields,
+                                          revalidate=revalidate):
+            if not response:
+                return None
             entries += response['entries']
 
         return entries
 
+    @traced
+    @profiled
     def plenty_api_get_orders_by_date(self, start, end, date_type='create',
-                                      additional=None, refine=None):
+                                      additional=None, refine=None,
+                                      concurrency: int = None,
+                                      date_shards: int = 1,
+                                      refine_shards: dict = None,
+                                      fields: list = None):
         """
             Get all orders within a specific date range.
 
@@ -369,39 +1095,133 @@ class PlentyApi():
                                             1 and 4 (sales orders and refund)
                                         And restrict it to only orders from
                                         the referrer with id '1'
+                concurrency [int]   -   Amount of pages fetched in parallel
+                date_shards [int]   -   Split the date range into N windows
+                refine_shards [dict]-   Split the request by the values of
+                                        a refine key
+                                        Example:
+                                        {'referrerId': ['1', '4.01']}
+
+                Up to [concurrency] shards are fetched in parallel, each
+                with an equal share of the [concurrency], and the orders are
+                merged without duplicates.
+                fields      [list]  -   Only keep these fields of the orders,
+                                        nested fields as dotted paths
+                                        Example:
+                                        ['id', 'orderItems.amounts.priceGross']
 
             Return:
-                [JSON(Dict) / DataFrame] <= self.data_format
+                [JSON(Dict) / DataFrame / Table] <= self.data_format
         """
+        query = utils.build_order_query(start=start, end=end,
+                                        date_type=date_type,
+                                        additional=additional, refine=refine)
+        if query is None:
+            return {}
 
-        date_range = utils.build_date_range(start=start, end=end)
-        if not date_range:
-            print(f"ERROR: Invalid range {start} -> {end}")
+        if date_shards > 1 or refine_shards:
+            orders = self.__get_sharded_orders(
+                queries=utils.shard_order_query(
+                    query=query, date_type=date_type,
+                    date_shards=date_shards, refine_shards=refine_shards),
+                concurrency=concurrency, fields=fields)
+        else:
+            orders = self.__repeat_get_request_for_all_records(
+                domain='orders', query=query, concurrency=concurrency,
+                fields=fields)
 
-        if not utils.check_date_range(date_range=date_range):
-            print(f"ERROR: {date_range['start']} -> {date_range['end']}")
-            return {}
+        orders = self.__transform_data(data=orders, domain='order',
+                                       fields=fields)
+
+        return orders
 
-        query = utils.build_query_date(date_range=date_range,
-                                       date_type=date_type)
+    def __get_sharded_orders(self, queries: list,
+                             concurrency: int = None,
+                             fields: list = None) -> list:
+        """
+            Fetch the orders of multiple independent queries in parallel and
+            merge them by the order ID. The shards share the [concurrency],
+            so that no more requests are in flight than with a single query.
 
-        query = utils.sanity_check_parameter(domain='order',
-                                             query=query,
-                                             refine=refine,
-                                             additional=additional)
+            Parameter:
+                queries     [list]  -   Order queries
+                                        (use `utils.shard_order_query`)
+                concurrency [int]   -   Amount of requests in flight
+                                        (default: self.concurrency)
+                fields      [list]  -   Only keep these fields of the orders
 
-        orders = self.__repeat_get_request_for_all_records(domain='orders',
-                                                           query=query)
+            Return:
+                            [list]/None
+        """
+        workers, concurrency = utils.split_concurrency(
+            concurrency=concurrency or self.concurrency, shards=len(queries))
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=workers) as executor:
+            shards = list(executor.map(
+                lambda query, context: context.run(
+                    self.__repeat_get_request_for_all_records,
+                    domain='orders', query=query, concurrency=concurrency,
+                    fields=fields),
+                queries, [contextvars.copy_context() for _ in queries]))
+
+        if any(shard is None for shard in shards):
+            print("ERROR: Request of an order shard failed.")
+            return None
 
-        orders = utils.transform_data_type(data=orders,
-                                           data_format=self.data_format)
+        with profiling.measure(phase='post_process'):
+            return utils.merge_unique_records(record_lists=shards, key='id')
+
+    def plenty_api_iter_orders_by_date(self, start, end, date_type='create',
+                                       additional=None, refine=None,
+                                       concurrency: int = None,
+                                       pages: bool = False,
+                                       prefetch: int = None,
+                                       chunk_size: int = 0,
+                                       fields: list = None,
+                                       stream: bool = False,
+                                       columns: list = None):
+        """
+            Iterate over all orders within a specific date range, while
+            the pages are fetched. Only the current page is kept in memory.
 
-        return orders
+            Parameter:
+                (see `plenty_api_get_orders_by_date`)
+                pages       [bool]  -   Yield a list of records per page
+                                        instead of single records
+                prefetch    [int]   -   Amount of pages fetched in advance
+                                        on a background thread
+                chunk_size  [int]   -   Yield chunks of N records in the
+                                        data format of the object instead
+                                        of single records
+                stream      [bool]  -   Parse each page incrementally while
+                                        it is downloaded (requires ijson)
+                columns     [list]  -   Fixed columns of the DataFrame
+                                        chunks, other fields are dropped
 
+            Return:
+                [generator] -   order records in JSON format
+        """
+        query = utils.build_order_query(start=start, end=end,
+                                        date_type=date_type,
+                                        additional=additional, refine=refine)
+        if query is None:
+            return
+
+        yield from self.__iter_records(domain='orders', query=query,
+                                       concurrency=concurrency, pages=pages,
+                                       prefetch=prefetch,
+                                       chunk_size=chunk_size,
+                                       record_type='order', fields=fields,
+                                       stream=stream,
+                                       columns=columns)
+
+    @traced
+    @profiled
     def plenty_api_get_attributes(self,
                                   additional: list = None,
                                   last_update: str = '',
-                                  variation_map: bool = False):
+                                  variation_map: bool = False,
+                                  concurrency: int = None):
         """
             List all attributes from PlentyMarkets, this will fetch the
             basic attribute structures, so if you require an attribute value
@@ -424,44 +1244,36 @@ class PlentyApi():
                                         of variations, where the attribute
                                         value matches to the corresponding
                                         attribute value
+                concurrency [int]   -   Amount of pages fetched in parallel
 
             Return:
-                [JSON(Dict) / DataFrame] <= self.data_format
+                [JSON(Dict) / DataFrame / Table] <= self.data_format
         """
         attributes = None
-        query = {}
-
-        query = utils.sanity_check_parameter(domain='attribute',
-                                             query=query,
-                                             additional=additional)
 
-        if last_update:
-            query.update({'updatedAt': last_update})
-
-        # variation_map was given but the required '&with=values' query is
-        # missing, we assume the desired request was to be made with values
-        if variation_map:
-            if not additional:
-                query.update({'with': 'values'})
-            if additional:
-                if 'values' not in additional:
-                    query.update({'with': 'values'})
+        query = utils.build_attribute_query(additional=additional,
+                                            last_update=last_update,
+                                            variation_map=variation_map)
 
         attributes = self.__repeat_get_request_for_all_records(
-            domain='attributes', query=query)
+            domain='attributes', query=query, concurrency=concurrency)
 
         if variation_map:
             variation = self.plenty_api_get_variations(
-                additional=['variationAttributeValues'])
-            attributes = utils.attribute_variation_mapping(
-                variation=variation, attribute=attributes)
+                additional=['variationAttributeValues'],
+                concurrency=concurrency)
+            with profiling.measure(phase='post_process'):
+                attributes = utils.attribute_variation_mapping(
+                    variation=variation, attribute=attributes)
 
-        attributes = utils.transform_data_type(data=attributes,
-                                               data_format=self.data_format)
+        attributes = self.__transform_data(data=attributes, domain='attribute')
 
         return attributes
 
-    def plenty_api_get_vat_id_mappings(self, subset: List[int] = None):
+    @traced
+    @profiled
+    def plenty_api_get_vat_id_mappings(self, subset: List[int] = None,
+                                       concurrency: int = None):
         """
             Get a mapping of all VAT configuration IDs to each country or
             if specified for a subset of countries.
@@ -473,22 +1285,27 @@ class PlentyApi():
                                         the given IDs (integer)
                 You can locate those IDs in your Plenty- Markets system under:
                 Setup-> Orders-> Shipping-> Settings-> Countries of delivery
+                concurrency [int]   -   Amount of pages fetched in parallel
 
             Return:
-                [JSON(Dict) / DataFrame] <= self.data_format
+                [JSON(Dict) / DataFrame / Table] <= self.data_format
         """
-        vat_data = self.__repeat_get_request_for_all_records(domain='vat',
-                                                             query={})
+        vat_data = self.__repeat_get_request_for_all_records(
+            domain='vat', query={}, concurrency=concurrency)
 
-        vat_table = utils.create_vat_mapping(data=vat_data, subset=subset)
+        with profiling.measure(phase='post_process'):
+            vat_table = utils.create_vat_mapping(data=vat_data,
+                                                 subset=subset)
 
-        vat_table = utils.transform_data_type(data=vat_table,
-                                              data_format=self.data_format)
+        vat_table = self.__transform_data(data=vat_table, domain='vat')
         return vat_table
 
+    @traced
+    @profiled
     def plenty_api_get_price_configuration(self,
                                            minimal: bool = False,
-                                           last_update: str = ''):
+                                           last_update: str = '',
+                                           concurrency: int = None):
         """
             Fetch the price configuration from PlentyMarkets.
 
@@ -500,39 +1317,39 @@ class PlentyApi():
                                             YYYY-MM-DDTHH:MM:SS+UTC-OFFSET
                                             YYYY-MM-DDTHH:MM
                                             YYYY-MM-DD
+                concurrency [int]   -   Amount of pages fetched in parallel
 
             Result:
-                [JSON(Dict) / DataFrame] <= self.data_format
+                [JSON(Dict) / DataFrame / Table] <= self.data_format
         """
         prices = None
         minimal_prices: list = []
-        query = {}
 
-        if last_update:
-            # The documentation refers to Unix timestamps being a valid
-            # format, but that is not the case within my tests.
-            query.update({'updatedAt': last_update})
+        query = utils.build_price_query(last_update=last_update)
 
         prices = self.__repeat_get_request_for_all_records(
-            domain='prices', query=query)
+            domain='prices', query=query, concurrency=concurrency)
 
         if not prices:
             return None
 
         if minimal:
-            for price in prices:
-                minimal_prices.append(
-                    utils.shrink_price_configuration(data=price))
+            with profiling.measure(phase='post_process'):
+                for price in prices:
+                    minimal_prices.append(
+                        utils.shrink_price_configuration(data=price))
             prices = minimal_prices
 
-        prices = utils.transform_data_type(data=prices,
-                                           data_format=self.data_format)
+        prices = self.__transform_data(data=prices, domain='prices')
         return prices
 
+    @traced
+    @profiled
     def plenty_api_get_manufacturers(self,
                                      refine: dict = None,
                                      additional: list = None,
-                                     last_update: str = ''):
+                                     last_update: str = '',
+                                     concurrency: int = None):
         """
             Get a list of manufacturers (brands), which are setup on
             PlentyMarkets.
@@ -550,27 +1367,26 @@ class PlentyApi():
                                             YYYY-MM-DDTHH:MM:SS+UTC-OFFSET
                                             YYYY-MM-DDTHH:MM
                                             YYYY-MM-DD
+                concurrency [int]   -   Amount of pages fetched in parallel
 
             Return:
-                [JSON(Dict) / DataFrame] <= self.data_format
+                [JSON(Dict) / DataFrame / Table] <= self.data_format
         """
         manufacturers = None
-        query = {}
-        query = utils.sanity_check_parameter(domain='manufacturer',
-                                             query=query,
-                                             refine=refine,
-                                             additional=additional)
 
-        if last_update:
-            query.update({'updatedAt': last_update})
+        query = utils.build_manufacturer_query(refine=refine,
+                                               additional=additional,
+                                               last_update=last_update)
 
         manufacturers = self.__repeat_get_request_for_all_records(
-            domain='manufacturer', query=query)
+            domain='manufacturer', query=query, concurrency=concurrency)
 
-        manufacturers = utils.transform_data_type(data=manufacturers,
-                                                  data_format=self.data_format)
+        manufacturers = self.__transform_data(data=manufacturers,
+                                              domain='manufacturer')
         return manufacturers
 
+    @traced
+    @profiled
     def plenty_api_get_referrers(self,
                                  column: str = ''):
         """
@@ -587,34 +1403,30 @@ class PlentyApi():
                                         to be exported.
 
             Return:
-                [JSON(Dict) / DataFrame] <= self.data_format
+                [JSON(Dict) / DataFrame / Table] <= self.data_format
         """
-        # TODO actually only backendName, id and name are actually useful
-        # because all other attributes are useless without identification
-        valid_columns = ['backendName', 'id', 'isEditable', 'isFilterable',
-                         'name', 'orderOwnderId', 'origin']
         referrers = None
-        query = {}
-        if column in valid_columns:
-            query = {'columns': column}
-        else:
-            print(f"Invalid column argument removed: {column}")
+
+        query = utils.build_referrer_query(column=column)
 
         # This request doesn't export in form of pages
         referrers = self.__plenty_api_request(method='get',
                                               domain='referrer',
                                               query=query)
 
-        referrers = utils.transform_data_type(data=referrers,
-                                              data_format=self.data_format)
+        referrers = self.__transform_data(data=referrers, domain='referrer')
 
         return referrers
 
+    @traced
+    @profiled
     def plenty_api_get_items(self,
                              refine: dict = None,
                              additional: list = None,
                              last_update: str = '',
-                             lang: str = ''):
+                             lang: str = '',
+                             concurrency: int = None,
+                             fields: list = None):
         """
             Get product data from PlentyMarkets.
 
@@ -635,34 +1447,80 @@ class PlentyApi():
                                         in one of the following languages:
 
                 developers.plentymarkets.com/rest-doc/gettingstarted#countries
+                concurrency [int]   -   Amount of pages fetched in parallel
+                fields      [list]  -   Only keep these fields of the
+                                        records, nested fields as dotted
+                                        paths
 
             Return:
-                [JSON(Dict) / DataFrame] <= self.data_format
+                [JSON(Dict) / DataFrame / Table] <= self.data_format
         """
         items = None
-        query = {}
 
-        query = utils.sanity_check_parameter(domain='item',
-                                             query=query,
-                                             refine=refine,
-                                             additional=additional,
-                                             lang=lang)
+        query = utils.build_item_query(refine=refine, additional=additional,
+                                       last_update=last_update, lang=lang)
 
-        if last_update:
-            query.update({'updatedBetween': utils.date_to_timestamp(
-                         date=last_update)})
+        items = self.__repeat_get_request_for_all_records(
+            domain='items', query=query, concurrency=concurrency,
+            fields=fields)
 
-        items = self.__repeat_get_request_for_all_records(domain='items',
-                                                          query=query)
-
-        items = utils.transform_data_type(data=items,
-                                          data_format=self.data_format)
+        items = self.__transform_data(data=items, domain='item',
+                                      fields=fields)
         return items
 
+    def plenty_api_iter_items(self,
+                              refine: dict = None,
+                              additional: list = None,
+                              last_update: str = '',
+                              lang: str = '',
+                              concurrency: int = None,
+                              pages: bool = False,
+                              prefetch: int = None,
+                              chunk_size: int = 0,
+                              fields: list = None,
+                              stream: bool = False,
+                              columns: list = None):
+        """
+            Iterate over the product data from PlentyMarkets, while the pages
+            are fetched. Only the current page is kept in memory.
+
+            Parameter:
+                (see `plenty_api_get_items`)
+                pages       [bool]  -   Yield a list of records per page
+                                        instead of single records
+                prefetch    [int]   -   Amount of pages fetched in advance
+                                        on a background thread
+                chunk_size  [int]   -   Yield chunks of N records in the
+                                        data format of the object instead
+                                        of single records
+                stream      [bool]  -   Parse each page incrementally while
+                                        it is downloaded (requires ijson)
+                columns     [list]  -   Fixed columns of the DataFrame
+                                        chunks, other fields are dropped
+
+            Return:
+                [generator] -   item records in JSON format
+        """
+        query = utils.build_item_query(refine=refine, additional=additional,
+                                       last_update=last_update, lang=lang)
+
+        yield from self.__iter_records(domain='items', query=query,
+                                       concurrency=concurrency, pages=pages,
+                                       prefetch=prefetch,
+                                       chunk_size=chunk_size,
+                                       record_type='item', fields=fields,
+                                       stream=stream,
+                                       columns=columns)
+
+    @traced
+    @profiled
     def plenty_api_get_variations(self,
                                   refine: dict = None,
                                   additional: list = None,
-                                  lang: str = ''):
+                                  lang: str = '',
+                                  concurrency: int = None,
+                                  fields: list = None,
+                                  last_update: str = ''):
         """
             Get product data from PlentyMarkets.
 
@@ -679,28 +1537,83 @@ class PlentyApi():
                                         Example: 'de', 'en', etc.
 
                 developers.plentymarkets.com/rest-doc/gettingstarted#countries
+                concurrency [int]   -   Amount of pages fetched in parallel
+                fields      [list]  -   Only keep these fields of the
+                                        records, nested fields as dotted
+                                        paths
+                last_update [str]   -   Date of the last update given as one
+                                        of the following formats:
+                                            YYYY-MM-DDTHH:MM:SS+UTC-OFFSET
+                                            YYYY-MM-DDTHH:MM
+                                            YYYY-MM-DD
 
             Return:
-                [JSON(Dict) / DataFrame] <= self.data_format
+                [JSON(Dict) / DataFrame / Table] <= self.data_format
         """
         variations = None
-        query = {}
 
-        query = utils.sanity_check_parameter(domain='variation',
-                                             query=query,
-                                             refine=refine,
-                                             additional=additional,
-                                             lang=lang)
+        query = utils.build_variation_query(refine=refine,
+                                            additional=additional,
+                                            last_update=last_update,
+                                            lang=lang)
 
         variations = self.__repeat_get_request_for_all_records(
-            domain='variations', query=query)
+            domain='variations', query=query, concurrency=concurrency,
+            fields=fields)
 
-        variations = utils.transform_data_type(data=variations,
-                                               data_format=self.data_format)
+        variations = self.__transform_data(data=variations,
+                                           domain='variation', fields=fields)
         return variations
 
+    def plenty_api_iter_variations(self,
+                                   refine: dict = None,
+                                   additional: list = None,
+                                   lang: str = '',
+                                   concurrency: int = None,
+                                   pages: bool = False,
+                                   prefetch: int = None,
+                                   chunk_size: int = 0,
+                                   fields: list = None,
+                                   stream: bool = False,
+                                   columns: list = None,
+                                   last_update: str = ''):
+        """
+            Iterate over the variation data from PlentyMarkets, while the
+            pages are fetched. Only the current page is kept in memory.
+
+            Parameter:
+                (see `plenty_api_get_variations`)
+                pages       [bool]  -   Yield a list of records per page
+                                        instead of single records
+                prefetch    [int]   -   Amount of pages fetched in advance
+                                        on a background thread
+                chunk_size  [int]   -   Yield chunks of N records in the
+                                        data format of the object instead
+                                        of single records
+                stream      [bool]  -   Parse each page incrementally while
+                                        it is downloaded (requires ijson)
+                columns     [list]  -   Fixed columns of the DataFrame
+                                        chunks, other fields are dropped
+
+            Return:
+                [generator] -   variation records in JSON format
+        """
+        query = utils.build_variation_query(refine=refine,
+                                            additional=additional,
+                                            last_update=last_update,
+                                            lang=lang)
+
+        yield from self.__iter_records(domain='variations', query=query,
+                                       concurrency=concurrency, pages=pages,
+                                       prefetch=prefetch,
+                                       chunk_size=chunk_size,
+                                       record_type='variation', fields=fields,
+                                       stream=stream,
+                                       columns=columns)
+
 # POST REQUESTS
 
+    @traced
     def plenty_api_set_image_availability(self,
                                           item_id: str,
                                           image_id: str,
@@ -726,28 +1639,12 @@ class PlentyApi():
             Return:
                 [bool]
         """
-        target_name = ''
-        target_id = ''
-        for element in target:
-            if element in ['marketplace', 'mandant', 'listing']:
-                if target[element]:
-                    target_name = element
-                    target_id = target[element]
-            else:
-                print(f"WARNING: {element} is not a valid target "
-                      "for the image availability POST request.")
-
-        if not target_name or not target_id:
-            print("ERROR: target for availability configuration required.")
+        (path, data) = utils.build_image_availability(item_id=item_id,
+                                                      image_id=image_id,
+                                                      target=target)
+        if not path:
             return False
 
-        data = {
-            "imageId": image_id,
-            "type": target_name,
-            "value": str(target_id)
-        }
-        path = str(f"/{item_id}/images/{image_id}/availabilities")
-
         response = self.__plenty_api_request(method="post",
                                              domain="items",
                                              path=path,
@@ -0,0 +1,1057 @@
+"""
+    Python-PlentyMarkets-API-interface.
+
+    Interface to the resources from PlentyMarkets(https://www.plentymarkets.eu)
+
+    Copyright (C) 2020  Sebastian Fricke, Panasiam
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import asyncio
+import collections
+import time
+from typing import List
+import simplejson
+
+import plenty_api.keyring
+import plenty_api.constants as constants
+import plenty_api.profiling as profiling
+import plenty_api.tracing as tracing
+import plenty_api.utils as utils
+from plenty_api.decoder import DecodeError, JsonDecoder
+from plenty_api.metrics import InMemoryMetrics, MetricsSink
+from plenty_api.profiling import profiled
+from plenty_api.tracing import traced
+from plenty_api.ratelimit import RateLimiter
+from plenty_api.response_cache import ResponseCache
+from plenty_api.retry import RetryPolicy, parse_retry_after
+from plenty_api.token_cache import TokenCache, build_key
+
+
+class AsyncPlentyApi():
+    """
+        Asyncio counterpart of `PlentyApi`, every public method of
+        `PlentyApi` is available as a coroutine with the same parameters.
+        The object has to be used as an asynchronous context manager, which
+        performs the login and closes the HTTP session afterwards.
+
+        Example:
+            async with AsyncPlentyApi(base_url=...) as plenty:
+                orders = await plenty.plenty_api_get_orders_by_date(...)
+                async for order in plenty.plenty_api_iter_orders_by_date(...):
+                    ...
+
+        Additional public methods:
+            **plenty_api_iter_orders_by_date**
+            **plenty_api_iter_items**
+            **plenty_api_iter_variations**
+                Asynchronous iterators over the records (or pages with
+                pages=True) of the corresponding GET request. A failed page
+                raises a PageFetchError (yields None with pages=True).
+    """
+    def __init__(self, base_url: str, use_keyring: bool = True,
+                 data_format: str = 'json', debug: bool = False,
+                 username: str = '', password: str = '',
+                 pool_maxsize: int = 100, concurrency: int = 10,
+                 rate_limiter: RateLimiter = None,
+                 retry_policy: RetryPolicy = None, timeout: float = None,
+                 token_cache: TokenCache = None,
+                 json_decoder: JsonDecoder = None,
+                 response_cache: ResponseCache = None,
+                 metrics: MetricsSink = None, profile: bool = False,
+                 tracer=None):
+        """
+            Initialize the object, the login is performed when entering the
+            asynchronous context.
+
+            Parameter:
+                base_url    [str]   -   Base URL to the PlentyMarkets API
+                                            Endpoint, format:
+                                    [https://{name}.plentymarkets-cloud01.com]
+                use_keyring [bool]  -   Save the credentials temporarily or
+                                        permanently
+                data_format [str]   -   Output format of the response
+                                        {json, dataframe, arrow, polars}
+                debug       [bool]  -   Print out additional information
+                                        about the request URL and parameters
+                username    [str]   -   skip the keyring and directly enter
+                                        the username to the REST-API
+                password    [str]   -   path to a gpg-encrypted file that
+                                        contains the key.
+                pool_maxsize [int]  -   Maximum amount of open connections,
+                                        at least [concurrency]
+                concurrency [int]   -   Default amount of pages fetched in
+                                        parallel by paginated requests
+                rate_limiter [RateLimiter] - Pace the requests with the call
+                                        limit headers of the responses
+                retry_policy [RetryPolicy] - Repeat requests after transient
+                                        errors
+                timeout     [float] -   Seconds to wait for the connection
+                                        and for data from the server
+                token_cache [TokenCache] - Share the bearer token with other
+                                        processes until it expires, the
+                                        token is renewed in the background
+                json_decoder [JsonDecoder] - Parser of the response bodies
+                response_cache [ResponseCache] - Keep the responses of
+                                        reference data on disk
+                metrics     [MetricsSink] - Receiver of the request metrics
+                                        (default: InMemoryMetrics)
+                profile     [bool]  -   Print the time spent per phase of
+                                        each GET method call
+                tracer      [Tracer] -  OpenTelemetry tracer, which records
+                                        a span per method call and request
+        """
+        try:
+            import aiohttp
+        except ImportError as err:
+            raise ImportError("AsyncPlentyApi requires the 'aiohttp' package"
+                              ", install it with: pip install aiohttp") \
+                from err
+        self.aiohttp = aiohttp
+        self.url = base_url
+        self.keyring = plenty_api.keyring.CredentialManager()
+        self.debug = debug
+        self.data_format = data_format.lower()
+        if data_format.lower() not in constants.VALID_DATA_FORMATS:
+            self.data_format = 'json'
+        self.concurrency = max(1, concurrency)
+        self.pool_maxsize = max(pool_maxsize, self.concurrency)
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.json_decoder = json_decoder or JsonDecoder()
+        self.response_cache = response_cache
+        self.metrics = metrics or InMemoryMetrics()
+        self.profile = profile
+        self.last_profile = None
+        self.tracer = tracer
+        self.__background: set = set()
+        self.timeout = aiohttp.ClientTimeout(sock_connect=timeout,
+                                             sock_read=timeout)
+        self.creds = {'Authorization': ''}
+        self.session = None
+        self.token_cache = token_cache
+        self.__token_key = build_key(base_url=base_url, username=username)
+        self.__login_args = {'persistent': use_keyring, 'user': username,
+                             'pw': password}
+        # Created within the event loop by `login`
+        self.__auth_lock = None
+        self.__refresh_task = None
+
+    async def __aenter__(self):
+        if not await self.login():
+            await self.close()
+            raise RuntimeError("Login to the PlentyMarkets API failed.")
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def login(self) -> bool:
+        """
+            Open the HTTP session and get the bearer token from the
+            PlentyMarkets API. The credentials are fetched just like in
+            `PlentyApi` (keyring, STDIN or GnuPG file).
+
+            Return:
+                [bool]
+        """
+        if not self.session:
+            connector = self.aiohttp.TCPConnector(limit=self.pool_maxsize)
+            self.session = self.aiohttp.ClientSession(connector=connector,
+                                                      timeout=self.timeout)
+        if not self.__auth_lock:
+            self.__auth_lock = asyncio.Lock()
+        return await self.__authenticate()
+
+    async def __authenticate(self) -> bool:
+        """
+            Use a valid token of the token cache or login, while holding the
+            login lock of the cache (see `PlentyApi.__authenticate`).
+
+            Return:
+                [bool]
+        """
+        if not self.token_cache:
+            return await self.__login()
+
+        if self.__use_cached_token():
+            return True
+        # Wait for the lock on a worker thread, the holder might be another
+        # object within the same event loop
+        lock_file = await asyncio.get_running_loop().run_in_executor(
+            None, self.token_cache.acquire_login_lock)
+        try:
+            if self.__use_cached_token():
+                return True
+            return await self.__login()
+        finally:
+            self.token_cache.release_login_lock(lock_file=lock_file)
+
+    def __use_cached_token(self) -> bool:
+        entry = self.token_cache.get(key=self.__token_key)
+        if not entry:
+            return False
+        self.creds['Authorization'] = entry['token']
+        self.__schedule_refresh(expires_at=entry['expires_at'])
+        return True
+
+    async def __login(self) -> bool:
+        """
+            Login with the credentials and store the token in the token
+            cache.
+
+            Return:
+                [bool]
+        """
+        creds = utils.get_login_credentials(keyring=self.keyring,
+                                            **self.__login_args)
+        if not creds:
+            return False
+
+        status, response_json = await self.__post_login(creds=creds)
+        if status == 403:
+            print("ERROR: Login to API failed: your account is locked")
+            print("unlock @ Setup->settings->accounts->{user}->unlock login")
+        try:
+            token = utils.build_login_token(response_json=response_json)
+        except KeyError:
+            if response_json.get('error') != 'invalid_credentials':
+                print("ERROR: Login to API failed: login token retrieval was "
+                      f"unsuccessful.\nstatus:{status}")
+                return False
+            print("Wrong credentials: Please enter valid credentials.")
+            creds = utils.update_keyring_creds(keyring=self.keyring)
+            status, response_json = await self.__post_login(creds=creds)
+            try:
+                token = utils.build_login_token(response_json=response_json)
+            except KeyError:
+                print("ERROR: Login to API failed: login token retrieval was "
+                      f"unsuccessful.\nstatus:{status}")
+                return False
+
+        self.creds['Authorization'] = token
+        if self.token_cache and response_json.get('expires_in'):
+            entry = self.token_cache.set(
+                key=self.__token_key, token=token,
+                expires_in=int(response_json['expires_in']))
+            self.__schedule_refresh(expires_at=entry['expires_at'])
+        return True
+
+    def __schedule_refresh(self, expires_at: float) -> None:
+        """
+            Renew the token in the background shortly before it is considered
+            outdated by the token cache (see `PlentyApi.__schedule_refresh`).
+
+            Parameter:
+                expires_at  [float] -   Unix timestamp of the token expiry
+        """
+        if not self.token_cache:
+            return
+        if not (self.__login_args['persistent'] or
+                (self.__login_args['user'] and self.__login_args['pw'])):
+            return
+        if self.__refresh_task:
+            self.__refresh_task.cancel()
+        delay = max(0, expires_at - self.token_cache.margin - time.time()) + 1
+        self.__refresh_task = asyncio.ensure_future(
+            self.__refresh_token(delay=delay))
+
+    async def __refresh_token(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        # The renewal schedules the next refresh, don't cancel this one
+        self.__refresh_task = None
+        async with self.__auth_lock:
+            if self.debug:
+                print("DEBUG: Renew the bearer token")
+            await self.__authenticate()
+
+    async def __renew_token(self, rejected: str) -> bool:
+        """
+            Login again after the API rejected the bearer token.
+
+            Parameter:
+                rejected    [str]   -   The rejected bearer token
+
+            Return:
+                [bool]
+        """
+        async with self.__auth_lock:
+            if self.creds['Authorization'] != rejected:
+                # Renewed by another request in the meantime
+                return True
+            print("API:Bearer token rejected, renew the login")
+            if self.token_cache:
+                self.token_cache.delete(key=self.__token_key, token=rejected)
+            with profiling.measure(phase='auth'):
+                return await self.__authenticate()
+
+    async def __post_login(self, creds: dict) -> tuple:
+        """
+            Send the credentials to the login route.
+
+            Parameter:
+                creds       [dict]  -   username and password
+
+            Return:
+                [tuple]     -   (HTTP status, decoded response / {})
+        """
+        endpoint = self.url + '/rest/login'
+        async with self.session.post(endpoint, params=creds) as response:
+            try:
+                return response.status, simplejson.loads(
+                    await response.read())
+            except simplejson.errors.JSONDecodeError:
+                return response.status, {}
+
+    async def close(self):
+        """
+            Close the HTTP session and release all open connections, after
+            the running renewals of cached responses are finished.
+        """
+        if self.__refresh_task:
+            self.__refresh_task.cancel()
+            await asyncio.gather(self.__refresh_task, return_exceptions=True)
+            self.__refresh_task = None
+        if self.__background:
+            await asyncio.gather(*self.__background, return_exceptions=True)
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    async def __plenty_api_request(self,
+                                   method: str,
+                                   domain: str,
+                                   query: dict = None,
+                                   data: dict = None,
+                                   path: str = '',
+                                   revalidate: bool = False) -> dict:
+        """
+            Make a request to the PlentyMarkets API.
+
+            Parameter:
+                method      [str]   -   GET/POST
+                domain      [str]   -   Orders/Items...
+            (Optional)
+                query       [dict]  -   Additional options for the request
+                data        [dict]  -   Data body for post requests
+                revalidate  [bool]  -   Skip the response cache lookup and
+                                        renew the cached response
+        """
+        route = utils.get_route(domain=domain)
+        attributes = {'http.request.method': method.upper(),
+                      'http.route': route, 'plenty.domain': domain,
+                      'plenty.page': (query or {}).get('page', 1)}
+        with tracing.start_span(tracer=self.tracer,
+                                name=f"{method.upper()} {route}",
+                                attributes=attributes) as span:
+            response = await self.__send_request(
+                method=method, domain=domain, query=query, data=data,
+                path=path, revalidate=revalidate, span=span)
+            if response is None:
+                tracing.set_error(span=span, description='request failed')
+            return response
+
+    async def __send_request(self, method: str, domain: str, query: dict,
+                             data: dict, path: str, revalidate: bool,
+                             span) -> dict:
+        """
+            Perform a request including the response cache lookup, the
+            call limit and the retries (see `__plenty_api_request`), the
+            details are added as attributes of the [span].
+        """
+        route = utils.get_route(domain=domain)
+        endpoint = utils.build_endpoint(url=self.url, route=route, path=path)
+        if self.debug:
+            print(f"DEBUG: Endpoint: {endpoint}")
+            print(f"DEBUG: Params: {query}")
+        params = utils.flatten_query(query=query)
+        labels = {'domain': domain, 'route': route}
+
+        cache_key = ''
+        cached: dict = {}
+        if self.response_cache and method.lower() == 'get':
+            cache_key = self.response_cache.build_key(route=route, path=path,
+                                                      query=query,
+                                                      url=self.url)
+            if not revalidate:
+                cached = self.response_cache.get(domain=domain,
+                                                 key=cache_key)
+            if cached:
+                span.set_attribute('plenty.cache', cached['state'])
+            if cached.get('state') == 'fresh':
+                return cached['response']
+            if cached.get('state') == 'stale':
+                if self.response_cache.start_revalidation(key=cache_key):
+                    task = asyncio.ensure_future(self.__revalidate(
+                        domain=domain, query=dict(query or {}), path=path,
+                        key=cache_key))
+                    self.__background.add(task)
+                    task.add_done_callback(self.__background.discard)
+                return cached['response']
+            if not self.response_cache.offline:
+                cached = {}
+
+        attempt = 0
+        renewed = False
+        throttle_delay = 0.0
+        while True:
+            attempt += 1
+            span.set_attribute('plenty.attempts', attempt)
+            delay = self.rate_limiter.acquire()
+            if delay > 0 and cached:
+                print("API:Call limit reached, serve cached response")
+                return cached['response']
+            if delay > 0:
+                if self.debug:
+                    print(f"DEBUG: Call limit reached, wait {delay:.2f}s")
+                self.metrics.observe(name='plenty_api_throttle_wait_seconds',
+                                     value=delay,
+                                     labels=dict(labels, reason='limit'))
+                profiling.record(phase='throttle', seconds=delay)
+                throttle_delay += delay
+                span.set_attribute('plenty.throttle_delay', throttle_delay)
+                await asyncio.sleep(delay)
+
+            token = self.creds['Authorization']
+            started = time.perf_counter()
+            try:
+                async with self.session.request(
+                        method.upper(), endpoint, headers=self.creds,
+                        params=params, json=data) as raw_response:
+                    status = raw_response.status
+                    headers = raw_response.headers
+                    body = await raw_response.read()
+            except (self.aiohttp.ClientConnectionError,
+                    self.aiohttp.ClientPayloadError,
+                    asyncio.TimeoutError) as err:
+                self.__record_request(labels=labels, method=method,
+                                      status='error', started=started)
+                if cached:
+                    print(f"API:Connection failed, serve cached response: "
+                          f"{err!r}")
+                    return cached['response']
+                if not (self.retry_policy.is_retryable(method=method) and
+                        self.retry_policy.allows(attempt=attempt)):
+                    print(f"ERROR: {method} request at {endpoint} failed "
+                          f"after {attempt} attempt(s): {err!r}")
+                    return None
+                delay = self.retry_policy.delay(attempt=attempt)
+                print(f"API:Connection failed, retry in {delay:.1f}s: "
+                      f"{err!r}")
+                self.metrics.increment(name='plenty_api_retries_total',
+                                       labels=dict(labels,
+                                                   reason='connection'))
+                profiling.record(phase='retry', seconds=delay)
+                await asyncio.sleep(delay)
+                continue
+
+            self.__record_request(labels=labels, method=method,
+                                  status=status, started=started)
+            span.set_attribute('http.response.status_code', status)
+            if status != 429:
+                self.rate_limiter.update(headers=headers)
+            if status == 401 and not renewed:
+                renewed = True
+                if await self.__renew_token(rejected=token):
+                    attempt -= 1
+                    continue
+            if not self.retry_policy.is_retryable(method=method,
+                                                  status=status):
+                break
+            if cached:
+                print(f"API:Request failed with status {status}, serve "
+                      "cached response")
+                return cached['response']
+            if not self.retry_policy.allows(attempt=attempt, status=status):
+                print(f"ERROR: {method} request at {endpoint} failed after "
+                      f"{attempt} attempt(s) with status {status}")
+                return None
+            if status == 429:
+                delay = self.rate_limiter.throttled(headers=headers)
+                if self.retry_policy.respect_retry_after:
+                    delay = max(delay,
+                                parse_retry_after(headers=headers) or 0)
+                print("API:Request throttled, limit for subscription reached")
+                self.metrics.observe(name='plenty_api_throttle_wait_seconds',
+                                     value=delay,
+                                     labels=dict(labels, reason='429'))
+                profiling.record(phase='throttle', seconds=delay)
+                throttle_delay += delay
+                span.set_attribute('plenty.throttle_delay', throttle_delay)
+            else:
+                delay = self.retry_policy.delay(attempt=attempt,
+                                                headers=headers)
+                print(f"API:Request failed with status {status}, retry in "
+                      f"{delay:.1f}s")
+                profiling.record(phase='retry', seconds=delay)
+            self.metrics.increment(name='plenty_api_retries_total',
+                                   labels=dict(labels, reason=status))
+            await asyncio.sleep(delay)
+
+        if self.debug:
+            print(f"DEBUG: request url: {raw_response.url}")
+        self.metrics.increment(name='plenty_api_response_bytes_total',
+                               value=len(body), labels=labels)
+        span.set_attribute('plenty.response_bytes', len(body))
+        started = time.perf_counter()
+        try:
+            response = self.json_decoder.decode(content=body)
+        except DecodeError:
+            print(f"ERROR: No response for request {method} at {endpoint}")
+            return None
+        duration = time.perf_counter() - started
+        self.metrics.observe(name='plenty_api_decode_duration_seconds',
+                             value=duration, labels=labels)
+        profiling.record(phase='decode', seconds=duration)
+
+        if domain == 'referrer':
+            # The referrer request responds with a different format
+            if cache_key:
+                self.response_cache.set(domain=domain, key=cache_key,
+                                        response=response)
+            return response
+
+        if 'error' in response.keys():
+            print(f"ERROR: Request failed:\n{response['error']['message']}")
+            return None
+
+        if 'entries' in response:
+            self.metrics.increment(name='plenty_api_pages_total',
+                                   labels=labels)
+        if cache_key:
+            self.response_cache.set(domain=domain, key=cache_key,
+                                    response=response)
+        return response
+
+    def __record_request(self, labels: dict, method: str, status,
+                         started: float) -> None:
+        """
+            Count a finished HTTP request and record its duration.
+            (see `PlentyApi.__record_request`)
+        """
+        method = method.upper()
+        duration = time.perf_counter() - started
+        self.metrics.observe(name='plenty_api_request_duration_seconds',
+                             value=duration,
+                             labels=dict(labels, method=method))
+        profiling.record(phase='request', seconds=duration)
+        self.metrics.increment(name='plenty_api_requests_total',
+                               labels=dict(labels, method=method,
+                                           status=status))
+
+    def __transform_data(self, data, domain: str, fields: list = None):
+        """
+            Convert a response into the data format of the object and record
+            the duration of the conversion.
+        """
+        started = time.perf_counter()
+        data = utils.transform_data_type(data=data,
+                                         data_format=self.data_format,
+                                         domain=domain, fields=fields)
+        duration = time.perf_counter() - started
+        self.metrics.observe(name='plenty_api_transform_duration_seconds',
+                             value=duration,
+                             labels={'domain': domain,
+                                     'format': self.data_format})
+        profiling.record(phase='conversion', seconds=duration)
+        return data
+
+    async def __revalidate(self, domain: str, query: dict, path: str,
+                           key: str) -> None:
+        """ Renew a stale cached response in the background. """
+        try:
+            await self.__plenty_api_request(method='get', domain=domain,
+                                            query=query, path=path,
+                                            revalidate=True)
+        finally:
+            self.response_cache.finish_revalidation(key=key)
+
+    async def __get_page(self, domain: str, query: dict,
+                         projection: dict = None) -> dict:
+        """
+            Request a single page and reduce its records to the fields of
+            the [projection].
+        """
+        response = await self.__plenty_api_request(method='get',
+                                                   domain=domain, query=query)
+        if response and projection:
+            with profiling.measure(phase='post_process'):
+                response['entries'] = utils.project_record(
+                    record=response['entries'], projection=projection)
+        return response
+
+    async def __iter_pages(self, domain: str, query: dict,
+                           concurrency: int = None, fields: list = None):
+        """
+            Asynchronous iterator over the pages of a paginated request.
+            After the first page, up to [concurrency] subsequent pages are
+            in flight at the same time, while the pages are yielded in order.
+            A failed page is yielded as None and ends the iteration.
+
+            Parameter:
+                domain      [str]   -   Orders/Items/..
+                query       [dict]  -   Additional options for the request
+                concurrency [int]   -   Amount of pages fetched in parallel
+                                        (default: self.concurrency)
+                fields      [list]  -   Only keep these fields (dotted
+                                        paths) of the records
+        """
+        if not concurrency:
+            concurrency = self.concurrency
+        projection = utils.build_projection(fields=fields)
+
+        response = await self.__get_page(domain=domain, query=query,
+                                         projection=projection)
+        yield response
+        if not response or response['isLastPage']:
+            return
+
+        pending: collections.deque = collections.deque()
+        pages = iter(range(response['page'] + 1,
+                           response['lastPageNumber'] + 1))
+        try:
+            for page in pages:
+                pending.append(asyncio.ensure_future(
+                    self.__get_page(domain=domain,
+                                    query=dict(query, page=page),
+                                    projection=projection)))
+                if len(pending) < concurrency:
+                    continue
+                response = await pending.popleft()
+                if not response:
+                    print(f"ERROR: subsequent {domain} API requests failed.")
+                    yield None
+                    return
+                yield response
+            while pending:
+                response = await pending.popleft()
+                if not response:
+                    print(f"ERROR: subsequent {domain} API requests failed.")
+                    yield None
+                    return
+                yield response
+        finally:
+            for task in pending:
+                task.cancel()
+            # Collect the cancelled requests, before the session is closed
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def __repeat_get_request_for_all_records(self,
+                                                   domain: str,
+                                                   query: dict,
+                                                   concurrency: int = None,
+                                                   fields: list = None):
+        """
+            Collect data records from multiple API requests in a single JSON
+            data structure.
+
+            Parameter:
+                domain      [str]   -   Orders/Items/..
+                query       [dict]  -   Additional options for the request
+                concurrency [int]   -   Amount of pages fetched in parallel
+                fields      [list]  -   Only keep these fields of the records
+
+            Return:
+                            [dict]  -   API response in as javascript object
+                                        notation
+        """
+        entries: list = []
+        responses = self.__iter_pages(domain=domain, query=query,
+                                      concurrency=concurrency, fields=fields)
+        try:
+            async for response in responses:
+                if not response:
+                    return None
+                entries += response['entries']
+        finally:
+            await responses.aclose()
+        return entries
+
+    async def __iter_records(self, domain: str, query: dict,
+                             concurrency: int = None, pages: bool = False,
+                             chunk_size: int = 0, record_type: str = '',
+                             fields: list = None, columns: list = None):
+        if chunk_size > 0:
+            convert = utils.build_chunk_converter(
+                data_format=self.data_format, domain=record_type,
+                columns=columns, fields=fields)
+            chunk: list = []
+            records = self.__iter_records(domain=domain, query=query,
+                                          concurrency=concurrency,
+                                          fields=fields)
+            try:
+                async for entry in records:
+                    chunk.append(entry)
+                    if len(chunk) >= chunk_size:
+                        yield convert(chunk)
+                        chunk = []
+            finally:
+                await records.aclose()
+            if chunk:
+                yield convert(chunk)
+            return
+
+        responses = self.__iter_pages(domain=domain, query=query,
+                                      concurrency=concurrency, fields=fields)
+        page = query.get('page', 1)
+        try:
+            async for response in responses:
+                if not response:
+                    if pages:
+                        yield None
+                        return
+                    raise utils.PageFetchError(domain=domain, page=page)
+                page = response['page'] + 1
+                if pages:
+                    yield response['entries']
+                    continue
+                for entry in response['entries']:
+                    yield entry
+        finally:
+            # Cancel the pending requests as soon as the consumer stops
+            await responses.aclose()
+
+# GET REQUESTS
+
+    @traced
+    @profiled
+    async def plenty_api_get_orders_by_date(self, start, end,
+                                            date_type='create',
+                                            additional=None, refine=None,
+                                            concurrency: int = None,
+                                            date_shards: int = 1,
+                                            refine_shards: dict = None,
+                                            fields: list = None):
+        """
+            Get all orders within a specific date range.
+            (see `PlentyApi.plenty_api_get_orders_by_date`)
+        """
+        query = utils.build_order_query(start=start, end=end,
+                                        date_type=date_type,
+                                        additional=additional, refine=refine)
+        if query is None:
+            return {}
+
+        queries = utils.shard_order_query(query=query, date_type=date_type,
+                                          date_shards=date_shards,
+                                          refine_shards=refine_shards)
+        # The shards share the concurrency (see `utils.split_concurrency`)
+        workers, concurrency = utils.split_concurrency(
+            concurrency=concurrency or self.concurrency, shards=len(queries))
+        semaphore = asyncio.Semaphore(workers)
+
+        async def fetch_shard(shard: dict):
+            async with semaphore:
+                return await self.__repeat_get_request_for_all_records(
+                    domain='orders', query=shard, concurrency=concurrency,
+                    fields=fields)
+
+        shards = await asyncio.gather(*[fetch_shard(shard=shard)
+                                        for shard in queries])
+
+        if any(shard is None for shard in shards):
+            print("ERROR: Request of an order shard failed.")
+            orders = None
+        else:
+            with profiling.measure(phase='post_process'):
+                orders = utils.merge_unique_records(record_lists=shards,
+                                                    key='id')
+
+        return self.__transform_data(data=orders, domain='order',
+                                     fields=fields)
+
+    async def plenty_api_iter_orders_by_date(self, start, end,
+                                             date_type='create',
+                                             additional=None, refine=None,
+                                             concurrency: int = None,
+                                             pages: bool = False,
+                                             chunk_size: int = 0,
+                                             fields: list = None,
+                                             columns: list = None):
+        """
+            Asynchronous iterator over all orders within a specific date
+            range, yields lists of records per page with pages=True or
+            chunks of records in the data format with chunk_size
+            (the DataFrame chunks are fixed to [columns], if given).
+            (see `PlentyApi.plenty_api_get_orders_by_date`)
+        """
+        query = utils.build_order_query(start=start, end=end,
+                                        date_type=date_type,
+                                        additional=additional, refine=refine)
+        if query is None:
+            return
+
+        records = self.__iter_records(domain='orders', query=query,
+                                      concurrency=concurrency, pages=pages,
+                                      chunk_size=chunk_size,
+                                      record_type='order', fields=fields,
+                                      columns=columns)
+        try:
+            async for record in records:
+                yield record
+        finally:
+            await records.aclose()
+
+    @traced
+    @profiled
+    async def plenty_api_get_attributes(self,
+                                        additional: list = None,
+                                        last_update: str = '',
+                                        variation_map: bool = False,
+                                        concurrency: int = None):
+        """
+            List all attributes from PlentyMarkets.
+            (see `PlentyApi.plenty_api_get_attributes`)
+        """
+        query = utils.build_attribute_query(additional=additional,
+                                            last_update=last_update,
+                                            variation_map=variation_map)
+
+        if variation_map:
+            attributes, variation = await asyncio.gather(
+                self.__repeat_get_request_for_all_records(
+                    domain='attributes', query=query,
+                    concurrency=concurrency),
+                self.__repeat_get_request_for_all_records(
+                    domain='variations',
+                    query=utils.build_variation_query(
+                        additional=['variationAttributeValues']),
+                    concurrency=concurrency))
+            with profiling.measure(phase='post_process'):
+                attributes = utils.attribute_variation_mapping(
+                    variation=variation, attribute=attributes)
+        else:
+            attributes = await self.__repeat_get_request_for_all_records(
+                domain='attributes', query=query, concurrency=concurrency)
+
+        return self.__transform_data(data=attributes, domain='attribute')
+
+    @traced
+    @profiled
+    async def plenty_api_get_vat_id_mappings(self, subset: List[int] = None,
+                                             concurrency: int = None):
+        """
+            Get a mapping of all VAT configuration IDs to each country.
+            (see `PlentyApi.plenty_api_get_vat_id_mappings`)
+        """
+        vat_data = await self.__repeat_get_request_for_all_records(
+            domain='vat', query={}, concurrency=concurrency)
+
+        with profiling.measure(phase='post_process'):
+            vat_table = utils.create_vat_mapping(data=vat_data,
+                                                 subset=subset)
+
+        return self.__transform_data(data=vat_table, domain='vat')
+
+    @traced
+    @profiled
+    async def plenty_api_get_price_configuration(self,
+                                                 minimal: bool = False,
+                                                 last_update: str = '',
+                                                 concurrency: int = None):
+        """
+            Fetch the price configuration from PlentyMarkets.
+            (see `PlentyApi.plenty_api_get_price_configuration`)
+        """
+        query = utils.build_price_query(last_update=last_update)
+
+        prices = await self.__repeat_get_request_for_all_records(
+            domain='prices', query=query, concurrency=concurrency)
+
+        if not prices:
+            return None
+
+        if minimal:
+            with profiling.measure(phase='post_process'):
+                prices = [utils.shrink_price_configuration(data=price)
+                          for price in prices]
+
+        return self.__transform_data(data=prices, domain='prices')
+
+    @traced
+    @profiled
+    async def plenty_api_get_manufacturers(self,
+                                           refine: dict = None,
+                                           additional: list = None,
+                                           last_update: str = '',
+                                           concurrency: int = None):
+        """
+            Get a list of manufacturers (brands).
+            (see `PlentyApi.plenty_api_get_manufacturers`)
+        """
+        query = utils.build_manufacturer_query(refine=refine,
+                                               additional=additional,
+                                               last_update=last_update)
+
+        manufacturers = await self.__repeat_get_request_for_all_records(
+            domain='manufacturer', query=query, concurrency=concurrency)
+
+        return self.__transform_data(data=manufacturers, domain='manufacturer')
+
+    @traced
+    @profiled
+    async def plenty_api_get_referrers(self, column: str = ''):
+        """
+            Get a list of order referrers from PlentyMarkets.
+            (see `PlentyApi.plenty_api_get_referrers`)
+        """
+        query = utils.build_referrer_query(column=column)
+
+        # This request doesn't export in form of pages
+        referrers = await self.__plenty_api_request(method='get',
+                                                    domain='referrer',
+                                                    query=query)
+
+        return self.__transform_data(data=referrers, domain='referrer')
+
+    @traced
+    @profiled
+    async def plenty_api_get_items(self,
+                                   refine: dict = None,
+                                   additional: list = None,
+                                   last_update: str = '',
+                                   lang: str = '',
+                                   concurrency: int = None,
+                                   fields: list = None):
+        """
+            Get product data from PlentyMarkets.
+            (see `PlentyApi.plenty_api_get_items`)
+        """
+        query = utils.build_item_query(refine=refine, additional=additional,
+                                       last_update=last_update, lang=lang)
+
+        items = await self.__repeat_get_request_for_all_records(
+            domain='items', query=query, concurrency=concurrency,
+            fields=fields)
+
+        return self.__transform_data(data=items, domain='item',
+                                     fields=fields)
+
+    async def plenty_api_iter_items(self,
+                                    refine: dict = None,
+                                    additional: list = None,
+                                    last_update: str = '',
+                                    lang: str = '',
+                                    concurrency: int = None,
+                                    pages: bool = False,
+                                    chunk_size: int = 0,
+                                    fields: list = None,
+                                    columns: list = None):
+        """
+            Asynchronous iterator over the product data from PlentyMarkets,
+            yields lists of records per page with pages=True or chunks of
+            records in the data format with chunk_size (the DataFrame chunks
+            are fixed to [columns], if given).
+            (see `PlentyApi.plenty_api_get_items`)
+        """
+        query = utils.build_item_query(refine=refine, additional=additional,
+                                       last_update=last_update, lang=lang)
+
+        records = self.__iter_records(domain='items', query=query,
+                                      concurrency=concurrency, pages=pages,
+                                      chunk_size=chunk_size,
+                                      record_type='item', fields=fields,
+                                      columns=columns)
+        try:
+            async for record in records:
+                yield record
+        finally:
+            await records.aclose()
+
+    @traced
+    @profiled
+    async def plenty_api_get_variations(self,
+                                        refine: dict = None,
+                                        additional: list = None,
+                                        lang: str = '',
+                                        concurrency: int = None,
+                                        fields: list = None,
+                                        last_update: str = ''):
+        """
+            Get variation data from PlentyMarkets.
+            (see `PlentyApi.plenty_api_get_variations`)
+        """
+        query = utils.build_variation_query(refine=refine,
+                                            additional=additional,
+                                            last_update=last_update,
+                                            lang=lang)
+
+        variations = await self.__repeat_get_request_for_all_records(
+            domain='variations', query=query, concurrency=concurrency,
+            fields=fields)
+
+        return self.__transform_data(data=variations, domain='variation',
+                                     fields=fields)
+
+    async def plenty_api_iter_variations(self,
+                                         refine: dict = None,
+                                         additional: list = None,
+                                         lang: str = '',
+                                         concurrency: int = None,
+                                         pages: bool = False,
+                                         chunk_size: int = 0,
+                                         fields: list = None,
+                                         columns: list = None,
+                                         last_update: str = ''):
+        """
+            Asynchronous iterator over the variation data from PlentyMarkets,
+            yields lists of records per page with pages=True or chunks of
+            records in the data format with chunk_size (the DataFrame chunks
+            are fixed to [columns], if given).
+            (see `PlentyApi.plenty_api_get_variations`)
+        """
+        query = utils.build_variation_query(refine=refine,
+                                            additional=additional,
+                                            last_update=last_update,
+                                            lang=lang)
+
+        records = self.__iter_records(domain='variations', query=query,
+                                      concurrency=concurrency, pages=pages,
+                                      chunk_size=chunk_size,
+                                      record_type='variation', fields=fields,
+                                      columns=columns)
+        try:
+            async for record in records:
+                yield record
+        finally:
+            await records.aclose()
+
+# POST REQUESTS
+
+    @traced
+    async def plenty_api_set_image_availability(self,
+                                                item_id: str,
+                                                image_id: str,
+                                                target: dict) -> bool:
+        """
+            Create a marketplace availability for a specific item/image
+            combiniation.
+            (see `PlentyApi.plenty_api_set_image_availability`)
+        """
+        (path, data) = utils.build_image_availability(item_id=item_id,
+                                                      image_id=image_id,
+                                                      target=target)
+        if not path:
+            return False
+
+        response = await self.__plenty_api_request(method="post",
+                                                   domain="items",
+                                                   path=path,
+                                                   data=data)
+
+        if not response:
+            return False
+
+        return True
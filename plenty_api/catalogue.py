@@ -0,0 +1,235 @@
+"""
+    Python-PlentyMarkets-API-interface.
+
+    Interface to the resources from PlentyMarkets(https://www.plentymarkets.eu)
+
+    Copyright (C) 2020  Sebastian Fricke, Panasiam
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import datetime
+import gzip
+import os
+import tempfile
+import zlib
+import simplejson
+
+CATALOGUE_DOMAINS = ['items', 'variations']
+
+
+class CatalogueSnapshot():
+    """
+        Keep a local copy of all items and variations, which is updated with
+        the records changed since the previous update.
+
+        The first `update` loads the complete catalogue, every further call
+        requests only the items and variations updated since the watermark
+        (`updatedBetween`) and merges them by their ID. Deleted records
+        don't appear in these deltas, so every [reconcile_interval] seconds
+        all records are downloaded again (without additional elements) and
+        records missing from the API are removed from the snapshot.
+        The snapshot is stored as one compressed JSON file and the watermark
+        is only advanced after a complete update.
+    """
+    def __init__(self, api, path: str, additional: dict = None,
+                 lang: str = '', overlap: int = 300,
+                 reconcile_interval: int = 86400):
+        """
+            Parameter:
+                api         [PlentyApi] -   Client for the requests
+                path        [str]       -   Location of the snapshot file
+                additional  [dict]      -   Additional elements per domain
+                                            Example: {'variations':
+                                            ['variationSkus', 'stock']}
+                lang        [str]       -   Language of the product texts
+                overlap     [int]       -   Seconds before the watermark,
+                                            which are requested again
+                reconcile_interval [int]-   Seconds between the removals
+                                            of deleted records
+        """
+        self.api = api
+        self.path = path
+        self.additional = additional or {}
+        self.lang = lang
+        self.overlap = overlap
+        self.reconcile_interval = reconcile_interval
+        self.records: dict = {domain: {} for domain in CATALOGUE_DOMAINS}
+        self.watermark = ''
+        self.reconciled_at = ''
+        self.load()
+
+    @property
+    def items(self) -> dict:
+        """ Items of the snapshot by their ID. """
+        return self.records['items']
+
+    @property
+    def variations(self) -> dict:
+        """ Variations of the snapshot by their ID. """
+        return self.records['variations']
+
+    def load(self) -> bool:
+        """
+            Read the stored snapshot.
+
+            Return:
+                            [bool]  -   False if there is no valid snapshot
+        """
+        try:
+            with gzip.open(self.path, 'rb') as snapshot_file:
+                snapshot = simplejson.loads(snapshot_file.read())
+        except (OSError, EOFError, zlib.error,
+                simplejson.errors.JSONDecodeError):
+            return False
+        self.records = {
+            domain: {record['id']: record
+                     for record in snapshot.get(domain, [])}
+            for domain in CATALOGUE_DOMAINS}
+        self.watermark = snapshot.get('watermark', '')
+        self.reconciled_at = snapshot.get('reconciled_at', '')
+        return True
+
+    def save(self) -> None:
+        """ Write the snapshot atomically. """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        snapshot = {domain: list(records.values())
+                    for domain, records in self.records.items()}
+        snapshot['watermark'] = self.watermark
+        snapshot['reconciled_at'] = self.reconciled_at
+        descriptor, temp_path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(descriptor, 'wb') as temp_file:
+            with gzip.GzipFile(fileobj=temp_file, mode='wb') as snapshot_file:
+                snapshot_file.write(simplejson.dumps(snapshot).encode('utf-8'))
+        os.replace(temp_path, self.path)
+
+    def __iter_pages(self, domain: str, last_update: str = '',
+                     reconcile: bool = False):
+        if reconcile:
+            # The REST API can't project the records, without additional
+            # elements every page still contains the complete base records
+            arguments = {}
+        else:
+            arguments = {'additional': list(self.additional.get(domain, [])),
+                         'last_update': last_update, 'lang': self.lang}
+        if domain == 'items':
+            return self.api.plenty_api_iter_items(pages=True, **arguments)
+        return self.api.plenty_api_iter_variations(pages=True, **arguments)
+
+    def __is_reconcile_due(self, now: datetime.datetime) -> bool:
+        if not self.reconciled_at:
+            return True
+        previous = datetime.datetime.fromisoformat(self.reconciled_at)
+        return (now - previous).total_seconds() >= self.reconcile_interval
+
+    def update(self, reconcile: bool = None) -> dict:
+        """
+            Load the complete catalogue or merge the records changed since
+            the previous update.
+
+            Parameter:
+                reconcile   [bool]  -   Remove deleted records (default:
+                                        once per [reconcile_interval])
+
+            Return:
+                            [dict]  -   Amount of changed and deleted
+                                        records per domain / {} on failure
+                                        Example: {'items': {'changed': 2,
+                                                            'deleted': 0}, ..}
+        """
+        started = datetime.datetime.now().astimezone()
+        full = not self.watermark
+        last_update = ''
+        if not full:
+            previous = datetime.datetime.fromisoformat(self.watermark)
+            last_update = (previous - datetime.timedelta(
+                seconds=self.overlap)).isoformat(timespec='seconds')
+        if reconcile is None:
+            reconcile = not full and self.__is_reconcile_due(now=started)
+
+        summary: dict = {}
+        for domain in CATALOGUE_DOMAINS:
+            received: dict = {}
+            for page in self.__iter_pages(domain=domain,
+                                          last_update=last_update):
+                if page is None:
+                    print(f"ERROR: Catalogue update of {domain} incomplete, "
+                          "the snapshot is kept.")
+                    return {}
+                for record in page:
+                    received[record['id']] = record
+            if full:
+                self.records[domain] = received
+            else:
+                self.records[domain].update(received)
+            summary[domain] = {'changed': len(received), 'deleted': 0}
+
+        if reconcile:
+            for domain in CATALOGUE_DOMAINS:
+                deleted = self.__reconcile(domain=domain)
+                if deleted is None:
+                    return {}
+                summary[domain]['deleted'] = deleted
+        if full or reconcile:
+            self.reconciled_at = started.isoformat(timespec='seconds')
+
+        self.watermark = started.isoformat(timespec='seconds')
+        self.save()
+        return summary
+
+    def __reconcile(self, domain: str):
+        ids = set()
+        for page in self.__iter_pages(domain=domain, reconcile=True):
+            if page is None:
+                print(f"ERROR: Reconciliation of {domain} incomplete, no "
+                      "records are removed.")
+                return None
+            ids.update(record['id'] for record in page)
+        deleted = [record_id for record_id in self.records[domain]
+                   if record_id not in ids]
+        for record_id in deleted:
+            del self.records[domain][record_id]
+        return len(deleted)
+
+    def get_item(self, item_id: int) -> dict:
+        """
+            Parameter:
+                item_id     [int]
+
+            Return:
+                            [dict]  -   Item in JSON format / {}
+        """
+        return self.items.get(int(item_id), {})
+
+    def get_variation(self, variation_id: int) -> dict:
+        """
+            Parameter:
+                variation_id [int]
+
+            Return:
+                            [dict]  -   Variation in JSON format / {}
+        """
+        return self.variations.get(int(variation_id), {})
+
+    def get_item_variations(self, item_id: int) -> list:
+        """
+            Parameter:
+                item_id     [int]
+
+            Return:
+                            [list]  -   Variations of the item
+        """
+        return [variation for variation in self.variations.values()
+                if variation.get('itemId') == int(item_id)]
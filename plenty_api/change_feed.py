@@ -0,0 +1,244 @@
+"""
+    Python-PlentyMarkets-API-interface.
+
+    Interface to the resources from PlentyMarkets(https://www.plentymarkets.eu)
+
+    Copyright (C) 2020  Sebastian Fricke, Panasiam
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import datetime
+import os
+import tempfile
+import threading
+import simplejson
+
+import plenty_api.utils as utils
+from plenty_api.export import parse_timestamp
+
+FEED_DOMAINS = ['order', 'item', 'variation']
+
+
+class ChangeFeed():
+    """
+        Poll PlentyMarkets for changed orders, items and variations and
+        dispatch every change once, as a replacement for webhooks.
+
+        Each poll requests the records changed since the high-water mark of
+        the domain minus [overlap] seconds, to catch records which were
+        saved with a delay. Records from the overlap, that were already
+        dispatched with the same 'updatedAt' date, are skipped.
+        The high-water marks and the recently dispatched changes are
+        stored in a JSON file, so a restarted feed continues where it
+        stopped. A failed poll keeps the high-water mark of the domain and
+        the next poll requests the same window again.
+
+        Every change is dispatched as an event:
+            {'domain': 'order', 'id': 1234, 'updated_at': '...',
+             'record': {...}}
+    """
+    def __init__(self, api, path: str, domains: list = None,
+                 start: str = '', overlap: int = 300, interval: float = 60,
+                 additional: dict = None, queue=None):
+        """
+            Parameter:
+                api         [PlentyApi] -   Client for the requests
+                path        [str]       -   Location of the state file
+                domains     [list]      -   Polled domains (default: order)
+                                            {order/item/variation}
+                start       [str]       -   Date of the first poll window,
+                                            without a stored high-water mark
+                                            (default: changes after the
+                                            first poll)
+                overlap     [int]       -   Seconds before the high-water
+                                            mark, which are requested again
+                interval    [float]     -   Seconds between the polls of
+                                            the background thread
+                additional  [dict]      -   Additional elements per domain
+                                            Example: {'order': ['comments']}
+                queue       [Queue]     -   Put all events into this queue
+        """
+        domains = domains or ['order']
+        invalid_domains = set(domains).difference(FEED_DOMAINS)
+        if invalid_domains:
+            raise ValueError(f"Invalid domains {invalid_domains}, valid "
+                             f"domains: {', '.join(FEED_DOMAINS)}")
+        if start and not utils.parse_date(date=start):
+            raise ValueError(f"Invalid start date {start}")
+        self.api = api
+        self.path = path
+        self.domains = domains
+        self.start_date = start
+        self.overlap = overlap
+        self.interval = interval
+        self.additional = additional or {}
+        self.queue = queue
+        self.callbacks: list = []
+        self.state: dict = {}
+        self.__lock = threading.Lock()
+        self.__timer = None
+        self.load()
+
+    def load(self) -> None:
+        """ Read the high-water marks from the state file. """
+        try:
+            with open(self.path, 'r') as state_file:
+                self.state = simplejson.load(state_file)
+        except (OSError, simplejson.errors.JSONDecodeError):
+            self.state = {}
+
+    def save(self) -> None:
+        """ Write the high-water marks atomically. """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        descriptor, temp_path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(descriptor, 'w') as temp_file:
+            simplejson.dump(self.state, temp_file)
+        os.replace(temp_path, self.path)
+
+    def get_watermark(self, domain: str) -> str:
+        """
+            Parameter:
+                domain      [str]
+
+            Return:
+                            [str]   -   High-water mark (W3C date) / ''
+        """
+        return self.state.get(domain, {}).get('watermark', '')
+
+    def subscribe(self, callback, domain: str = '') -> None:
+        """
+            Register a function, which is called with every event.
+
+            Parameter:
+                callback    [func]  -   callback(event)
+                domain      [str]   -   Only call it for this domain
+        """
+        self.callbacks.append((domain, callback))
+
+    def __dispatch(self, event: dict) -> None:
+        if self.queue is not None:
+            self.queue.put(event)
+        for domain, callback in self.callbacks:
+            if domain and domain != event['domain']:
+                continue
+            try:
+                callback(event)
+            except Exception as err:
+                print(f"ERROR: Change feed callback failed for "
+                      f"{event['domain']} {event['id']}: {err}")
+
+    def __iter_pages(self, domain: str, start: str, end: str):
+        additional = list(self.additional.get(domain, [])) or None
+        if domain == 'order':
+            return self.api.plenty_api_iter_orders_by_date(
+                start=start, end=end, date_type='change',
+                additional=additional, pages=True)
+        if domain == 'item':
+            return self.api.plenty_api_iter_items(
+                additional=additional, last_update=start, pages=True)
+        return self.api.plenty_api_iter_variations(
+            additional=additional, last_update=start, pages=True)
+
+    def poll_domain(self, domain: str) -> int:
+        """
+            Request the changes of one domain and dispatch new ones.
+
+            Parameter:
+                domain      [str]
+
+            Return:
+                            [int]   -   Amount of events / -1 on failure
+        """
+        started = datetime.datetime.now().astimezone()
+        state = self.state.setdefault(domain, {'watermark': '', 'seen': {}})
+        if state['watermark']:
+            watermark = datetime.datetime.fromisoformat(state['watermark'])
+            start = (watermark - datetime.timedelta(seconds=self.overlap))\
+                .isoformat(timespec='seconds')
+        elif self.start_date:
+            start = self.start_date
+        else:
+            state['watermark'] = started.isoformat(timespec='seconds')
+            self.save()
+            return 0
+
+        events = 0
+        seen = state['seen']
+        for page in self.__iter_pages(
+                domain=domain, start=start,
+                end=started.isoformat(timespec='seconds')):
+            if page is None:
+                print(f"ERROR: Change feed poll of {domain} incomplete, "
+                      "the high-water mark is kept.")
+                self.save()
+                return -1
+            for record in page:
+                record_id = str(record['id'])
+                updated_at = record.get('updatedAt') or ''
+                if updated_at:
+                    if seen.get(record_id) == updated_at:
+                        continue
+                    seen[record_id] = updated_at
+                self.__dispatch(event={'domain': domain, 'id': record['id'],
+                                       'updated_at': updated_at,
+                                       'record': record})
+                events += 1
+
+        state['watermark'] = started.isoformat(timespec='seconds')
+        # Only changes within the next overlap window can be requested again
+        limit = started - datetime.timedelta(seconds=self.overlap)
+        state['seen'] = {}
+        for record_id, updated_at in seen.items():
+            updated = parse_timestamp(value=updated_at)
+            if updated and updated >= limit:
+                state['seen'][record_id] = updated_at
+        self.save()
+        return events
+
+    def poll(self) -> int:
+        """
+            Poll all domains once.
+
+            Return:
+                            [int]   -   Amount of events / -1 if a domain
+                                        failed
+        """
+        with self.__lock:
+            results = [self.poll_domain(domain=domain)
+                       for domain in self.domains]
+        if -1 in results:
+            return -1
+        return sum(results)
+
+    def start(self) -> None:
+        """ Poll every [interval] seconds on a background thread. """
+        self.stop()
+        self.__timer = threading.Timer(self.interval, self.__run)
+        self.__timer.daemon = True
+        self.__timer.start()
+
+    def __run(self) -> None:
+        try:
+            self.poll()
+        finally:
+            if self.__timer is not None:
+                self.start()
+
+    def stop(self) -> None:
+        """ Stop the background polling. """
+        if self.__timer is not None:
+            self.__timer.cancel()
+            self.__timer = None
@@ -143,3 +143,84 @@ VALID_COUNTRY_MAP = {
     "ZM": 252, "ZW": 253, "AE": 254, "CUW": 258, "SXM": 259,
     "BES": 260, "BL": 261
 }
+
+# Call limit headers of the API responses, the part in between the prefix
+# and the suffix names the limit window (e.g. global-short-period)
+RATE_LIMIT_HEADER_PREFIX = 'x-plenty-'
+RATE_LIMIT_HEADER_FIELDS = {
+    '-calls-left': 'calls_left',
+    '-decay': 'decay',
+    '-limit': 'limit'
+}
+
+# Transient failures, which are repeated by the default retry policy
+RETRY_STATUSES = [429, 500, 502, 503, 504]
+RETRY_METHODS = ['get']
+
+VALID_DATA_FORMATS = ['json', 'dataframe', 'arrow', 'polars']
+
+# Column types of the DataFrame output per domain, the types are:
+# int, float, bool, datetime, category and string. Columns without a type
+# keep the type inferred by pandas (e.g. lists of sub-entries as objects)
+DATAFRAME_SCHEMA = {
+    'order': {
+        'id': 'int', 'typeId': 'int', 'originOrderId': 'int',
+        'plentyId': 'int', 'locationId': 'int', 'ownerId': 'int',
+        'numberOfDecimals': 'int', 'roundTotalsOnly': 'bool',
+        'statusId': 'category', 'statusName': 'category',
+        'referrerId': 'category', 'lockStatus': 'category',
+        'createdAt': 'datetime', 'updatedAt': 'datetime'
+    },
+    'item': {
+        'id': 'int', 'position': 'int', 'manufacturerId': 'int',
+        'mainVariationId': 'int', 'ownerId': 'int', 'stockType': 'int',
+        'storeSpecial': 'int', 'condition': 'int', 'conditionApi': 'int',
+        'itemType': 'category', 'producingCountryId': 'category',
+        'isSerialNumber': 'bool', 'isShippingPackage': 'bool',
+        'isShippableByAmazon': 'bool', 'customsTariffNumber': 'string',
+        'createdAt': 'datetime', 'updatedAt': 'datetime'
+    },
+    'variation': {
+        'id': 'int', 'itemId': 'int', 'mainVariationId': 'int',
+        'position': 'int', 'availability': 'int', 'mainWarehouseId': 'int',
+        'weightG': 'int', 'weightNetG': 'int', 'widthMM': 'int',
+        'lengthMM': 'int', 'heightMM': 'int', 'unitsContained': 'int',
+        'purchasePrice': 'float', 'movingAveragePrice': 'float',
+        'isMain': 'bool', 'isActive': 'bool', 'number': 'string',
+        'model': 'string', 'externalId': 'string',
+        'createdAt': 'datetime', 'updatedAt': 'datetime',
+        'relatedUpdatedAt': 'datetime'
+    },
+    'attribute': {
+        'id': 'int', 'position': 'int', 'backendName': 'string',
+        'isSurchargePercental': 'bool', 'isLinkableToImage': 'bool',
+        'isGroupable': 'bool', 'typeOfSelectionInOnlineStore': 'category',
+        'updatedAt': 'datetime'
+    },
+    'prices': {
+        'id': 'int', 'position': 'int', 'minimumOrderQuantity': 'float',
+        'type': 'category', 'interval': 'category',
+        'isCustomerPrice': 'bool', 'isDisplayedByDefault': 'bool',
+        'isLiveConversion': 'bool', 'createdAt': 'datetime',
+        'updatedAt': 'datetime'
+    },
+    'manufacturer': {
+        'id': 'int', 'position': 'int', 'name': 'string',
+        'externalName': 'string', 'countryId': 'category',
+        'updatedAt': 'datetime'
+    },
+    'referrer': {
+        'id': 'category', 'name': 'string', 'backendName': 'string',
+        'origin': 'category', 'isEditable': 'bool', 'isFilterable': 'bool'
+    }
+}
+
+# Default time to live in seconds of cached responses per domain, domains
+# without an entry are not cached
+RESPONSE_CACHE_TTL = {
+    'vat': 86400,
+    'referrer': 86400,
+    'prices': 3600,
+    'attribute': 3600,
+    'manufacturer': 3600
+}
@@ -0,0 +1,221 @@
+"""
+    Python-PlentyMarkets-API-interface.
+
+    Interface to the resources from PlentyMarkets(https://www.plentymarkets.eu)
+
+    Copyright (C) 2020  Sebastian Fricke, Panasiam
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+    Conversion of API responses into pandas DataFrames with typed columns.
+"""
+
+import pandas
+
+import plenty_api.constants as constants
+
+
+def flatten_records(records: list) -> dict:
+    """
+        Collect the values of a list of records column by column. Nested
+        dictionaries are flattened into columns with dotted names (like
+        `pandas.json_normalize`), lists are kept as they are.
+
+        Parameter:
+            records     [list]  -   JSON records from the API
+
+        Return:
+                        [dict]  -   {column name: list of values}
+    """
+    columns: dict = {}
+    length = len(records)
+
+    def add(index: int, prefix: str, record: dict):
+        for key, value in record.items():
+            name = prefix + key
+            if isinstance(value, dict) and value:
+                add(index, name + '.', value)
+                continue
+            column = columns.get(name)
+            if column is None:
+                column = columns[name] = [None] * length
+            column[index] = value
+
+    for index, record in enumerate(records):
+        add(index, '', record)
+    return columns
+
+
+def convert_column(values: list, column_type: str,
+                   nullable: bool = False,
+                   categories: list = None) -> pandas.Series:
+    """
+        Create a series with the data type of a schema column.
+
+        Parameter:
+            values      [list]  -   Values of the column
+            column_type [str]   -   Type name from the schema
+                                    {int, float, bool, datetime, category,
+                                     string, object}
+            nullable    [bool]  -   Always use the nullable integer and
+                                    boolean types
+            categories  [list]  -   Known categories of the column, new
+                                    values are appended to the list
+
+        Return:
+                        [Series]
+    """
+    series = pandas.Series(values, dtype=object)
+    if column_type == 'int':
+        series = pandas.to_numeric(series, errors='coerce')
+        if nullable or series.isna().any():
+            return series.astype('Int64')
+        return series.astype('int64')
+    if column_type == 'float':
+        return pandas.to_numeric(series, errors='coerce').astype('float64')
+    if column_type == 'bool':
+        if nullable or series.isna().any():
+            return series.astype('boolean')
+        return series.astype('bool')
+    if column_type == 'datetime':
+        return parse_datetime(series=series)
+    if column_type == 'category':
+        if categories is None:
+            return series.astype('category')
+        known = set(categories)
+        for value in series.dropna().unique():
+            if value not in known:
+                categories.append(value)
+                known.add(value)
+        return series.astype(pandas.CategoricalDtype(categories=categories))
+    if column_type == 'string':
+        return series.astype('string')
+    if column_type == 'object':
+        return series
+    return pandas.Series(values)
+
+
+def parse_datetime(series: pandas.Series) -> pandas.Series:
+    """
+        Convert W3C date strings into timezone aware (UTC) datetimes,
+        invalid dates are converted to NaT.
+
+        Parameter:
+            series      [Series]
+
+        Return:
+                        [Series]
+    """
+    if int(pandas.__version__.split('.')[0]) >= 2:
+        return pandas.to_datetime(series, utc=True, errors='coerce',
+                                  format='ISO8601')
+    return pandas.to_datetime(series, utc=True, errors='coerce')
+
+
+def build_dataframe(data: list, domain: str = '',
+                    schema: dict = None) -> pandas.DataFrame:
+    """
+        Build a DataFrame from the records of a response with the column
+        types of the domain schema (`constants.DATAFRAME_SCHEMA`).
+        The columns of the schema are always part of the DataFrame, even if
+        no record contains the field (see `utils.project_schema` to reduce
+        the schema to the requested fields).
+
+        Parameter:
+            data        [list]  -   JSON records from the API
+            domain      [str]   -   Domain of the records {order/item/..}
+            schema      [dict]  -   Custom column types, replaces the
+                                    schema of the domain
+
+        Return:
+                        [DataFrame]
+    """
+    if schema is None:
+        schema = constants.DATAFRAME_SCHEMA.get(domain, {})
+    if not isinstance(data, list) or not schema:
+        return pandas.json_normalize(data)
+
+    records = [record for record in data if isinstance(record, dict)]
+    columns = flatten_records(records=records)
+    for name in schema:
+        columns.setdefault(name, [None] * len(records))
+
+    return pandas.DataFrame(
+        {name: convert_column(values=values, column_type=schema.get(name))
+         for name, values in columns.items()})
+
+
+class DataFrameChunker():
+    """
+        Build DataFrames from consecutive chunks of records with the same
+        columns and data types.
+
+        The columns are fixed by [columns], or else by the schema of the
+        domain and the fields of the first chunk. Fields that only appear in
+        later chunks are dropped with a warning. Integer and boolean columns
+        always use the nullable types of pandas, fields without a type in
+        the schema are kept as objects and the categories of a column are
+        accumulated over all chunks (every chunk knows the categories of
+        the previous chunks).
+    """
+    def __init__(self, domain: str = '', schema: dict = None,
+                 columns: list = None):
+        """
+            Parameter:
+                domain      [str]   -   Domain of the records
+                schema      [dict]  -   Custom column types, replaces the
+                                        schema of the domain
+                columns     [list]  -   Fixed columns of all chunks
+                                        (flattened names e.g. 'owner.name')
+        """
+        if schema is None:
+            schema = constants.DATAFRAME_SCHEMA.get(domain, {})
+        self.schema = dict(schema)
+        self.columns: list = list(columns or [])
+        # Dropped fields, that were already reported
+        self.dropped: set = set()
+        self.categories = {name: [] for name, column_type
+                           in self.schema.items() if column_type == 'category'}
+
+    def build(self, records: list) -> pandas.DataFrame:
+        """
+            Convert a chunk of records into a DataFrame.
+
+            Parameter:
+                records     [list]  -   JSON records from the API
+
+            Return:
+                            [DataFrame]
+        """
+        records = [record for record in records if isinstance(record, dict)]
+        columns = flatten_records(records=records)
+        if not self.columns:
+            self.columns = list(dict.fromkeys(list(self.schema) +
+                                              list(columns)))
+        dropped = [name for name in columns
+                   if name not in self.columns and name not in self.dropped]
+        if dropped:
+            self.dropped.update(dropped)
+            print(f"WARNING: fields not part of the DataFrame columns are "
+                  f"dropped: {', '.join(dropped)}, fix the columns with "
+                  "the columns parameter")
+
+        return pandas.DataFrame(
+            {name: convert_column(
+                values=columns.get(name, [None] * len(records)),
+                column_type=self.schema.get(name, 'object'), nullable=True,
+                categories=self.categories.get(name))
+             for name in self.columns},
+            index=pandas.RangeIndex(len(records)))
@@ -0,0 +1,163 @@
+"""
+    Python-PlentyMarkets-API-interface.
+
+    Interface to the resources from PlentyMarkets(https://www.plentymarkets.eu)
+
+    Copyright (C) 2020  Sebastian Fricke, Panasiam
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import simplejson
+
+# Backends in order of preference for the 'auto' selection
+DECODER_BACKENDS = ['orjson', 'msgspec', 'simplejson']
+
+
+class DecodeError(ValueError):
+    """ The response body is not a valid JSON document. """
+
+
+class JsonDecoder():
+    """
+        Decode the JSON body of the API responses with the fastest available
+        library.
+
+        orjson and msgspec decode multi-megabyte pages several times faster
+        than simplejson, which is used when neither of them is installed.
+        Every backend raises a `DecodeError` for invalid documents.
+    """
+    def __init__(self, backend: str = 'auto'):
+        """
+            Parameter:
+                backend     [str]   -   auto / orjson / msgspec / simplejson
+        """
+        if backend == 'auto':
+            candidates = DECODER_BACKENDS
+        elif backend in DECODER_BACKENDS:
+            candidates = [backend]
+        else:
+            raise ValueError(f"Invalid JSON decoder {backend}, valid "
+                             f"decoders: {', '.join(DECODER_BACKENDS)}")
+
+        for candidate in candidates:
+            loads = self.__load_backend(name=candidate)
+            if loads:
+                break
+        else:
+            raise ImportError(f"The JSON decoder '{backend}' is not "
+                              "installed")
+        self.backend = candidate
+        self.__loads, self.__errors = loads
+
+    @staticmethod
+    def __load_backend(name: str):
+        if name == 'orjson':
+            try:
+                import orjson
+            except ImportError:
+                return None
+            return orjson.loads, (orjson.JSONDecodeError,)
+        if name == 'msgspec':
+            try:
+                import msgspec.json
+            except ImportError:
+                return None
+            return msgspec.json.decode, (msgspec.DecodeError,)
+        return simplejson.loads, (simplejson.errors.JSONDecodeError,)
+
+    def decode(self, content):
+        """
+            Parse a JSON document.
+
+            Parameter:
+                content     [bytes/str] -   Response body
+
+            Return:
+                            [dict/list]
+        """
+        try:
+            return self.__loads(content)
+        except self.__errors as err:
+            raise DecodeError(str(err)) from err
+
+
+class CountingReader():
+    """
+        Readable binary stream, that counts the bytes read from the wrapped
+        [stream] (e.g. the decompressed body of a streamed response).
+    """
+    def __init__(self, stream):
+        """
+            Parameter:
+                stream      [file]  -   Readable binary stream
+        """
+        self.stream = stream
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.stream.read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+def iter_entries(stream, meta: dict):
+    """
+        Parse a paginated response incrementally while it is downloaded and
+        yield each record of the `entries` list as soon as it is complete.
+        Only the current record is kept in memory.
+
+        The top-level values of the response (page, isLastPage,
+        lastPageNumber, ..) are collected in [meta], which is complete once
+        the generator is exhausted. An error response of the API sets
+        meta['error'] to its message.
+
+        Parameter:
+            stream      [file]  -   Readable binary stream of the body
+            meta        [dict]  -   Receives the top-level values
+
+        Return:
+                        [generator]
+    """
+    try:
+        import ijson
+    except ImportError as err:
+        raise ImportError(
+            "Streaming requires the 'ijson' package, install it with "
+            "`pip install ijson`") from err
+
+    builder = None
+    try:
+        for prefix, event, value in ijson.parse(stream, use_float=True):
+            if builder is not None:
+                builder.event(event, value)
+                if prefix == 'entries.item' and \
+                        event in ['end_map', 'end_array']:
+                    yield builder.value
+                    builder = None
+            elif prefix == 'entries.item':
+                if event in ['start_map', 'start_array']:
+                    builder = ijson.ObjectBuilder()
+                    builder.event(event, value)
+                else:
+                    yield value
+            elif prefix == 'error.message':
+                meta['error'] = value
+            elif prefix and '.' not in prefix and \
+                    event in ['string', 'number', 'boolean', 'null']:
+                meta[prefix] = value
+    except ijson.JSONError as err:
+        raise DecodeError(str(err)) from err
+    if not meta:
+        raise DecodeError('Empty response')
@@ -0,0 +1,389 @@
+"""
+    Python-PlentyMarkets-API-interface.
+
+    Interface to the resources from PlentyMarkets(https://www.plentymarkets.eu)
+
+    Copyright (C) 2020  Sebastian Fricke, Panasiam
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import datetime
+import os
+import simplejson
+
+import plenty_api.constants as constants
+import plenty_api.utils as utils
+
+VALID_FILE_FORMATS = ['parquet', 'arrow']
+
+
+def parse_timestamp(value):
+    """
+        Convert a W3C date string into a UTC datetime, invalid values are
+        converted to None.
+
+        Parameter:
+            value       [str]
+
+        Return:
+                        [datetime/None]
+    """
+    if not isinstance(value, str):
+        return None
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    try:
+        date = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if not date.tzinfo:
+        date = date.replace(tzinfo=datetime.timezone.utc)
+    return date.astimezone(datetime.timezone.utc)
+
+
+def convert_value(value, column_type: str):
+    """
+        Convert a field of a record into the python type of its column,
+        values that don't match the type are converted to None.
+
+        Parameter:
+            value       [any]
+            column_type [str]   -   Type name from the schema
+
+        Return:
+                        [any]
+    """
+    if value is None:
+        return None
+    try:
+        if column_type == 'int':
+            return int(value)
+        if column_type == 'float':
+            return float(value)
+    except (TypeError, ValueError):
+        return None
+    if column_type == 'bool':
+        return bool(value)
+    if column_type == 'datetime':
+        return parse_timestamp(value=value)
+    if column_type == 'json':
+        return simplejson.dumps(value)
+    return str(value)
+
+
+def get_field(record: dict, path: str):
+    """
+        Get the value of a dotted path (e.g. 'owner.id') from a record.
+
+        Parameter:
+            record      [dict]
+            path        [str]
+
+        Return:
+                        [any]
+    """
+    value = record
+    for key in path.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def get_arrow_types(pyarrow) -> dict:
+    """
+        Map the type names of the schema to Arrow data types.
+
+        Parameter:
+            pyarrow     [module]
+
+        Return:
+                        [dict]
+    """
+    return {
+        'int': pyarrow.int64(),
+        'float': pyarrow.float64(),
+        'bool': pyarrow.bool_(),
+        'datetime': pyarrow.timestamp('us', tz='UTC'),
+        'category': pyarrow.dictionary(pyarrow.int32(), pyarrow.string()),
+        'string': pyarrow.string(),
+        'json': pyarrow.string()
+    }
+
+
+def build_table(data, domain: str = '', schema: dict = None):
+    """
+        Build an Arrow table from the records of a response.
+
+        The fields of the domain schema (`constants.DATAFRAME_SCHEMA`) are
+        converted into their column type and always part of the table. The
+        type of the remaining fields is inferred, nested objects and lists
+        of sub-entries (e.g. `orderItems`) become struct and list columns.
+        Fields with inconsistent values are stored as JSON strings.
+
+        Parameter:
+            data        [list/dict] -   JSON response data
+            domain      [str]       -   Domain of the records
+            schema      [dict]      -   Custom column types, replaces the
+                                        schema of the domain
+
+        Return:
+                        [pyarrow.Table]
+    """
+    try:
+        import pyarrow
+    except ImportError as err:
+        raise ImportError(
+            "The 'arrow' data format requires the 'pyarrow' package, install "
+            "it with `pip install pyarrow`") from err
+
+    if schema is None:
+        schema = constants.DATAFRAME_SCHEMA.get(domain, {})
+    if isinstance(data, dict):
+        data = [data]
+    records = [record for record in data if isinstance(record, dict)]
+    names = list(schema)
+    for record in records:
+        names.extend(name for name in record if name not in schema)
+    names = list(dict.fromkeys(names))
+
+    types = get_arrow_types(pyarrow=pyarrow)
+    arrays = []
+    for name in names:
+        values = [record.get(name) for record in records]
+        column_type = schema.get(name)
+        if column_type:
+            values = [convert_value(value=value, column_type=column_type)
+                      for value in values]
+        if column_type == 'category':
+            arrays.append(pyarrow.array(
+                values, type=pyarrow.string()).dictionary_encode())
+        elif column_type:
+            arrays.append(pyarrow.array(
+                values, type=types.get(column_type, pyarrow.string())))
+        else:
+            try:
+                arrays.append(pyarrow.array(values))
+            except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+                arrays.append(pyarrow.array(
+                    [convert_value(value=value, column_type='json')
+                     for value in values], type=pyarrow.string()))
+    return pyarrow.Table.from_arrays(arrays, names=names)
+
+
+def build_polars(data, domain: str = '', schema: dict = None):
+    """
+        Build a polars DataFrame from the records of a response, the columns
+        are typed like the ones of `build_table`.
+
+        Parameter:
+            data        [list/dict] -   JSON response data
+            domain      [str]       -   Domain of the records
+            schema      [dict]      -   Custom column types
+
+        Return:
+                        [polars.DataFrame]
+    """
+    try:
+        import polars
+    except ImportError as err:
+        raise ImportError(
+            "The 'polars' data format requires the 'polars' package, install "
+            "it with `pip install polars`") from err
+    table = build_table(data=data, domain=domain, schema=schema)
+    return polars.from_arrow(table)
+
+
+class ArrowSink():
+    """
+        Write records of the API into a Parquet or Arrow IPC file, while
+        they are received.
+
+        The records are collected until [row_group_size] rows are buffered,
+        which are then written as one record batch (one row group of the
+        Parquet file). The memory usage is therefore bounded by the size of
+        a row group, regardless of the amount of exported records.
+        The columns are fixed per domain (`constants.DATAFRAME_SCHEMA`),
+        additional fields can be exported with [json_columns], which stores
+        them as JSON strings (e.g. the `orderItems` of an order).
+        The file is written to `[path].part` and only renamed to [path] when
+        it is complete, an export that fails leaves no file behind.
+    """
+    def __init__(self, path: str, domain: str, file_format: str = 'parquet',
+                 row_group_size: int = 65536, json_columns: list = None,
+                 schema: dict = None, compression: str = 'zstd'):
+        """
+            Parameter:
+                path        [str]   -   Location of the output file
+                domain      [str]   -   Domain of the records
+                                        {order/item/variation/..}
+                file_format [str]   -   parquet / arrow (Arrow IPC file)
+                row_group_size [int]-   Amount of rows per record batch
+                json_columns [list] -   Additional fields stored as JSON
+                schema      [dict]  -   Custom column types, replaces the
+                                        schema of the domain
+                compression [str]   -   Compression codec of the file
+        """
+        try:
+            import pyarrow
+        except ImportError as err:
+            raise ImportError(
+                "The export requires the 'pyarrow' package, install it "
+                "with `pip install pyarrow`") from err
+        if file_format not in VALID_FILE_FORMATS:
+            raise ValueError(f"Invalid file format {file_format}, valid "
+                             f"formats: {', '.join(VALID_FILE_FORMATS)}")
+
+        self.pyarrow = pyarrow
+        self.path = path
+        self.part_path = path + '.part'
+        self.domain = domain
+        self.file_format = file_format
+        self.row_group_size = row_group_size
+        self.compression = compression
+        if schema is None:
+            schema = constants.DATAFRAME_SCHEMA.get(domain, {})
+        self.columns = dict(schema)
+        for column in json_columns or []:
+            self.columns[column] = 'json'
+        if not self.columns:
+            raise ValueError(f"No schema for the domain {domain}")
+        self.schema = self.__build_schema()
+        self.rows = 0
+        self.closed = False
+        self.__buffer: list = []
+        self.__writer = None
+        # Category values of all written batches, the dictionaries only grow
+        # so that later batches are written as dictionary deltas
+        self.__dictionaries: dict = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+    def __build_schema(self):
+        pyarrow = self.pyarrow
+        types = get_arrow_types(pyarrow=pyarrow)
+        return pyarrow.schema(
+            [(name, types.get(column_type, pyarrow.string()))
+             for name, column_type in self.columns.items()])
+
+    def __open(self) -> None:
+        if self.file_format == 'parquet':
+            import pyarrow.parquet
+            self.__writer = pyarrow.parquet.ParquetWriter(
+                self.part_path, self.schema, compression=self.compression)
+        else:
+            import pyarrow.ipc
+            options = pyarrow.ipc.IpcWriteOptions(
+                compression=self.compression, emit_dictionary_deltas=True)
+            self.__writer = pyarrow.ipc.new_file(self.part_path,
+                                                 self.schema, options=options)
+
+    def __flush(self) -> None:
+        if not self.__buffer:
+            return
+        if not self.__writer:
+            self.__open()
+        arrays = []
+        for index, (name, column_type) in enumerate(self.columns.items()):
+            values = [convert_value(value=get_field(record=record, path=name),
+                                    column_type=column_type)
+                      for record in self.__buffer]
+            field_type = self.schema.field(index).type
+            if column_type == 'category':
+                arrays.append(self.__encode(name=name, values=values))
+            else:
+                arrays.append(self.pyarrow.array(values, type=field_type))
+        batch = self.pyarrow.RecordBatch.from_arrays(arrays,
+                                                     schema=self.schema)
+        if self.file_format == 'parquet':
+            self.__writer.write_batch(batch,
+                                      row_group_size=self.row_group_size)
+        else:
+            self.__writer.write_batch(batch)
+        self.rows += len(self.__buffer)
+        self.__buffer = []
+
+    def __encode(self, name: str, values: list):
+        dictionary = self.__dictionaries.setdefault(name, {})
+        indices = [None if value is None
+                   else dictionary.setdefault(value, len(dictionary))
+                   for value in values]
+        return self.pyarrow.DictionaryArray.from_arrays(
+            self.pyarrow.array(indices, type=self.pyarrow.int32()),
+            self.pyarrow.array(list(dictionary), type=self.pyarrow.string()))
+
+    def write(self, records: list) -> None:
+        """
+            Add records to the file, full row groups are written instantly.
+
+            Parameter:
+                records     [list]  -   JSON records from the API
+        """
+        for record in records:
+            self.__buffer.append(record)
+            if len(self.__buffer) >= self.row_group_size:
+                self.__flush()
+
+    def write_pages(self, pages) -> int:
+        """
+            Write all pages of an iterator
+            (e.g. `plenty_api_iter_orders_by_date(..., pages=True)`).
+            A failed page (None) aborts the export, as the file would be
+            incomplete.
+
+            Parameter:
+                pages       [iterable]  -   Lists of records per page
+
+            Return:
+                            [int]       -   Total amount of written rows
+        """
+        for index, page in enumerate(pages, start=1):
+            if page is None:
+                self.abort()
+                raise utils.PageFetchError(domain=self.domain, page=index)
+            self.write(records=page)
+        return self.rows + len(self.__buffer)
+
+    def close(self) -> None:
+        """ Write the remaining records and finish the file. """
+        if self.closed:
+            return
+        self.__flush()
+        if not self.__writer:
+            # Create a valid file without rows for an empty result
+            self.__open()
+        self.__writer.close()
+        self.__writer = None
+        os.replace(self.part_path, self.path)
+        self.closed = True
+
+    def abort(self) -> None:
+        """ Discard the buffered records and remove the incomplete file. """
+        if self.closed:
+            return
+        self.__buffer = []
+        if self.__writer:
+            self.__writer.close()
+            self.__writer = None
+        if os.path.exists(self.part_path):
+            os.remove(self.part_path)
+        self.closed = True
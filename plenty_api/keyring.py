@@ -1,17 +1,22 @@
 import getpass
-import keyring
 
 
 class CredentialManager():
+    """
+        Store the credentials within the system wide keyring, the keyring
+        module is imported on first use, as loading the backend is slow.
+    """
     def __init__(self):
         pass
 
     def set_credentials(self):
+        import keyring
         username = input('Username: ')
         keyring.set_password('plenty-identity', 'user', username)
         keyring.set_password('plenty-identity', 'password', getpass.getpass())
 
     def get_credentials(self):
+        import keyring
         user = keyring.get_password('plenty-identity', 'user')
         password = keyring.get_password('plenty-identity', 'password')
         if not user or not password:
@@ -19,5 +24,6 @@ class CredentialManager():
         return {'username': user, 'password': password}
 
     def delete_credentials(self):
+        import keyring
         keyring.delete_password('plenty-identity', 'user')
         keyring.delete_password('plenty-identity', 'password')
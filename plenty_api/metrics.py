@@ -0,0 +1,249 @@
+"""
+    Python-PlentyMarkets-API-interface.
+
+    Interface to the resources from PlentyMarkets(https://www.plentymarkets.eu)
+
+    Copyright (C) 2020  Sebastian Fricke, Panasiam
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import bisect
+import threading
+
+# Upper bounds of the duration histograms in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0, 60.0)
+
+METRIC_DESCRIPTIONS = {
+    'plenty_api_requests_total':
+        'HTTP requests by domain, route, method and status',
+    'plenty_api_pages_total': 'Received pages of paginated requests',
+    'plenty_api_response_bytes_total': 'Received bytes of response bodies',
+    'plenty_api_retries_total': 'Repeated requests by reason',
+    'plenty_api_request_duration_seconds': 'Duration of the HTTP requests',
+    'plenty_api_throttle_wait_seconds':
+        'Waiting time for the call limit (limit) and after 429 responses',
+    'plenty_api_decode_duration_seconds': 'Time to decode response bodies',
+    'plenty_api_transform_duration_seconds':
+        'Time to convert the records into the data format'
+}
+
+
+def build_key(name: str, labels: dict = None) -> tuple:
+    """
+        Identify a series by its name and labels, the label values are
+        converted into strings.
+
+        Parameter:
+            name        [str]
+            labels      [dict]
+
+        Return:
+                        [tuple]
+    """
+    return (name, tuple(sorted((label, str(value)) for label, value
+                               in (labels or {}).items())))
+
+
+class MetricsSink():
+    """
+        Receiver of the metrics of a client.
+
+        The base class discards all values, subclasses forward them to a
+        monitoring system (e.g. StatsD). Both methods are called from the
+        request threads, so they must be thread safe and fast.
+    """
+    def increment(self, name: str, value: float = 1,
+                  labels: dict = None) -> None:
+        """
+            Add to a counter.
+
+            Parameter:
+                name        [str]   -   Name of the counter
+                value       [float] -   Amount added to the counter
+                labels      [dict]  -   {'domain': 'orders', ..}
+        """
+
+    def observe(self, name: str, value: float, labels: dict = None) -> None:
+        """
+            Record a value of a histogram (durations in seconds).
+
+            Parameter:
+                name        [str]   -   Name of the histogram
+                value       [float] -   Measured value
+                labels      [dict]  -   {'domain': 'orders', ..}
+        """
+
+
+class InMemoryMetrics(MetricsSink):
+    """
+        Collect counters and histograms in memory, the default sink of the
+        clients. `snapshot` returns the current values and `to_prometheus`
+        renders them in the Prometheus text format.
+    """
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        """
+            Parameter:
+                buckets     [tuple] -   Upper bounds of the histograms
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.__counters: dict = {}
+        self.__histograms: dict = {}
+        self.__lock = threading.Lock()
+
+    def increment(self, name: str, value: float = 1,
+                  labels: dict = None) -> None:
+        key = build_key(name=name, labels=labels)
+        with self.__lock:
+            self.__counters[key] = self.__counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, labels: dict = None) -> None:
+        key = build_key(name=name, labels=labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.__lock:
+            histogram = self.__histograms.get(key)
+            if histogram is None:
+                histogram = self.__histograms[key] = {
+                    'count': 0, 'sum': 0.0,
+                    'buckets': [0] * (len(self.buckets) + 1)}
+            histogram['count'] += 1
+            histogram['sum'] += value
+            histogram['buckets'][index] += 1
+
+    def snapshot(self) -> dict:
+        """
+            Copy the current values.
+
+            Return:
+                [dict]  -   {'counters': {name: [{'labels': {..},
+                                                  'value': 3}]},
+                             'histograms': {name: [{'labels': {..},
+                                 'count': 2, 'sum': 0.4,
+                                 'buckets': [[0.005, 0], .., ['+Inf', 2]]}]}}
+                            (the bucket counts are cumulative)
+        """
+        bounds = list(self.buckets) + ['+Inf']
+        snapshot: dict = {'counters': {}, 'histograms': {}}
+        with self.__lock:
+            for (name, labels), value in sorted(self.__counters.items()):
+                snapshot['counters'].setdefault(name, []).append(
+                    {'labels': dict(labels), 'value': value})
+            for (name, labels), histogram in sorted(
+                    self.__histograms.items()):
+                cumulative = 0
+                buckets = []
+                for bound, count in zip(bounds, histogram['buckets']):
+                    cumulative += count
+                    buckets.append([bound, cumulative])
+                snapshot['histograms'].setdefault(name, []).append(
+                    {'labels': dict(labels), 'count': histogram['count'],
+                     'sum': histogram['sum'], 'buckets': buckets})
+        return snapshot
+
+    def get(self, name: str, **labels) -> float:
+        """
+            Sum of a counter or the count of a histogram over all label
+            combinations, that contain the given labels.
+
+            Parameter:
+                name        [str]   -   Name of the metric
+                labels      [str]   -   Filter, e.g. domain='orders'
+
+            Return:
+                            [float]
+        """
+        total = 0
+        with self.__lock:
+            for (metric, metric_labels), value in list(
+                    self.__counters.items()) + [
+                        (key, histogram['count']) for key, histogram
+                        in self.__histograms.items()]:
+                if metric != name:
+                    continue
+                metric_labels = dict(metric_labels)
+                if all(metric_labels.get(label) == str(expected)
+                       for label, expected in labels.items()):
+                    total += value
+        return total
+
+    def reset(self) -> None:
+        """ Remove all values. """
+        with self.__lock:
+            self.__counters = {}
+            self.__histograms = {}
+
+    def to_prometheus(self) -> str:
+        """
+            Render the current values in the Prometheus text format.
+
+            Return:
+                            [str]
+        """
+        return format_prometheus(snapshot=self.snapshot())
+
+
+def format_labels(labels: dict, extra: tuple = None) -> str:
+    """
+        Render a label set of the Prometheus text format.
+
+        Parameter:
+            labels      [dict]
+            extra       [tuple] -   Additional label (name, value)
+
+        Return:
+                        [str]   -   {name="value",..} / ''
+    """
+    items = list(labels.items())
+    if extra:
+        items.append(extra)
+    if not items:
+        return ''
+    escaped = []
+    for name, value in items:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"')\
+            .replace('\n', '\\n')
+        escaped.append(f'{name}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+def format_prometheus(snapshot: dict) -> str:
+    """
+        Render a snapshot of `InMemoryMetrics` in the Prometheus text
+        exposition format (version 0.0.4).
+
+        Parameter:
+            snapshot    [dict]
+
+        Return:
+                        [str]
+    """
+    lines = []
+    for name, series in snapshot['counters'].items():
+        lines.append(f"# HELP {name} {METRIC_DESCRIPTIONS.get(name, name)}")
+        lines.append(f"# TYPE {name} counter")
+        for entry in series:
+            lines.append(f"{name}{format_labels(entry['labels'])} "
+                         f"{entry['value']}")
+    for name, series in snapshot['histograms'].items():
+        lines.append(f"# HELP {name} {METRIC_DESCRIPTIONS.get(name, name)}")
+        lines.append(f"# TYPE {name} histogram")
+        for entry in series:
+            for bound, count in entry['buckets']:
+                labels = format_labels(entry['labels'], extra=('le', bound))
+                lines.append(f"{name}_bucket{labels} {count}")
+            labels = format_labels(entry['labels'])
+            lines.append(f"{name}_sum{labels} {entry['sum']}")
+            lines.append(f"{name}_count{labels} {entry['count']}")
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,302 @@
+"""
+    Python-PlentyMarkets-API-interface.
+
+    Interface to the resources from PlentyMarkets(https://www.plentymarkets.eu)
+
+    Copyright (C) 2020  Sebastian Fricke, Panasiam
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import datetime
+import sqlite3
+import simplejson
+
+import plenty_api.utils as utils
+from plenty_api.export import parse_timestamp
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS orders (
+        id INTEGER PRIMARY KEY,
+        type_id INTEGER,
+        status_id REAL,
+        referrer_id REAL,
+        plenty_id INTEGER,
+        contact_id INTEGER,
+        created_at TEXT,
+        updated_at TEXT,
+        data TEXT NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS order_items (
+        id INTEGER PRIMARY KEY,
+        order_id INTEGER NOT NULL,
+        type_id INTEGER,
+        item_variation_id INTEGER,
+        quantity REAL,
+        data TEXT NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS sync_state (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS orders_created ON orders (created_at)",
+    "CREATE INDEX IF NOT EXISTS orders_updated ON orders (updated_at)",
+    "CREATE INDEX IF NOT EXISTS orders_referrer ON orders (referrer_id)",
+    "CREATE INDEX IF NOT EXISTS orders_status ON orders (status_id)",
+    "CREATE INDEX IF NOT EXISTS orders_contact ON orders (contact_id)",
+    "CREATE INDEX IF NOT EXISTS items_order ON order_items (order_id)",
+    "CREATE INDEX IF NOT EXISTS items_variation "
+    "ON order_items (item_variation_id)"
+]
+
+
+def to_utc(date: str) -> str:
+    """
+        Normalize a W3C date into UTC, which makes the dates of the mirror
+        comparable as strings.
+
+        Parameter:
+            date        [str]
+
+        Return:
+                        [str]   -   YYYY-MM-DDTHH:MM:SSZ / None
+    """
+    parsed = parse_timestamp(value=date)
+    if not parsed:
+        return None
+    return parsed.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def get_contact_id(order: dict) -> int:
+    """
+        Find the ID of the customer within the relations of an order.
+
+        Parameter:
+            order       [dict]
+
+        Return:
+                        [int]/None
+    """
+    for relation in order.get('relations') or []:
+        if relation.get('referenceType') == 'contact' and \
+                relation.get('relation') in [None, 'receiver']:
+            return relation.get('referenceId')
+    return None
+
+
+class OrderMirror():
+    """
+        Keep a local SQLite copy of the orders and their order items.
+
+        The first `sync` loads all orders changed since the given start
+        date, every further call only requests the orders changed since the
+        previous sync (watermark) and replaces them in the database.
+        The watermark is stored within the database and only advanced after
+        a complete sync, a failed sync is repeated from the same watermark.
+        The local queries use the indexes on the creation date, referrer,
+        status and contact of the orders.
+
+        The connection of the mirror must not be shared between threads.
+    """
+    def __init__(self, api, path: str, overlap: int = 300):
+        """
+            Parameter:
+                api         [PlentyApi] -   Client for the requests
+                path        [str]       -   Location of the database file
+                overlap     [int]       -   Seconds before the watermark,
+                                            which are requested again to
+                                            cover orders changed during the
+                                            previous sync
+        """
+        self.api = api
+        self.path = path
+        self.overlap = overlap
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        with self.connection:
+            for statement in SCHEMA:
+                self.connection.execute(statement)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self) -> None:
+        """ Close the database connection. """
+        self.connection.close()
+
+    @property
+    def watermark(self) -> str:
+        """ Start date of the last complete sync (W3C date) or ''. """
+        row = self.connection.execute(
+            "SELECT value FROM sync_state WHERE key = 'watermark'").fetchone()
+        return row['value'] if row else ''
+
+    def upsert(self, orders: list) -> None:
+        """
+            Insert or replace orders together with their order items.
+
+            Parameter:
+                orders      [list]  -   Order records in JSON format
+        """
+        order_rows = []
+        item_rows = []
+        for order in orders:
+            order_rows.append((
+                order['id'], order.get('typeId'), order.get('statusId'),
+                order.get('referrerId'), order.get('plentyId'),
+                get_contact_id(order=order),
+                to_utc(date=order.get('createdAt')),
+                to_utc(date=order.get('updatedAt')),
+                simplejson.dumps(order)))
+            for item in order.get('orderItems') or []:
+                item_rows.append((
+                    item['id'], order['id'], item.get('typeId'),
+                    item.get('itemVariationId'), item.get('quantity'),
+                    simplejson.dumps(item)))
+
+        with self.connection:
+            self.connection.executemany(
+                "DELETE FROM order_items WHERE order_id = ?",
+                [(row[0],) for row in order_rows])
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO orders VALUES (?,?,?,?,?,?,?,?,?)",
+                order_rows)
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO order_items VALUES (?,?,?,?,?,?)",
+                item_rows)
+
+    def sync(self, start: str = '', additional: list = None,
+             refine: dict = None) -> int:
+        """
+            Request the orders changed since the watermark and store them.
+
+            Parameter:
+                start       [str]   -   Start date of the first sync
+                                        (ignored once a watermark exists)
+                additional  [list]  -   Additional arguments for the query
+                refine      [dict]  -   Apply filters to the request
+
+            Return:
+                            [int]   -   Amount of stored orders / -1
+        """
+        watermark = self.watermark
+        if watermark:
+            previous = datetime.datetime.fromisoformat(watermark)
+            start = (previous - datetime.timedelta(seconds=self.overlap))\
+                .isoformat(timespec='seconds')
+        elif not start:
+            print("ERROR: The first sync of the order mirror requires a "
+                  "start date.")
+            return -1
+        started = datetime.datetime.now().astimezone()
+        end = started.isoformat(timespec='seconds')
+        # An invalid request yields no pages, which must not advance the
+        # watermark
+        if utils.build_order_query(start=start, end=end, date_type='change',
+                                   additional=additional,
+                                   refine=refine) is None:
+            print("ERROR: Invalid order mirror sync, the watermark is kept.")
+            return -1
+
+        stored = 0
+        for page in self.api.plenty_api_iter_orders_by_date(
+                start=start, end=end, date_type='change',
+                additional=additional, refine=refine, pages=True):
+            if page is None:
+                print("ERROR: Order mirror sync incomplete, the watermark "
+                      "is kept.")
+                return -1
+            self.upsert(orders=page)
+            stored += len(page)
+
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO sync_state VALUES ('watermark', ?)",
+                (started.isoformat(timespec='seconds'),))
+        return stored
+
+    def get_orders(self, start: str = '', end: str = '',
+                   referrer_id: float = None, status_id: float = None,
+                   contact_id: int = None) -> list:
+        """
+            Query the local orders.
+
+            Parameter:
+                start       [str]   -   Created at or after this date
+                end         [str]   -   Created before this date
+                referrer_id [float] -   Origin of the orders
+                status_id   [float] -   Current status of the orders
+                contact_id  [int]   -   Customer of the orders
+
+            Return:
+                            [list]  -   Orders in JSON format
+        """
+        conditions = []
+        arguments: list = []
+        if start:
+            conditions.append("created_at >= ?")
+            arguments.append(to_utc(date=utils.parse_date(date=start)))
+        if end:
+            conditions.append("created_at < ?")
+            arguments.append(to_utc(date=utils.parse_date(date=end)))
+        for column, value in [('referrer_id', referrer_id),
+                              ('status_id', status_id),
+                              ('contact_id', contact_id)]:
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                arguments.append(value)
+
+        statement = "SELECT data FROM orders"
+        if conditions:
+            statement += " WHERE " + " AND ".join(conditions)
+        statement += " ORDER BY created_at, id"
+        return [simplejson.loads(row['data']) for row
+                in self.connection.execute(statement, arguments)]
+
+    def get_order(self, order_id: int) -> dict:
+        """
+            Parameter:
+                order_id    [int]
+
+            Return:
+                            [dict]  -   Order in JSON format / {}
+        """
+        row = self.connection.execute(
+            "SELECT data FROM orders WHERE id = ?", (order_id,)).fetchone()
+        return simplejson.loads(row['data']) if row else {}
+
+    def get_order_items(self, order_id: int = None,
+                        variation_id: int = None) -> list:
+        """
+            Query the local order items of an order or a variation.
+
+            Parameter:
+                order_id    [int]
+                variation_id [int]
+
+            Return:
+                            [list]  -   Order items in JSON format
+        """
+        if order_id is not None:
+            rows = self.connection.execute(
+                "SELECT data FROM order_items WHERE order_id = ? ORDER BY id",
+                (order_id,))
+        else:
+            rows = self.connection.execute(
+                "SELECT data FROM order_items WHERE item_variation_id = ? "
+                "ORDER BY id", (variation_id,))
+        return [simplejson.loads(row['data']) for row in rows]
@@ -0,0 +1,213 @@
+"""
+    Python-PlentyMarkets-API-interface.
+
+    Interface to the resources from PlentyMarkets(https://www.plentymarkets.eu)
+
+    Copyright (C) 2020  Sebastian Fricke, Panasiam
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import contextlib
+import contextvars
+import functools
+import inspect
+import threading
+import time
+
+# Phases of a getter call in the order of the report
+PROFILE_PHASES = ['auth', 'request', 'throttle', 'retry', 'decode',
+                  'post_process', 'conversion']
+
+# Profile of the running getter call, worker threads run within a copy of
+# the context of the caller (`contextvars.copy_context`)
+CURRENT_PROFILE: contextvars.ContextVar = contextvars.ContextVar(
+    'plenty_api_profile', default=None)
+
+# Profiles using the memory tracing, which is only stopped after the last
+# one, if it was started by a profile
+_TRACING = {'profiles': 0, 'started': False}
+_TRACING_LOCK = threading.Lock()
+
+
+class CallProfile():
+    """
+        Time spent in each phase of a single getter call and the peak memory
+        usage (tracemalloc) during the call.
+
+        The phases of parallel requests are summed over all worker threads,
+        so with concurrency the sum of the phases can exceed the duration
+        of the call. The peak memory is measured for the whole process, it
+        includes other calls profiled at the same time.
+    """
+    def __init__(self, name: str):
+        """
+            Parameter:
+                name        [str]   -   Name of the getter
+        """
+        self.name = name
+        self.phases = {phase: {'seconds': 0.0, 'count': 0}
+                       for phase in PROFILE_PHASES}
+        self.total = 0.0
+        self.peak_memory = 0
+        self.__started = 0.0
+        self.__lock = threading.Lock()
+
+    def add(self, phase: str, seconds: float) -> None:
+        """
+            Parameter:
+                phase       [str]   -   Name of the phase
+                seconds     [float] -   Duration
+        """
+        with self.__lock:
+            entry = self.phases.setdefault(phase,
+                                           {'seconds': 0.0, 'count': 0})
+            entry['seconds'] += seconds
+            entry['count'] += 1
+
+    def start(self) -> None:
+        """ Start the clock and the memory tracing. """
+        import tracemalloc
+        with _TRACING_LOCK:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _TRACING['started'] = True
+            elif hasattr(tracemalloc, 'reset_peak') and \
+                    not _TRACING['profiles']:
+                tracemalloc.reset_peak()
+            _TRACING['profiles'] += 1
+        self.__started = time.perf_counter()
+
+    def stop(self) -> None:
+        """ Stop the clock and read the peak memory usage. """
+        import tracemalloc
+        self.total = time.perf_counter() - self.__started
+        with _TRACING_LOCK:
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            _TRACING['profiles'] -= 1
+            if not _TRACING['profiles'] and _TRACING['started']:
+                tracemalloc.stop()
+                _TRACING['started'] = False
+
+    def report(self) -> dict:
+        """
+            Return:
+                [dict]  -   {'call': 'plenty_api_get_items', 'total': 1.2,
+                             'peak_memory': 1048576,
+                             'phases': {'request': {'seconds': 0.9,
+                                                    'count': 3}, ..}}
+        """
+        with self.__lock:
+            phases = {phase: dict(entry)
+                      for phase, entry in self.phases.items()}
+        return {'call': self.name, 'total': self.total,
+                'peak_memory': self.peak_memory, 'phases': phases}
+
+    def format(self) -> str:
+        """
+            Render the report as a table.
+
+            Return:
+                            [str]
+        """
+        report = self.report()
+        lines = [f"PROFILE: {report['call']} {report['total']:.3f}s, peak "
+                 f"memory {report['peak_memory'] / 1048576:.1f} MiB"]
+        for phase, entry in report['phases'].items():
+            share = 0.0
+            if report['total'] > 0:
+                share = entry['seconds'] / report['total'] * 100
+            lines.append(f"    {phase:<14}{entry['seconds']:>10.3f}s"
+                         f"{share:>7.1f}%{entry['count']:>8} calls")
+        return '\n'.join(lines)
+
+
+def record(phase: str, seconds: float) -> None:
+    """
+        Add a duration to the profile of the running call, if profiling is
+        enabled.
+
+        Parameter:
+            phase       [str]   -   Name of the phase
+            seconds     [float] -   Duration
+    """
+    profile = CURRENT_PROFILE.get()
+    if profile is not None:
+        profile.add(phase=phase, seconds=seconds)
+
+
+@contextlib.contextmanager
+def measure(phase: str):
+    """
+        Record the duration of the enclosed block as a phase of the running
+        call.
+
+        Parameter:
+            phase       [str]   -   Name of the phase
+    """
+    if CURRENT_PROFILE.get() is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase=phase, seconds=time.perf_counter() - started)
+
+
+def profiled(method):
+    """
+        Decorate a getter of a client, to profile its calls while the
+        `profile` attribute of the client is set.
+
+        The report of each call is printed and kept as `last_profile` of the
+        client. Calls of other getters within a profiled call are part of
+        the outer profile.
+    """
+    def begin(client):
+        if not client.profile or CURRENT_PROFILE.get() is not None:
+            return None, None
+        profile = CallProfile(name=method.__name__)
+        token = CURRENT_PROFILE.set(profile)
+        profile.start()
+        return profile, token
+
+    def end(client, profile: CallProfile, token) -> None:
+        profile.stop()
+        CURRENT_PROFILE.reset(token)
+        client.last_profile = profile
+        print(profile.format())
+
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(self, *args, **kwargs):
+            profile, token = begin(client=self)
+            if profile is None:
+                return await method(self, *args, **kwargs)
+            try:
+                return await method(self, *args, **kwargs)
+            finally:
+                end(client=self, profile=profile, token=token)
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        profile, token = begin(client=self)
+        if profile is None:
+            return method(self, *args, **kwargs)
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            end(client=self, profile=profile, token=token)
+    return wrapper
@@ -0,0 +1,154 @@
+"""
+    Python-PlentyMarkets-API-interface.
+
+    Interface to the resources from PlentyMarkets(https://www.plentymarkets.eu)
+
+    Copyright (C) 2020  Sebastian Fricke, Panasiam
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import threading
+import time
+
+import plenty_api.constants as constants
+
+
+class RateLimiter():
+    """
+        Pace the requests to the PlentyMarkets API with the call limit
+        headers, which are part of every response:
+            X-Plenty-{Window}-Limit         -   calls allowed per period
+            X-Plenty-{Window}-Calls-Left    -   remaining calls in the period
+            X-Plenty-{Window}-Decay         -   seconds until the period ends
+        where {Window} is for example 'Global-Short-Period',
+        'Global-Long-Period' or a route specific window.
+
+        Every window behaves like a token bucket, which is refilled when the
+        period ends. Each request takes a token from every known window, as
+        soon as a window runs out of tokens the request has to wait until
+        the end of its period. This throttles the client before the limit is
+        reached, instead of waiting blindly after a HTTP 429 response.
+
+        The object is thread-safe and can be shared by multiple clients,
+        that use the same account.
+    """
+    def __init__(self, reserve: int = 1, fallback_delay: float = 3.0,
+                 clock=time.monotonic):
+        """
+            Parameter:
+                reserve     [int]   -   Amount of calls per window, that are
+                                        kept as a buffer for other clients
+                fallback_delay [float] - Delay after a throttled request
+                                        without call limit headers
+                clock       [func]  -   Monotonic time source in seconds
+        """
+        self.reserve = max(0, reserve)
+        self.fallback_delay = fallback_delay
+        self.clock = clock
+        self.windows: dict = {}
+        self.lock = threading.Lock()
+
+    def update(self, headers) -> None:
+        """
+            Read the call limit headers of a response.
+
+            Parameter:
+                headers     [dict]  -   Response headers
+        """
+        windows = parse_limit_headers(headers=headers)
+        if not windows:
+            return
+        now = self.clock()
+        with self.lock:
+            for name, window in windows.items():
+                self.windows[name] = {
+                    'limit': window.get('limit'),
+                    'calls_left': window.get('calls_left'),
+                    'reset': now + window.get('decay', 0)
+                }
+
+    def acquire(self) -> float:
+        """
+            Take a call from each known window.
+
+            Return:
+                [float]     -   Seconds to wait before the request is sent
+        """
+        delay = 0.0
+        now = self.clock()
+        with self.lock:
+            for name in list(self.windows):
+                window = self.windows[name]
+                if now >= window['reset']:
+                    # The period ended, the next response tells the
+                    # state of the new period
+                    del self.windows[name]
+                    continue
+                if window['calls_left'] is None:
+                    continue
+                if window['calls_left'] > self.reserve:
+                    window['calls_left'] -= 1
+                    continue
+                delay = max(delay, window['reset'] - now)
+        return delay
+
+    def throttled(self, headers) -> float:
+        """
+            Determine the delay after a HTTP 429 response, which is the
+            decay of the exhausted windows.
+
+            Parameter:
+                headers     [dict]  -   Response headers
+
+            Return:
+                [float]     -   Seconds to wait before the request is repeated
+        """
+        windows = parse_limit_headers(headers=headers)
+        self.update(headers=headers)
+        decays = [window['decay'] for window in windows.values()
+                  if window.get('decay') and not window.get('calls_left')]
+        if not decays:
+            return self.fallback_delay
+        return float(max(decays))
+
+
+def parse_limit_headers(headers) -> dict:
+    """
+        Collect the call limit headers of a response by window.
+
+        Parameter:
+            headers     [dict]  -   Response headers
+
+        Return:
+                        [dict]  -   {window: {limit, calls_left, decay}}
+    """
+    windows: dict = {}
+    if not headers:
+        return windows
+    prefix = constants.RATE_LIMIT_HEADER_PREFIX
+    for key, value in headers.items():
+        key = key.lower()
+        if not key.startswith(prefix):
+            continue
+        for suffix, field in constants.RATE_LIMIT_HEADER_FIELDS.items():
+            if not key.endswith(suffix):
+                continue
+            name = key[len(prefix):-len(suffix)]
+            try:
+                windows.setdefault(name, {})[field] = int(value)
+            except ValueError:
+                pass
+            break
+    return windows
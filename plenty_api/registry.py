@@ -0,0 +1,263 @@
+"""
+    Python-PlentyMarkets-API-interface.
+
+    Interface to the resources from PlentyMarkets(https://www.plentymarkets.eu)
+
+    Copyright (C) 2020  Sebastian Fricke, Panasiam
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import datetime
+import threading
+
+import plenty_api.constants as constants
+import plenty_api.utils as utils
+
+# Reference data domains of the registry, the domains with an update filter
+# are refreshed incrementally
+REGISTRY_DOMAINS = ['vat', 'referrer', 'prices', 'manufacturer']
+INCREMENTAL_DOMAINS = ['prices', 'manufacturer']
+
+
+class ReferenceRegistry():
+    """
+        Keep the reference data of PlentyMarkets in memory with indexes for
+        constant time lookups:
+            country code <-> country ID (`constants.VALID_COUNTRY_MAP`)
+            VAT configurations by country ID
+            referrer ID -> referrer
+            sales price ID -> price configuration
+            manufacturer ID -> manufacturer
+
+        Every domain is loaded on its first lookup, a failed load is tried
+        again on the next lookup. `refresh` reloads the VAT configurations
+        and referrers and only fetches the price configurations and
+        manufacturers, which were updated since the previous request, with
+        the 'updatedAt' filter. Deleted records don't appear in these
+        deltas, so every [reconcile_interval] seconds the refresh reloads
+        these domains completely. Refreshes bypass the response cache.
+        The indexes are replaced as a whole after each refresh, so lookups
+        from other threads never see a partially updated index.
+    """
+    def __init__(self, fetch, refresh_interval: float = 3600,
+                 reconcile_interval: float = 86400):
+        """
+            Parameter:
+                fetch       [func]  -   Request all records of a domain:
+                                        fetch(domain, query, revalidate)
+                                        -> list/None
+                refresh_interval [float] - Seconds between the refreshes
+                                        of the background thread
+                reconcile_interval [float] - Seconds between the complete
+                                        reloads of the incremental domains
+        """
+        self.fetch = fetch
+        self.refresh_interval = refresh_interval
+        self.reconcile_interval = reconcile_interval
+        self.country_ids = dict(constants.VALID_COUNTRY_MAP)
+        self.country_codes = {country_id: code for code, country_id
+                              in self.country_ids.items()}
+        self.indexes: dict = {}
+        self.watermarks: dict = {}
+        # Start of the latest complete load of each domain
+        self.loaded_at: dict = {}
+        self.__lock = threading.Lock()
+        self.__timer = None
+
+    def __is_reconcile_due(self, domain: str,
+                           now: datetime.datetime) -> bool:
+        if domain not in self.loaded_at:
+            return True
+        elapsed = (now - self.loaded_at[domain]).total_seconds()
+        return elapsed >= self.reconcile_interval
+
+    def __load(self, domain: str, refresh: bool = False) -> bool:
+        query: dict = {}
+        started = datetime.datetime.now().astimezone()
+        incremental = refresh and domain in INCREMENTAL_DOMAINS and \
+            domain in self.watermarks and \
+            not self.__is_reconcile_due(domain=domain, now=started)
+        if incremental:
+            query['updatedAt'] = self.watermarks[domain].isoformat(
+                timespec='seconds')
+
+        records = self.fetch(domain=domain, query=query, revalidate=refresh)
+        if records is None:
+            print(f"ERROR: Reference data of {domain} could not be loaded.")
+            # Keep the previous index or nothing at all, so that the next
+            # refresh or lookup tries again
+            return False
+
+        if domain == 'vat':
+            index: dict = {}
+            for record in records:
+                index.setdefault(int(record['countryId']), []).append(record)
+        elif domain == 'referrer':
+            index = {str(record['id']): record for record in records}
+        else:
+            index = dict(self.indexes.get(domain, {})) if incremental else {}
+            index.update({int(record['id']): record for record in records})
+
+        self.indexes[domain] = index
+        self.watermarks[domain] = started
+        if not incremental:
+            self.loaded_at[domain] = started
+        return True
+
+    def __get_index(self, domain: str) -> dict:
+        index = self.indexes.get(domain)
+        if index is None:
+            with self.__lock:
+                if domain not in self.indexes:
+                    self.__load(domain=domain)
+            index = self.indexes.get(domain, {})
+        return index
+
+    def load(self) -> bool:
+        """
+            Load all reference data domains.
+
+            Return:
+                            [bool]  -   False if a domain failed
+        """
+        with self.__lock:
+            return all([self.__load(domain=domain)
+                        for domain in REGISTRY_DOMAINS])
+
+    def refresh(self) -> bool:
+        """
+            Update the loaded domains, only changed price configurations and
+            manufacturers are requested, unless their complete reload is due
+            (see [reconcile_interval]).
+
+            Return:
+                            [bool]  -   False if a domain failed
+        """
+        with self.__lock:
+            return all([self.__load(domain=domain, refresh=True)
+                        for domain in list(self.indexes)])
+
+    def start(self) -> None:
+        """ Refresh the loaded domains every [refresh_interval] seconds. """
+        self.stop()
+        self.__timer = threading.Timer(self.refresh_interval, self.__run)
+        self.__timer.daemon = True
+        self.__timer.start()
+
+    def __run(self) -> None:
+        try:
+            self.refresh()
+        finally:
+            if self.__timer is not None:
+                self.start()
+
+    def stop(self) -> None:
+        """ Stop the background refresh. """
+        if self.__timer is not None:
+            self.__timer.cancel()
+            self.__timer = None
+
+    def get_country_id(self, code: str) -> int:
+        """
+            Parameter:
+                code        [str]   -   ISO 3166-1 alpha-2 country code
+
+            Return:
+                            [int]   -   PlentyMarkets country ID / -1
+        """
+        return self.country_ids.get(code.upper(), -1)
+
+    def get_country_code(self, country_id: int) -> str:
+        """
+            Parameter:
+                country_id  [int]   -   PlentyMarkets country ID
+
+            Return:
+                            [str]   -   Country code / ''
+        """
+        return self.country_codes.get(int(country_id), '')
+
+    def get_vat_configurations(self, country_id: int) -> list:
+        """
+            Parameter:
+                country_id  [int]   -   PlentyMarkets country ID
+
+            Return:
+                            [list]  -   VAT configurations of the country
+        """
+        return self.__get_index(domain='vat').get(int(country_id), [])
+
+    def get_vat_mapping(self, subset: list = None) -> dict:
+        """
+            Create the mapping of `PlentyApi.plenty_api_get_vat_id_mappings`
+            from the loaded VAT configurations.
+
+            Parameter:
+                subset      [list]  -   Restrict the mapping to these
+                                        country IDs
+
+            Return:
+                            [dict]
+        """
+        records = [record for records in self.__get_index(domain='vat')
+                   .values() for record in records]
+        return utils.create_vat_mapping(data=records, subset=subset)
+
+    def get_referrer(self, referrer_id) -> dict:
+        """
+            Parameter:
+                referrer_id [str/float] -   Referrer ID (e.g. 4.01)
+
+            Return:
+                            [dict]      -   Referrer / {}
+        """
+        return self.__get_index(domain='referrer').get(str(referrer_id), {})
+
+    def get_referrer_name(self, referrer_id) -> str:
+        """
+            Parameter:
+                referrer_id [str/float] -   Referrer ID
+
+            Return:
+                            [str]       -   Name of the referrer / ''
+        """
+        return self.get_referrer(referrer_id=referrer_id).get('name', '')
+
+    def get_price_configuration(self, price_id: int,
+                                minimal: bool = False) -> dict:
+        """
+            Parameter:
+                price_id    [int]   -   Sales price ID
+                minimal     [bool]  -   Reduce the configuration to the
+                                        necessary IDs
+
+            Return:
+                            [dict]  -   Price configuration / {}
+        """
+        price = self.__get_index(domain='prices').get(int(price_id), {})
+        if minimal:
+            return utils.shrink_price_configuration(data=price)
+        return price
+
+    def get_manufacturer(self, manufacturer_id: int) -> dict:
+        """
+            Parameter:
+                manufacturer_id [int]   -   Manufacturer ID
+
+            Return:
+                            [dict]  -   Manufacturer / {}
+        """
+        return self.__get_index(domain='manufacturer').get(
+            int(manufacturer_id), {})
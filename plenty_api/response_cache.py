@@ -0,0 +1,203 @@
+"""
+    Python-PlentyMarkets-API-interface.
+
+    Interface to the resources from PlentyMarkets(https://www.plentymarkets.eu)
+
+    Copyright (C) 2020  Sebastian Fricke, Panasiam
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import gzip
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+import zlib
+import simplejson
+
+import plenty_api.constants as constants
+import plenty_api.utils as utils
+
+
+class ResponseCache():
+    """
+        Keep the responses of GET requests on disk, to avoid downloading the
+        same pages multiple times a day.
+
+        Every response is stored compressed in its own file, identified by
+        the route, the path and the normalized query of the request. A
+        response is valid for the time to live of its domain
+        (`constants.RESPONSE_CACHE_TTL`), domains without a time to live
+        (e.g. orders) are never cached.
+        After the time to live, the response is still served for
+        [stale_ttl] seconds, while it is renewed in the background
+        (stale-while-revalidate).
+        In [offline] mode, any cached response is served when the call
+        limit is exhausted or the API is not reachable.
+    """
+    def __init__(self, path: str = '', ttl: dict = None,
+                 stale_ttl: int = 3600, offline: bool = False):
+        """
+            Parameter:
+                path        [str]   -   Directory of the cache files
+                                        (default: ~/.cache/plenty_api/
+                                        responses)
+                ttl         [dict]  -   Time to live in seconds per domain,
+                                        replaces the default of a domain
+                                        Example: {'vat': 604800, 'item': 600}
+                stale_ttl   [int]   -   Seconds after the time to live, in
+                                        which a response is served while it
+                                        is renewed
+                offline     [bool]  -   Serve outdated responses, when the
+                                        API can't be used
+        """
+        if not path:
+            cache_home = os.environ.get('XDG_CACHE_HOME',
+                                        os.path.expanduser('~/.cache'))
+            path = os.path.join(cache_home, 'plenty_api', 'responses')
+        self.path = path
+        self.ttl = dict(constants.RESPONSE_CACHE_TTL)
+        self.ttl.update(ttl or {})
+        self.stale_ttl = stale_ttl
+        self.offline = offline
+        self.__lock = threading.Lock()
+        self.__revalidating: set = set()
+
+    def get_ttl(self, domain: str) -> int:
+        """
+            Determine the time to live of the responses of a domain.
+
+            Parameter:
+                domain      [str]   -   Domain of the request {vat/items/..}
+
+            Return:
+                            [int]   -   Seconds, 0 if it isn't cached
+        """
+        for valid_domain in constants.VALID_DOMAINS:
+            if re.match(valid_domain, domain.lower()):
+                return self.ttl.get(valid_domain, 0)
+        return 0
+
+    @staticmethod
+    def build_key(route: str, path: str = '', query: dict = None,
+                  url: str = '') -> str:
+        """
+            Create the identifier of a request, independent of the order of
+            the query arguments. The [url] of the system is part of the
+            identifier, so systems sharing a cache directory never receive
+            the responses of each other.
+
+            Parameter:
+                route       [str]   -   Route of the endpoint
+                path        [str]   -   Additional path of the endpoint
+                query       [dict]  -   Query of the request
+                url         [str]   -   Base URL of the PlentyMarkets system
+
+            Return:
+                            [str]
+        """
+        params = sorted(utils.flatten_query(query=query))
+        identifier = simplejson.dumps([url.rstrip('/'), route, path, params])
+        return hashlib.sha256(identifier.encode('utf-8')).hexdigest()
+
+    def __file(self, key: str) -> str:
+        return os.path.join(self.path, key + '.json.gz')
+
+    def get(self, domain: str, key: str) -> dict:
+        """
+            Read a cached response.
+
+            Parameter:
+                domain      [str]   -   Domain of the request
+                key         [str]   -   Identifier (use `build_key`)
+
+            Return:
+                [dict]      -   {'response': .., 'state': fresh/stale/expired}
+                                / {} for uncached responses
+        """
+        ttl = self.get_ttl(domain=domain)
+        if ttl <= 0:
+            return {}
+        try:
+            with gzip.open(self.__file(key=key), 'rb') as cache_file:
+                entry = simplejson.loads(cache_file.read())
+        except (OSError, EOFError, zlib.error,
+                simplejson.errors.JSONDecodeError):
+            return {}
+
+        age = time.time() - entry['stored_at']
+        if age < ttl:
+            state = 'fresh'
+        elif age < ttl + self.stale_ttl:
+            state = 'stale'
+        else:
+            state = 'expired'
+        return {'response': entry['response'], 'state': state}
+
+    def set(self, domain: str, key: str, response) -> None:
+        """
+            Store a response, if the domain is cached.
+
+            Parameter:
+                domain      [str]   -   Domain of the request
+                key         [str]   -   Identifier (use `build_key`)
+                response    [dict]  -   Decoded response
+        """
+        if self.get_ttl(domain=domain) <= 0:
+            return
+        os.makedirs(self.path, mode=0o700, exist_ok=True)
+        content = simplejson.dumps({'stored_at': time.time(),
+                                    'response': response})
+        descriptor, temp_path = tempfile.mkstemp(dir=self.path)
+        with os.fdopen(descriptor, 'wb') as temp_file:
+            with gzip.GzipFile(fileobj=temp_file, mode='wb') as cache_file:
+                cache_file.write(content.encode('utf-8'))
+        os.chmod(temp_path, 0o600)
+        os.replace(temp_path, self.__file(key=key))
+
+    def start_revalidation(self, key: str) -> bool:
+        """
+            Register the renewal of a stale response, only one renewal per
+            response runs at a time.
+
+            Parameter:
+                key         [str]   -   Identifier of the response
+
+            Return:
+                            [bool]  -   False if it is already renewed
+        """
+        with self.__lock:
+            if key in self.__revalidating:
+                return False
+            self.__revalidating.add(key)
+            return True
+
+    def finish_revalidation(self, key: str) -> None:
+        """
+            Parameter:
+                key         [str]   -   Identifier of the response
+        """
+        with self.__lock:
+            self.__revalidating.discard(key)
+
+    def clear(self) -> None:
+        """ Remove all cached responses. """
+        if not os.path.isdir(self.path):
+            return
+        for name in os.listdir(self.path):
+            if name.endswith('.json.gz'):
+                os.remove(os.path.join(self.path, name))
@@ -0,0 +1,155 @@
+"""
+    Python-PlentyMarkets-API-interface.
+
+    Interface to the resources from PlentyMarkets(https://www.plentymarkets.eu)
+
+    Copyright (C) 2020  Sebastian Fricke, Panasiam
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import email.utils
+import random
+import time
+
+import plenty_api.constants as constants
+
+
+class RetryPolicy():
+    """
+        Decide if and when a failed request is repeated.
+
+        Transient failures (connection errors, timeouts and the HTTP status
+        codes in [statuses]) are repeated with an exponential backoff:
+            backoff_factor * 2 ** (attempt - 1), capped at max_backoff
+        With jitter, the delay is drawn uniformly from [0, backoff] to avoid
+        that parallel requests retry in lockstep. A Retry-After header of the
+        response takes precedence over the backoff.
+
+        Requests with a method outside of [methods] are only repeated on
+        HTTP 429, as the server didn't process them.
+    """
+    def __init__(self, max_attempts: int = 5, backoff_factor: float = 0.5,
+                 max_backoff: float = 60.0, jitter: bool = True,
+                 statuses: list = None, methods: list = None,
+                 status_rules: dict = None, respect_retry_after: bool = True):
+        """
+            Parameter:
+                max_attempts [int]  -   Maximum amount of attempts per request
+                                        (including the first one)
+                backoff_factor [float] - Delay before the first retry
+                max_backoff [float] -   Upper limit of a single delay
+                jitter      [bool]  -   Randomize the delay
+                statuses    [list]  -   Retryable HTTP status codes
+                methods     [list]  -   HTTP methods, which are repeated
+                                        after a transient error
+                status_rules [dict] -   Maximum amount of attempts for
+                                        specific status codes, 1 disables the
+                                        retry for that status
+                                        Example: {500: 2, 429: 10}
+                respect_retry_after [bool] - Wait for the time given by the
+                                        Retry-After header
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        if statuses is None:
+            statuses = constants.RETRY_STATUSES
+        self.statuses = set(statuses)
+        if methods is None:
+            methods = constants.RETRY_METHODS
+        self.methods = {method.lower() for method in methods}
+        self.status_rules = status_rules or {}
+        self.respect_retry_after = respect_retry_after
+
+    def is_retryable(self, method: str, status: int = None) -> bool:
+        """
+            Check if a failure is transient.
+
+            Parameter:
+                method      [str]   -   HTTP method of the request
+                status      [int]   -   HTTP status code, None for connection
+                                        errors and timeouts
+
+            Return:
+                [bool]
+        """
+        if status == 429:
+            return True
+        if method.lower() not in self.methods:
+            return False
+        return status is None or status in self.statuses
+
+    def allows(self, attempt: int, status: int = None) -> bool:
+        """
+            Check if another attempt is allowed.
+
+            Parameter:
+                attempt     [int]   -   Amount of attempts made so far
+                status      [int]   -   HTTP status code of the last attempt
+
+            Return:
+                [bool]
+        """
+        return attempt < self.status_rules.get(status, self.max_attempts)
+
+    def delay(self, attempt: int, headers=None) -> float:
+        """
+            Calculate the delay before the next attempt.
+
+            Parameter:
+                attempt     [int]   -   Amount of attempts made so far
+                headers     [dict]  -   Headers of the failed response
+
+            Return:
+                [float]     -   Seconds to wait
+        """
+        if self.respect_retry_after:
+            retry_after = parse_retry_after(headers=headers)
+            if retry_after is not None:
+                return min(retry_after, self.max_backoff)
+
+        backoff = min(self.max_backoff,
+                      self.backoff_factor * 2 ** (max(1, attempt) - 1))
+        if self.jitter:
+            return random.uniform(0, backoff)
+        return backoff
+
+
+def parse_retry_after(headers) -> float:
+    """
+        Read the Retry-After header, given either in seconds or as a
+        HTTP date.
+
+        Parameter:
+            headers     [dict]  -   Response headers
+
+        Return:
+                        [float]/None
+    """
+    if not headers:
+        return None
+    value = headers.get('Retry-After') or headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, date.timestamp() - time.time())
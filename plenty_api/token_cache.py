@@ -0,0 +1,207 @@
+"""
+    Python-PlentyMarkets-API-interface.
+
+    Interface to the resources from PlentyMarkets(https://www.plentymarkets.eu)
+
+    Copyright (C) 2020  Sebastian Fricke, Panasiam
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import contextlib
+import os
+import tempfile
+import time
+import simplejson
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+
+class TokenCache():
+    """
+        Share the bearer token of the PlentyMarkets API between processes.
+
+        The tokens are stored together with their expiry date in a JSON
+        file, which is only readable by the current user. Every access is
+        protected by a lock file, so that multiple processes can use the
+        same cache at the same time. A second lock file serializes the
+        logins (`login_lock`), so that processes without a valid token
+        don't all log in at the same time.
+        A token is only handed out until [margin] seconds before it expires,
+        which leaves enough time to renew it.
+    """
+    def __init__(self, path: str = '', margin: int = 300):
+        """
+            Parameter:
+                path        [str]   -   Location of the cache file
+                                        (default: ~/.cache/plenty_api/
+                                        tokens.json)
+                margin      [int]   -   Seconds before the expiry of a token,
+                                        at which it is considered outdated
+        """
+        if not path:
+            cache_home = os.environ.get('XDG_CACHE_HOME',
+                                        os.path.expanduser('~/.cache'))
+            path = os.path.join(cache_home, 'plenty_api', 'tokens.json')
+        self.path = path
+        self.margin = margin
+
+    @contextlib.contextmanager
+    def __lock(self):
+        lock_file = _acquire_lock(path=self.path + '.lock')
+        try:
+            yield
+        finally:
+            _release_lock(lock_file=lock_file)
+
+    @contextlib.contextmanager
+    def login_lock(self):
+        """
+            Hold the login lock of the cache, only one process at a time
+            logs in. Check the cache again after acquiring the lock, the
+            previous holder might have stored a new token.
+        """
+        lock_file = self.acquire_login_lock()
+        try:
+            yield
+        finally:
+            self.release_login_lock(lock_file=lock_file)
+
+    def acquire_login_lock(self):
+        """
+            Block until the login lock is acquired (see `login_lock`).
+
+            Return:
+                [file]      -   Lock file, pass it to `release_login_lock`
+        """
+        return _acquire_lock(path=self.path + '.login.lock')
+
+    @staticmethod
+    def release_login_lock(lock_file) -> None:
+        """
+            Parameter:
+                lock_file   [file]  -   Result of `acquire_login_lock`
+        """
+        _release_lock(lock_file=lock_file)
+
+    def __read(self) -> dict:
+        try:
+            with open(self.path, 'r') as cache_file:
+                return simplejson.load(cache_file)
+        except (FileNotFoundError, simplejson.errors.JSONDecodeError):
+            return {}
+
+    def __write(self, tokens: dict) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        descriptor, temp_path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(descriptor, 'w') as temp_file:
+            simplejson.dump(tokens, temp_file)
+        os.chmod(temp_path, 0o600)
+        os.replace(temp_path, self.path)
+
+    def get(self, key: str) -> dict:
+        """
+            Get a valid token.
+
+            Parameter:
+                key         [str]   -   Identifier of the account
+                                        (use `build_key`)
+
+            Return:
+                [dict]      -   {'token': .., 'expires_at': ..} / {}
+        """
+        with self.__lock():
+            entry = self.__read().get(key, {})
+        if not entry or entry['expires_at'] - self.margin <= time.time():
+            return {}
+        return entry
+
+    def set(self, key: str, token: str, expires_in: int) -> dict:
+        """
+            Store a token and remove all expired tokens from the cache.
+
+            Parameter:
+                key         [str]   -   Identifier of the account
+                token       [str]   -   Bearer token
+                expires_in  [int]   -   Lifetime of the token in seconds
+
+            Return:
+                [dict]      -   {'token': .., 'expires_at': ..}
+        """
+        entry = {'token': token, 'expires_at': time.time() + expires_in}
+        with self.__lock():
+            tokens = {name: value for name, value in self.__read().items()
+                      if value['expires_at'] > time.time()}
+            tokens[key] = entry
+            self.__write(tokens=tokens)
+        return entry
+
+    def delete(self, key: str, token: str = '') -> None:
+        """
+            Remove a token from the cache, if [token] is given only if the
+            cached token matches (another process might have renewed it).
+
+            Parameter:
+                key         [str]   -   Identifier of the account
+                token       [str]   -   Rejected bearer token
+        """
+        with self.__lock():
+            tokens = self.__read()
+            if key not in tokens:
+                return
+            if token and tokens[key]['token'] != token:
+                return
+            del tokens[key]
+            self.__write(tokens=tokens)
+
+
+def _acquire_lock(path: str):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    lock_file = open(path, 'a+')
+    if fcntl:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+    else:
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+    return lock_file
+
+
+def _release_lock(lock_file) -> None:
+    try:
+        if fcntl:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+    finally:
+        lock_file.close()
+
+
+def build_key(base_url: str, username: str = '') -> str:
+    """
+        Create the cache key of an account.
+
+        Parameter:
+            base_url    [str]   -   Base URL to the PlentyMarkets API
+            username    [str]   -   REST-API username
+
+        Return:
+                        [str]
+    """
+    return f"{base_url.rstrip('/')}|{username}"
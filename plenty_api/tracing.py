@@ -0,0 +1,140 @@
+"""
+    Python-PlentyMarkets-API-interface.
+
+    Interface to the resources from PlentyMarkets(https://www.plentymarkets.eu)
+
+    Copyright (C) 2020  Sebastian Fricke, Panasiam
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+    Optional tracing of the API calls with OpenTelemetry, the package is
+    only imported when a tracer is requested with `get_tracer`.
+"""
+
+import contextlib
+import functools
+import inspect
+
+
+class NullSpan():
+    """ Span used while tracing is disabled, it discards everything. """
+    def set_attribute(self, key: str, value) -> None:
+        pass
+
+    def set_attributes(self, attributes: dict) -> None:
+        pass
+
+    def add_event(self, name: str, attributes: dict = None) -> None:
+        pass
+
+    def is_recording(self) -> bool:
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+def get_tracer(name: str = 'plenty_api'):
+    """
+        Get a tracer of the globally configured OpenTelemetry tracer
+        provider.
+
+        Parameter:
+            name        [str]   -   Name of the instrumentation
+
+        Return:
+                        [Tracer]/None   -   None if OpenTelemetry isn't
+                                            installed
+    """
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        print("WARNING: Tracing requires the 'opentelemetry-api' package, "
+              "install it with `pip install opentelemetry-api`")
+        return None
+    return trace.get_tracer(name)
+
+
+@contextlib.contextmanager
+def start_span(tracer, name: str, attributes: dict = None):
+    """
+        Open a span as child of the current span.
+
+        Parameter:
+            tracer      [Tracer]    -   OpenTelemetry tracer or None
+            name        [str]       -   Name of the span
+            attributes  [dict]      -   Initial attributes
+
+        Return:
+                        [Span]      -   NULL_SPAN without a tracer
+    """
+    if tracer is None:
+        yield NULL_SPAN
+        return
+    with tracer.start_as_current_span(name, attributes=attributes) as span:
+        yield span
+
+
+def set_error(span, description: str) -> None:
+    """
+        Mark a span as failed.
+
+        Parameter:
+            span        [Span]
+            description [str]   -   Reason of the failure
+    """
+    if not span.is_recording():
+        return
+    try:
+        from opentelemetry.trace import Status, StatusCode
+    except ImportError:
+        span.set_attribute('error.type', description)
+        return
+    span.set_status(Status(StatusCode.ERROR, description))
+
+
+def traced(method):
+    """
+        Decorate a public method of a client, to open a span for each call
+        while the client has a `tracer`. The spans of the requests within
+        the call become its children.
+    """
+    def attributes(client) -> dict:
+        return {'plenty.data_format': client.data_format}
+
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(self, *args, **kwargs):
+            if self.tracer is None:
+                return await method(self, *args, **kwargs)
+            with start_span(tracer=self.tracer, name=method.__name__,
+                            attributes=attributes(client=self)) as span:
+                result = await method(self, *args, **kwargs)
+                if result is None or result is False:
+                    set_error(span=span, description='request failed')
+                return result
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.tracer is None:
+            return method(self, *args, **kwargs)
+        with start_span(tracer=self.tracer, name=method.__name__,
+                        attributes=attributes(client=self)) as span:
+            result = method(self, *args, **kwargs)
+            if result is None or result is False:
+                set_error(span=span, description='request failed')
+            return result
+    return wrapper
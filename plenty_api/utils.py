@@ -19,15 +19,21 @@
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
+import contextvars
 import getpass
 import datetime
 import time
+import queue
 import re
-import dateutil.parser
-import pandas
+import threading
+import requests
+import requests.adapters
 
 import plenty_api.constants as constants
 
+# pandas, gnupg and dateutil are imported within the functions, which need
+# them, to keep the import of the package fast for short-lived processes
+
 
 def create_vat_mapping(data: list, subset: list = None) -> dict:
     """
@@ -282,6 +288,358 @@ def build_query_date(date_range: dict, date_type: str) -> dict:
     return query
 
 
+def build_order_query(start: str, end: str, date_type: str,
+                      additional: list = None, refine: dict = None) -> dict:
+    """
+        Validate the arguments of an order request and build the query.
+
+        Parameter:
+            start       [str]   -   Start date
+            end         [str]   -   End date
+            date_type   [str]   -   {Creation, Change, Payment, Delivery}
+            additional  [list]  -   Additional arguments for the query
+            refine      [dict]  -   Filters for the request
+
+        Return:
+                        [dict]/None
+    """
+    date_range = build_date_range(start=start, end=end)
+    if not date_range:
+        print(f"ERROR: Invalid range {start} -> {end}")
+        return None
+
+    if not check_date_range(date_range=date_range):
+        print(f"ERROR: {date_range['start']} -> {date_range['end']}")
+        return None
+
+    query = build_query_date(date_range=date_range, date_type=date_type)
+    if not query:
+        return None
+
+    return sanity_check_parameter(domain='order', query=query, refine=refine,
+                                  additional=additional)
+
+
+def split_date_range(date_range: dict, parts: int) -> list:
+    """
+        Split a date range into [parts] consecutive windows of equal length,
+        the end of a window is the start of the next window.
+
+        Parameter:
+            date_range  [dict]  -   Start & End date in W3C date format
+                                    (use `build_date_range`)
+            parts       [int]   -   Amount of windows
+
+        Return:
+                        [list]  -   date ranges in W3C date format
+    """
+    if parts <= 1:
+        return [date_range]
+
+    import dateutil.parser
+
+    start = dateutil.parser.parse(date_range['start'])
+    end = dateutil.parser.parse(date_range['end'])
+    step = (end - start) / parts
+    borders = [start + step * index for index in range(parts)] + [end]
+    borders = [border.replace(microsecond=0).isoformat(timespec='seconds')
+               for border in borders]
+    return [{'start': borders[index], 'end': borders[index + 1]}
+            for index in range(parts)
+            if borders[index] != borders[index + 1]]
+
+
+def shard_order_query(query: dict, date_type: str, date_shards: int = 1,
+                      refine_shards: dict = None) -> list:
+    """
+        Partition an order query into multiple queries, that can be fetched
+        independently. The date range of the query is split into
+        [date_shards] windows and each window is split by the values of a
+        refine key.
+
+        Parameter:
+            query       [dict]  -   Order query (use `build_order_query`)
+            date_type   [str]   -   {Creation, Payment, Change, Delivery}
+            date_shards [int]   -   Amount of date windows
+            refine_shards [dict]-   Refine key with a list of values, one
+                                    shard is created per value
+                                    Example: {'referrerId': ['1', '4.01']}
+
+        Return:
+                        [list]  -   Queries of the shards
+    """
+    date_key = constants.ORDER_DATE_ARGUMENTS[date_type.lower()]
+    date_range = {'start': query[f"{date_key}AtFrom"],
+                  'end': query[f"{date_key}AtTo"]}
+    windows = split_date_range(date_range=date_range, parts=date_shards)
+
+    refine_key = ''
+    refine_values: list = [None]
+    if refine_shards:
+        if len(refine_shards) > 1:
+            print("WARNING: Only a single refine key can be used for "
+                  f"sharding, using: {list(refine_shards)[0]}")
+        refine_key, refine_values = list(refine_shards.items())[0]
+        if refine_key not in constants.VALID_REFINE_KEYS['order']:
+            print(f"Invalid refine shard key removed: {refine_key}")
+            refine_key = ''
+            refine_values = [None]
+
+    queries = []
+    for window in windows:
+        for value in refine_values:
+            shard = dict(query)
+            shard.update({f"{date_key}AtFrom": window['start'],
+                          f"{date_key}AtTo": window['end']})
+            if refine_key:
+                shard.update({refine_key: value})
+            queries.append(shard)
+    return queries
+
+
+def split_concurrency(concurrency: int, shards: int) -> tuple:
+    """
+        Divide the allowed amount of parallel requests among the shards of a
+        request, so that the shards don't multiply the requests in flight.
+
+        Parameter:
+            concurrency [int]   -   Maximum amount of requests in flight
+            shards      [int]   -   Amount of shards
+
+        Return:
+                        [tuple] -   (shards fetched in parallel,
+                                     concurrency of each shard)
+    """
+    workers = max(1, min(shards, concurrency))
+    return workers, max(1, concurrency // workers)
+
+
+def merge_unique_records(record_lists: list, key: str = 'id') -> list:
+    """
+        Merge multiple lists of records and remove duplicates, the first
+        occurrence of each record is kept.
+
+        Parameter:
+            record_lists [list] -   Lists of JSON records
+            key         [str]   -   Field that identifies a record
+
+        Return:
+                        [list]
+    """
+    seen: set = set()
+    merged = []
+    for records in record_lists:
+        for record in records:
+            if record[key] in seen:
+                continue
+            seen.add(record[key])
+            merged.append(record)
+    return merged
+
+
+def build_attribute_query(additional: list = None, last_update: str = '',
+                          variation_map: bool = False) -> dict:
+    """
+        Validate the arguments of an attribute request and build the query.
+        A variation mapping requires the attribute values, which are added
+        to the query if missing.
+
+        Parameter:
+            additional  [list]  -   Additional elements for the response
+            last_update [str]   -   Date of the last update
+            variation_map [bool]-   Link variations to the attribute values
+
+        Return:
+                        [dict]
+    """
+    query = sanity_check_parameter(domain='attribute', query={},
+                                   additional=additional)
+
+    if last_update:
+        query.update({'updatedAt': last_update})
+
+    # variation_map was given but the required '&with=values' query is
+    # missing, we assume the desired request was to be made with values
+    if variation_map:
+        if not additional:
+            query.update({'with': 'values'})
+        if additional:
+            if 'values' not in additional:
+                query.update({'with': 'values'})
+
+    return query
+
+
+def build_price_query(last_update: str = '') -> dict:
+    """
+        Build the query of a sales price configuration request.
+
+        Parameter:
+            last_update [str]   -   Date of the last update
+
+        Return:
+                        [dict]
+    """
+    query = {}
+    if last_update:
+        # The documentation refers to Unix timestamps being a valid
+        # format, but that is not the case within my tests.
+        query.update({'updatedAt': last_update})
+    return query
+
+
+def build_manufacturer_query(refine: dict = None, additional: list = None,
+                             last_update: str = '') -> dict:
+    """
+        Validate the arguments of a manufacturer request and build the query.
+
+        Parameter:
+            refine      [dict]  -   Filters for the request
+            additional  [list]  -   Additional elements for the response
+            last_update [str]   -   Date of the last update
+
+        Return:
+                        [dict]
+    """
+    query = sanity_check_parameter(domain='manufacturer', query={},
+                                   refine=refine, additional=additional)
+
+    if last_update:
+        query.update({'updatedAt': last_update})
+
+    return query
+
+
+def build_referrer_query(column: str = '') -> dict:
+    """
+        Build the query of a referrer request, the API only accepts a single
+        column.
+
+        Parameter:
+            column      [str]   -   Name of the field to be exported
+
+        Return:
+                        [dict]
+    """
+    # TODO actually only backendName, id and name are actually useful
+    # because all other attributes are useless without identification
+    valid_columns = ['backendName', 'id', 'isEditable', 'isFilterable',
+                     'name', 'orderOwnderId', 'origin']
+    if column in valid_columns:
+        return {'columns': column}
+    print(f"Invalid column argument removed: {column}")
+    return {}
+
+
+def build_item_query(refine: dict = None, additional: list = None,
+                     last_update: str = '', lang: str = '') -> dict:
+    """
+        Validate the arguments of an item request and build the query.
+
+        Parameter:
+            refine      [dict]  -   Filters for the request
+            additional  [list]  -   Additional elements for the response
+            last_update [str]   -   Date of the last update
+            lang        [str]   -   Name of the language for product texts
+
+        Return:
+                        [dict]
+    """
+    query = sanity_check_parameter(domain='item', query={}, refine=refine,
+                                   additional=additional, lang=lang)
+
+    if last_update:
+        query.update({'updatedBetween': date_to_timestamp(date=last_update)})
+
+    return query
+
+
+def build_variation_query(refine: dict = None, additional: list = None,
+                          last_update: str = '', lang: str = '') -> dict:
+    """
+        Validate the arguments of a variation request and build the query.
+
+        Parameter:
+            refine      [dict]  -   Filters for the request
+            additional  [list]  -   Additional elements for the response
+            last_update [str]   -   Date of the last update
+            lang        [str]   -   Name of the language for product texts
+
+        Return:
+                        [dict]
+    """
+    query = sanity_check_parameter(domain='variation', query={},
+                                   refine=refine, additional=additional,
+                                   lang=lang)
+
+    if last_update:
+        query.update({'updatedBetween': date_to_timestamp(date=last_update)})
+
+    return query
+
+
+def build_image_availability(item_id: str, image_id: str,
+                             target: dict) -> tuple:
+    """
+        Validate the target of an image availability and build the path and
+        data body of the POST request.
+
+        Parameter:
+            item_id     [str]   -   Item ID from PlentyMarkets
+            image_id    [str]   -   Image ID from PlentyMarkets
+            target      [dict]  -   {marketplace/mandant/listing: ID}
+
+        Return:
+                        [tuple] -   (path, data) / (None, None)
+    """
+    target_name = ''
+    target_id = ''
+    for element in target:
+        if element in ['marketplace', 'mandant', 'listing']:
+            if target[element]:
+                target_name = element
+                target_id = target[element]
+        else:
+            print(f"WARNING: {element} is not a valid target "
+                  "for the image availability POST request.")
+
+    if not target_name or not target_id:
+        print("ERROR: target for availability configuration required.")
+        return (None, None)
+
+    data = {
+        "imageId": image_id,
+        "type": target_name,
+        "value": str(target_id)
+    }
+    path = str(f"/{item_id}/images/{image_id}/availabilities")
+    return (path, data)
+
+
+def flatten_query(query: dict) -> list:
+    """
+        Convert a query dictionary into a list of key value pairs, with a
+        separate pair for each element of a list value and every value
+        converted to a string. This matches the encoding of the requests
+        module for HTTP clients that don't accept lists or booleans.
+
+        Parameter:
+            query       [dict]  -   Query of a request
+
+        Return:
+                        [list]
+    """
+    params = []
+    if not query:
+        return params
+    for key, value in query.items():
+        if isinstance(value, (list, tuple)):
+            params += [(key, str(element)) for element in value]
+            continue
+        params.append((key, str(value)))
+    return params
+
+
 def build_endpoint(url: str, route: str, path: str = '') -> str:
     """
         Perform basic checks to ensure that a valid endpoint is used for the
@@ -308,22 +666,272 @@ def build_endpoint(url: str, route: str, path: str = '') -> str:
     return url + route + path
 
 
+def build_session(pool_connections: int = 10, pool_maxsize: int = 10,
+                  keep_alive: bool = True) -> requests.Session:
+    """
+        Create a HTTP session with a connection pool, that is shared by all
+        requests of a `PlentyApi` object. Reusing the connections avoids a
+        new TCP and TLS handshake for every single page of a request.
+        The pool is used for HTTPS and plain HTTP endpoints (e.g. a proxy
+        or a local test server).
+
+        Parameter:
+            pool_connections [int] - Number of connection pools (one per host)
+            pool_maxsize [int]  -   Maximum amount of connections per host
+            keep_alive  [bool]  -   Keep the connection open after a request
+
+        Return:
+                        [Session]
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_connections,
+                                            pool_maxsize=pool_maxsize)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if not keep_alive:
+        session.headers.update({'Connection': 'close'})
+    return session
+
+
+class PageFetchError(Exception):
+    """
+        A page of a paginated request failed, the records of an iterator
+        are incomplete.
+    """
+    def __init__(self, domain: str, page: int):
+        """
+            Parameter:
+                domain      [str]   -   Domain of the request
+                page        [int]   -   Number of the failed page
+        """
+        super().__init__(f"Request of page {page} of {domain} failed, the "
+                         "records are incomplete")
+        self.domain = domain
+        self.page = page
+
+
+class _PrefetchError():
+    """ Transport an exception of the producer thread to the consumer """
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+def prefetch(iterable, depth: int):
+    """
+        Consume an iterable on a background thread and yield its elements
+        through a bounded queue. Up to [depth] elements are fetched ahead
+        of the consumer, the producer blocks as soon as the queue is full.
+        Exceptions of the producer are raised within the consumer.
+
+        Parameter:
+            iterable    [iterable]  -   e.g. a generator over the pages of
+                                        a request
+            depth       [int]       -   Maximum amount of elements fetched
+                                        in advance
+
+        Return:
+                        [generator]
+    """
+    elements: queue.Queue = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
+    end = object()
+
+    def put(element) -> bool:
+        while not stop.is_set():
+            try:
+                elements.put(element, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for element in iterable:
+                if not put(element):
+                    return
+        except Exception as err:
+            put(_PrefetchError(error=err))
+        finally:
+            if hasattr(iterable, 'close'):
+                iterable.close()
+            put(end)
+
+    # Run the producer within the context of the consumer (e.g. profiling)
+    producer = threading.Thread(target=contextvars.copy_context().run,
+                                args=(produce,), daemon=True)
+    producer.start()
+    try:
+        while True:
+            element = elements.get()
+            if element is end:
+                return
+            if isinstance(element, _PrefetchError):
+                raise element.error
+            yield element
+    finally:
+        stop.set()
+
+
+def build_projection(fields: list) -> dict:
+    """
+        Convert a list of dotted field paths into a nested projection.
+
+        Parameter:
+            fields      [list]  -   Field paths, e.g.
+                                    ['id', 'orderItems.amounts.priceGross']
+
+        Return:
+                        [dict]  -   {'id': {}, 'orderItems': {'amounts':
+                                     {'priceGross': {}}}}
+    """
+    projection: dict = {}
+    for field in fields or []:
+        node = projection
+        for key in field.split('.'):
+            node = node.setdefault(key, {})
+    return projection
+
+
+def project_schema(schema: dict, fields: list) -> dict:
+    """
+        Reduce a column schema to the columns within the projected fields,
+        so that the typed columns don't add fields that weren't requested.
+
+        Parameter:
+            schema      [dict]  -   Column name -> type
+            fields      [list]  -   Field paths of the projection, the
+                                    whole schema is kept without fields
+
+        Return:
+                        [dict]
+    """
+    if not fields:
+        return dict(schema)
+    return {name: column_type for name, column_type in schema.items()
+            if any(name == field or name.startswith(field + '.')
+                   for field in fields)}
+
+
+def project_record(record, projection: dict):
+    """
+        Reduce a record to the fields of a projection, lists of sub-entries
+        are reduced entry by entry. Fields missing in the record are left
+        out.
+
+        Parameter:
+            record      [dict/list]
+            projection  [dict]  -   Nested projection (`build_projection`)
+
+        Return:
+                        [dict/list]
+    """
+    if not projection:
+        return record
+    if isinstance(record, list):
+        return [project_record(record=entry, projection=projection)
+                for entry in record]
+    if not isinstance(record, dict):
+        return record
+    return {key: project_record(record=record[key], projection=sub)
+            for key, sub in projection.items() if key in record}
+
+
+def build_chunk_converter(data_format: str, domain: str = '',
+                          columns: list = None, fields: list = None):
+    """
+        Create the conversion of record chunks into the output format,
+        DataFrame chunks share the same columns and data types.
+
+        Parameter:
+            data_format [str]   -   json / dataframe / arrow / polars
+            domain      [str]   -   Domain of the records {order/item/..}
+            columns     [list]  -   Fixed columns of the DataFrame chunks
+            fields      [list]  -   Projected fields of the records
+
+        Return:
+                        [callable]  -   Takes a list of records
+    """
+    if data_format == 'dataframe':
+        import plenty_api.dataframe
+        schema = project_schema(
+            schema=constants.DATAFRAME_SCHEMA.get(domain, {}), fields=fields)
+        return plenty_api.dataframe.DataFrameChunker(
+            domain=domain, schema=schema, columns=columns).build
+    if data_format in ['arrow', 'polars']:
+        return lambda records: transform_data_type(
+            data=records, data_format=data_format, domain=domain,
+            fields=fields)
+    return list
+
+
+def chunk_records(records, chunk_size: int, data_format: str,
+                  domain: str = '', columns: list = None,
+                  fields: list = None):
+    """
+        Group the records of an iterator into chunks of [chunk_size] records
+        in the output format, only the current chunk is kept in memory.
+
+        Parameter:
+            records     [iterable]  -   JSON records
+            chunk_size  [int]       -   Maximum amount of records per chunk
+            data_format [str]       -   json / dataframe / arrow / polars
+            domain      [str]       -   Domain of the records
+            columns     [list]      -   Fixed columns of the DataFrame chunks
+            fields      [list]      -   Projected fields of the records
+
+        Return:
+                        [generator]
+    """
+    convert = build_chunk_converter(data_format=data_format, domain=domain,
+                                    columns=columns, fields=fields)
+    chunk: list = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield convert(chunk)
+            chunk = []
+    if chunk:
+        yield convert(chunk)
+
+
 def json_to_dataframe(json):
     """ simple wrapper for the data conversion from JSON dict to dataframe """
+    import pandas
     return pandas.json_normalize(json)
 
 
-def transform_data_type(data: dict, data_format: str):
-    """ simple wrapper around the data conversion before return """
+def transform_data_type(data: dict, data_format: str, domain: str = '',
+                        fields: list = None):
+    """
+        simple wrapper around the data conversion before return, the
+        DataFrame columns are typed with the schema of the [domain]
+        (see `constants.DATAFRAME_SCHEMA`), reduced to the projected
+        [fields].
+    """
     if not data:
         return {}
 
     if data_format == 'json':
         return data
 
+    schema = project_schema(schema=constants.DATAFRAME_SCHEMA.get(domain, {}),
+                            fields=fields)
+
     if data_format == 'dataframe':
-        data = json_to_dataframe(json=data)
-        return data
+        import plenty_api.dataframe
+        return plenty_api.dataframe.build_dataframe(data=data, domain=domain,
+                                                    schema=schema)
+
+    if data_format == 'arrow':
+        import plenty_api.export
+        return plenty_api.export.build_table(data=data, domain=domain,
+                                             schema=schema)
+
+    if data_format == 'polars':
+        import plenty_api.export
+        return plenty_api.export.build_polars(data=data, domain=domain,
+                                              schema=schema)
 
 
 def get_utc_offset() -> str:
@@ -350,6 +958,7 @@ def check_date_range(date_range: dict) -> bool:
         Return:
                        [bool]
     """
+    import dateutil.parser
     now = datetime.datetime.now().astimezone()
     try:
         start = dateutil.parser.parse(date_range['start'])
@@ -385,6 +994,7 @@ def parse_date(date: str) -> str:
         Return:
                     [str]
     """
+    import dateutil.parser
     try:
         date = dateutil.parser.parse(date)
     except dateutil.parser._parser.ParserError:
@@ -433,6 +1043,7 @@ def date_to_timestamp(date: str) -> int:
     if first_number is not None:
         if int(first_number.group(0)) < 2000:
             return -1
+    import dateutil.parser
     try:
         date_obj = dateutil.parser.parse(date)
     except dateutil.parser._parser.ParserError:
@@ -452,6 +1063,49 @@ def get_temp_creds() -> dict:
     return {'username': username, 'password': password}
 
 
+def get_login_credentials(keyring: object, persistent: bool, user: str,
+                          pw: str) -> dict:
+    """
+        Get the credentials for the login with one of the three methods
+        described in `PlentyApi.__authenticate`.
+
+        Parameter:
+            keyring     [CredentialManager object]
+            persistent  [bool]  -   Permanent or temporary credential
+                                    storage
+            user        [str]   -   REST-API username
+            pw          [str]   -   path to a gpg-encrypted file that
+                                    contains the key.
+
+        Return:
+                        [dict]  -   containing username and password
+    """
+    if persistent and not (user and pw):
+        creds = keyring.get_credentials()
+        if not creds:
+            creds = new_keyring_creds(keyring=keyring)
+        return creds
+
+    if not persistent and not (user and pw):
+        return get_temp_creds()
+
+    import gnupg
+    gpg = gnupg.GPG()
+    try:
+        with open(pw, 'rb') as pw_file:
+            decrypt_pw = gpg.decrypt_file(pw_file)
+    except FileNotFoundError as err:
+        print("ERROR Login to API failed: Provided gpg file is not "
+              f"valid\n=> {err}")
+        return {}
+    if not decrypt_pw:
+        print("ERROR Login to API failed: Decryption of password file"
+              " failed.")
+        return {}
+    password = decrypt_pw.data.decode('utf-8').strip('\n')
+    return {'username': user, 'password': password}
+
+
 def new_keyring_creds(keyring: object) -> dict:
     """
         Get the credentials for the API from the user and store them into
@@ -0,0 +1,147 @@
+import json
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import plenty_api.utils as utils
+
+
+class FakeServer():
+    """
+        Paginated resources of the REST API on localhost, every GET route
+        answers with the same pages of records.
+    """
+    def __init__(self):
+        self.url = ''
+        self.pages = 5
+        self.per_page = 3
+        self.delay = 0.01
+        # Page number -> seconds / status codes of the next requests
+        self.delays: dict = {}
+        self.failures: dict = {}
+        # Page number -> amount of responses, that end before the body is
+        # complete
+        self.truncated: dict = {}
+        # Page number -> additional headers of the responses
+        self.headers: dict = {}
+        # Page numbers in the order of arrival
+        self.requests: list = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.logins = 0
+        # Amount of logins answered as invalid credentials
+        self.invalid_logins = 0
+        self.expires_in = 86400
+        # Bearer tokens answered with 401
+        self.rejected: set = set()
+        self.lock = threading.Lock()
+
+    def build_page(self, page: int) -> dict:
+        entries = [{'id': (page - 1) * self.per_page + number,
+                    'updatedAt': '2020-09-14T08:00:00+02:00'}
+                   for number in range(1, self.per_page + 1)]
+        return {'page': page, 'totalsCount': self.pages * self.per_page,
+                'isLastPage': page >= self.pages,
+                'lastPageNumber': self.pages, 'itemsPerPage': self.per_page,
+                'entries': entries}
+
+    def handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def send(self, status: int, body, headers: dict = None) -> None:
+                content = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(content)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(content)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                if urllib.parse.urlparse(self.path).path != '/rest/login':
+                    return self.send(200, {})
+                with server.lock:
+                    server.logins += 1
+                    token = f'token{server.logins}'
+                    if server.invalid_logins > 0:
+                        server.invalid_logins -= 1
+                        return self.send(401,
+                                         {'error': 'invalid_credentials'})
+                return self.send(200, {'token_type': 'Bearer',
+                                       'access_token': token,
+                                       'expires_in': server.expires_in})
+
+            def do_GET(self):
+                query = urllib.parse.parse_qs(
+                    urllib.parse.urlparse(self.path).query)
+                page = int(query.get('page', ['1'])[0])
+                with server.lock:
+                    server.requests.append(page)
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight,
+                                               server.in_flight)
+                    failures = server.failures.get(page, [])
+                    status = failures.pop(0) if failures else 200
+                    truncate = server.truncated.get(page, 0) > 0
+                    if truncate:
+                        server.truncated[page] -= 1
+                time.sleep(server.delays.get(page, server.delay))
+                with server.lock:
+                    server.in_flight -= 1
+                token = self.headers.get('Authorization', '')
+                if token.split(' ')[-1] in server.rejected:
+                    return self.send(401, {'error': {
+                        'message': 'Unauthenticated.'}})
+                headers = server.headers.get(page)
+                if status != 200:
+                    return self.send(status, {'error': {'message': 'fail'}},
+                                     headers=headers)
+                if truncate:
+                    return self.send_truncated(server.build_page(page=page))
+                return self.send(200, server.build_page(page=page),
+                                 headers=headers)
+
+            def send_truncated(self, body) -> None:
+                content = json.dumps(body).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content[:len(content) // 2])
+                self.close_connection = True
+
+        return Handler
+
+
+class QuietServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients close the connections of cancelled requests
+        pass
+
+
+@pytest.fixture
+def fake_server(monkeypatch):
+    server = FakeServer()
+    httpd = QuietServer(('127.0.0.1', 0), server.handler())
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    server.url = f'http://127.0.0.1:{httpd.server_address[1]}'
+    # Accept the local URL and skip the credential prompt
+    monkeypatch.setattr(utils, 'build_endpoint',
+                        lambda url, route, path='': url + route + path)
+    monkeypatch.setattr(utils, 'get_login_credentials',
+                        lambda **kwargs: {'username': 'user',
+                                          'password': 'secret'})
+    yield server
+    httpd.shutdown()
+    httpd.server_close()
@@ -0,0 +1,325 @@
+import inspect
+import threading
+import time
+
+import pytest
+
+from plenty_api.api import PlentyApi
+from plenty_api.ratelimit import RateLimiter
+from plenty_api.response_cache import ResponseCache
+from plenty_api.retry import RetryPolicy
+from plenty_api.token_cache import TokenCache
+from plenty_api.utils import PageFetchError
+
+
+def build_api(server, **kwargs) -> PlentyApi:
+    kwargs.setdefault('retry_policy', RetryPolicy(max_attempts=1))
+    return PlentyApi(base_url=server.url, use_keyring=False, **kwargs)
+
+
+def test_parallel_pages_keep_order(fake_server) -> None:
+    # Later pages arrive before the earlier ones
+    fake_server.delays = {2: 0.2, 3: 0.1}
+    with build_api(server=fake_server, concurrency=3) as plenty:
+        items = plenty.plenty_api_get_items()
+
+    assert list(range(1, 16)) == [item['id'] for item in items]
+    assert 1 == fake_server.requests[0]
+    assert [1, 2, 3, 4, 5] == sorted(fake_server.requests)
+
+
+def test_parallel_pages_are_bounded(fake_server) -> None:
+    fake_server.pages = 12
+    fake_server.delay = 0.05
+    with build_api(server=fake_server, concurrency=3) as plenty:
+        assert 36 == len(plenty.plenty_api_get_variations())
+        assert 3 == fake_server.max_in_flight
+
+        fake_server.max_in_flight = 0
+        assert 36 == len(plenty.plenty_api_get_variations(concurrency=1))
+        assert 1 == fake_server.max_in_flight
+
+
+def test_failed_middle_page(fake_server, capsys) -> None:
+    fake_server.failures = {3: [500]}
+    with build_api(server=fake_server, concurrency=2) as plenty:
+        assert {} == plenty.plenty_api_get_items()
+    assert 'subsequent items API requests failed' in capsys.readouterr().out
+    # No page is requested after the failure was noticed
+    assert 4 >= max(fake_server.requests)
+
+    fake_server.failures = {3: [503]}
+    policy = RetryPolicy(max_attempts=2, backoff_factor=0,
+                         respect_retry_after=False)
+    with build_api(server=fake_server, concurrency=2,
+                   retry_policy=policy) as plenty:
+        items = plenty.plenty_api_get_items()
+    assert list(range(1, 16)) == [item['id'] for item in items]
+
+
+def test_truncated_body_is_retried(fake_server) -> None:
+    fake_server.truncated = {2: 1}
+    policy = RetryPolicy(max_attempts=2, backoff_factor=0)
+    with build_api(server=fake_server, retry_policy=policy) as plenty:
+        items = plenty.plenty_api_get_items()
+        assert list(range(1, 16)) == [item['id'] for item in items]
+        assert [1, 2, 2, 3, 4, 5] == fake_server.requests
+
+    fake_server.truncated = {2: 1}
+    with build_api(server=fake_server) as plenty:
+        assert {} == plenty.plenty_api_get_items()
+
+
+def test_iterator_raises_on_failed_page(fake_server) -> None:
+    records: list = []
+    with build_api(server=fake_server, concurrency=2) as plenty:
+        fake_server.failures = {3: [503]}
+        with pytest.raises(PageFetchError) as error:
+            for record in plenty.plenty_api_iter_items():
+                records.append(record['id'])
+        assert 3 == error.value.page
+        assert [1, 2, 3, 4, 5, 6] == records
+
+        # The chunks of the records fail the same way
+        fake_server.failures = {1: [500]}
+        with pytest.raises(PageFetchError) as error:
+            list(plenty.plenty_api_iter_variations(chunk_size=4, prefetch=1))
+        assert 1 == error.value.page
+
+        fake_server.failures = {2: [500]}
+        pages = list(plenty.plenty_api_iter_items(pages=True))
+        assert [3, None] == [page and len(page) for page in pages]
+
+
+def test_iterator_fetches_ahead(fake_server) -> None:
+    fake_server.pages = 10
+    with build_api(server=fake_server) as plenty:
+        records = plenty.plenty_api_iter_items(concurrency=3)
+        assert 1 == next(records)['id']
+        assert [1] == fake_server.requests
+        # Pages 2 to 4 are in flight, as soon as page 2 is required
+        for _ in range(3):
+            next(records)
+        assert [1, 2, 3, 4] == sorted(fake_server.requests)
+
+        fake_server.requests = []
+        records = plenty.plenty_api_iter_items(prefetch=2)
+        assert 1 == next(records)['id']
+        time.sleep(0.3)
+        # Two pages are queued and the third one waits for a free slot
+        assert [1, 2, 3, 4] == fake_server.requests
+        records.close()
+
+
+def test_closed_iterator_stops_requests(fake_server) -> None:
+    fake_server.pages = 10
+    fake_server.delays = {3: 0.3, 4: 0.3}
+    with build_api(server=fake_server) as plenty:
+        for prefetch in [0, 1]:
+            fake_server.requests = []
+            records = plenty.plenty_api_iter_items(concurrency=3,
+                                                   prefetch=prefetch)
+            for _ in range(4):
+                next(records)
+            records.close()
+            time.sleep(0.5)
+            assert 5 >= max(fake_server.requests)
+
+
+def test_shards_share_the_concurrency(fake_server) -> None:
+    fake_server.delay = 0.05
+    with build_api(server=fake_server, concurrency=2) as plenty:
+        orders = plenty.plenty_api_get_orders_by_date(
+            start='2020-09-01', end='2020-09-10', date_type='creation',
+            date_shards=4)
+
+    # Every shard receives the same pages, which are merged by the ID
+    assert list(range(1, 16)) == [order['id'] for order in orders]
+    assert 20 == len(fake_server.requests)
+    assert 2 == fake_server.max_in_flight
+
+
+def test_clients_share_a_single_login(fake_server, tmp_path) -> None:
+    path = str(tmp_path / 'tokens.json')
+    tokens: list = []
+
+    def start():
+        with build_api(server=fake_server, username='user',
+                       token_cache=TokenCache(path=path)) as plenty:
+            tokens.append(plenty.creds['Authorization'])
+
+    workers = [threading.Thread(target=start) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert 1 == fake_server.logins
+    assert ['Bearer token1'] * 4 == tokens
+
+
+def test_rejected_token_is_renewed(fake_server) -> None:
+    with build_api(server=fake_server, concurrency=3) as plenty:
+        fake_server.rejected = {'token1'}
+        assert 15 == len(plenty.plenty_api_get_items())
+    assert 2 == fake_server.logins
+
+
+def test_chunks_with_fixed_columns(fake_server) -> None:
+    pytest.importorskip('pandas')
+    with build_api(server=fake_server, data_format='dataframe') as plenty:
+        chunks = list(plenty.plenty_api_iter_items(chunk_size=4,
+                                                   columns=['id']))
+    assert [4, 4, 4, 3] == [len(chunk) for chunk in chunks]
+    assert all(['id'] == list(chunk.columns) for chunk in chunks)
+
+
+def test_streamed_records(fake_server) -> None:
+    pytest.importorskip('ijson')
+    with build_api(server=fake_server, concurrency=3) as plenty:
+        # The concurrency of the object doesn't apply to streamed pages
+        records = list(plenty.plenty_api_iter_items(stream=True))
+        assert list(range(1, 16)) == [record['id'] for record in records]
+        assert [1, 2, 3, 4, 5] == fake_server.requests
+        assert 1 == fake_server.max_in_flight
+        streamed = plenty.metrics.get('plenty_api_response_bytes_total')
+
+        pages = list(plenty.plenty_api_iter_items(stream=True, pages=True))
+        assert [[1, 2, 3], [4, 5, 6]] == \
+            [[record['id'] for record in page] for page in pages[:2]]
+        assert 5 == len(pages)
+
+        plenty.metrics.reset()
+        plenty.plenty_api_get_items()
+        # The decoded bytes are counted like the ones of regular responses
+        assert streamed == plenty.metrics.get(
+            'plenty_api_response_bytes_total')
+
+        with pytest.raises(ValueError):
+            next(plenty.plenty_api_iter_items(stream=True, concurrency=2))
+
+
+def test_streamed_failed_page(fake_server) -> None:
+    pytest.importorskip('ijson')
+    with build_api(server=fake_server) as plenty:
+        for prefetch in [0, 2]:
+            records: list = []
+            fake_server.failures = {3: [503]}
+            with pytest.raises(PageFetchError) as error:
+                for record in plenty.plenty_api_iter_items(
+                        stream=True, prefetch=prefetch):
+                    records.append(record['id'])
+            assert 3 == error.value.page
+            assert [1, 2, 3, 4, 5, 6] == records
+
+            fake_server.failures = {2: [500]}
+            pages = list(plenty.plenty_api_iter_items(
+                stream=True, pages=True, prefetch=prefetch))
+            assert [3, None] == [page and len(page) for page in pages]
+
+            # The connection ends within the body of the page
+            fake_server.truncated = {2: 1}
+            with pytest.raises(PageFetchError) as error:
+                list(plenty.plenty_api_iter_items(stream=True,
+                                                  prefetch=prefetch))
+            assert 2 == error.value.page
+
+
+def test_streamed_pages_are_prefetched(fake_server) -> None:
+    pytest.importorskip('ijson')
+    fake_server.pages = 10
+    with build_api(server=fake_server) as plenty:
+        records = plenty.plenty_api_iter_items(stream=True, prefetch=2)
+        assert 1 == next(records)['id']
+        time.sleep(0.3)
+        # Whole pages are queued instead of single records
+        assert [1, 2, 3, 4] == fake_server.requests
+        assert [2, 3] == [next(records)['id'] for _ in range(2)]
+        records.close()
+
+
+def test_registry_refresh_bypasses_the_cache(fake_server, tmp_path) -> None:
+    fake_server.pages = 1
+    cache = ResponseCache(path=str(tmp_path), ttl={'prices': 3600})
+    with build_api(server=fake_server, response_cache=cache) as plenty:
+        plenty.registry.reconcile_interval = 0
+        assert 1 == plenty.registry.get_price_configuration(price_id=1)['id']
+        plenty.plenty_api_get_price_configuration()
+        # The lookup of the regular request is served from the cache
+        assert 1 == len(fake_server.requests)
+
+        fake_server.per_page = 2
+        assert plenty.registry.refresh()
+        assert 2 == len(fake_server.requests)
+        assert {} == plenty.registry.get_price_configuration(price_id=3)
+        # The refreshed response renewed the cache
+        assert 2 == len(plenty.plenty_api_get_price_configuration())
+        assert 2 == len(fake_server.requests)
+
+
+def test_positional_arguments_are_kept() -> None:
+    for method in [PlentyApi.plenty_api_get_variations,
+                   PlentyApi.plenty_api_iter_variations]:
+        parameters = list(inspect.signature(method).parameters)
+        assert ['self', 'refine', 'additional', 'lang'] == parameters[:4]
+
+
+def test_projected_dataframe(fake_server) -> None:
+    pytest.importorskip('pandas')
+    with build_api(server=fake_server, data_format='dataframe') as plenty:
+        items = plenty.plenty_api_get_items(fields=['id'])
+        chunks = list(plenty.plenty_api_iter_items(fields=['id'],
+                                                   chunk_size=10))
+    assert ['id'] == list(items.columns)
+    assert 'int64' == items['id'].dtype
+    assert [['id'], ['id']] == [list(chunk.columns) for chunk in chunks]
+
+
+def fake_clock(monkeypatch) -> tuple:
+    """ The waits of the client advance a fake clock instead of the time """
+    now = [0.0]
+    sleeps: list = []
+
+    def sleep(seconds: float) -> None:
+        # The fake server answers on other threads
+        if threading.current_thread() is threading.main_thread():
+            sleeps.append(seconds)
+            now[0] += seconds
+
+    monkeypatch.setattr(time, 'sleep', sleep)
+    return RateLimiter(clock=lambda: now[0]), sleeps
+
+
+def test_low_call_limit_slows_down(fake_server, monkeypatch) -> None:
+    limiter, sleeps = fake_clock(monkeypatch=monkeypatch)
+    fake_server.pages = 3
+    fake_server.headers = {page: {
+        'X-Plenty-Global-Short-Period-Limit': '40',
+        'X-Plenty-Global-Short-Period-Calls-Left': '1',
+        'X-Plenty-Global-Short-Period-Decay': '2'} for page in [1, 2, 3]}
+    with build_api(server=fake_server, concurrency=1,
+                   rate_limiter=limiter) as plenty:
+        assert 9 == len(plenty.plenty_api_get_items())
+        # Every request after the first one waits for the next period
+        assert [2.0, 2.0] == sleeps
+        assert 2 == plenty.metrics.get('plenty_api_throttle_wait_seconds',
+                                       reason='limit')
+
+
+@pytest.mark.parametrize('respect_retry_after, wait', [(True, 9), (False, 7)])
+def test_throttled_request_waits(fake_server, monkeypatch,
+                                 respect_retry_after, wait) -> None:
+    limiter, sleeps = fake_clock(monkeypatch=monkeypatch)
+    fake_server.pages = 2
+    fake_server.failures = {2: [429]}
+    fake_server.headers = {2: {
+        'X-Plenty-Global-Short-Period-Calls-Left': '0',
+        'X-Plenty-Global-Short-Period-Decay': '7', 'Retry-After': '9'}}
+    policy = RetryPolicy(max_attempts=2,
+                         respect_retry_after=respect_retry_after)
+    with build_api(server=fake_server, concurrency=1, rate_limiter=limiter,
+                   retry_policy=policy) as plenty:
+        assert 6 == len(plenty.plenty_api_get_items())
+    # The decay of the exhausted window or the longer Retry-After time
+    assert [wait] == sleeps
+    assert [1, 2, 2] == fake_server.requests
@@ -0,0 +1,156 @@
+import asyncio
+import inspect
+
+import pytest
+
+import plenty_api.utils as utils
+from plenty_api.retry import RetryPolicy
+from plenty_api.token_cache import TokenCache
+from plenty_api.utils import PageFetchError
+
+aiohttp = pytest.importorskip('aiohttp')
+from plenty_api.async_api import AsyncPlentyApi  # noqa: E402
+
+
+def build_api(server, **kwargs) -> AsyncPlentyApi:
+    kwargs.setdefault('retry_policy', RetryPolicy(max_attempts=1))
+    return AsyncPlentyApi(base_url=server.url, use_keyring=False, **kwargs)
+
+
+def run(coroutine):
+    """ Run a coroutine and collect the errors reported by the loop """
+    errors: list = []
+
+    async def main():
+        asyncio.get_running_loop().set_exception_handler(
+            lambda loop, context: errors.append(context['message']))
+        return await coroutine
+
+    return asyncio.run(main()), errors
+
+
+def test_early_exit_collects_pending_requests(fake_server) -> None:
+    fake_server.pages = 10
+    fake_server.delays = {3: 0.5, 4: 0.5}
+
+    async def main():
+        async with build_api(server=fake_server, concurrency=3) as plenty:
+            records = plenty.plenty_api_iter_items()
+            first = await records.__anext__()
+            # Continue into the second page, while 3 and 4 are in flight
+            for _ in range(3):
+                await records.__anext__()
+            await records.aclose()
+            others = [task for task in asyncio.all_tasks()
+                      if task is not asyncio.current_task()]
+            return first['id'], others
+
+    (first, others), errors = run(main())
+    assert 1 == first
+    assert [] == others
+    assert [] == errors
+    assert 4 >= max(fake_server.requests)
+
+
+def test_login_with_invalid_credentials(fake_server, monkeypatch) -> None:
+    fake_server.invalid_logins = 1
+    prompts: list = []
+    monkeypatch.setattr(utils, 'update_keyring_creds',
+                        lambda keyring: prompts.append(keyring) or
+                        {'username': 'user', 'password': 'correct'})
+
+    async def main():
+        async with build_api(server=fake_server) as plenty:
+            return plenty.creds['Authorization']
+
+    token, _ = run(main())
+    assert 'Bearer token2' == token
+    assert 1 == len(prompts)
+
+
+def test_truncated_body_is_retried(fake_server) -> None:
+    fake_server.truncated = {2: 1}
+    policy = RetryPolicy(max_attempts=2, backoff_factor=0)
+
+    async def main():
+        async with build_api(server=fake_server, retry_policy=policy) as \
+                plenty:
+            return await plenty.plenty_api_get_items()
+
+    items, errors = run(main())
+    assert list(range(1, 16)) == [item['id'] for item in items]
+    assert [1, 2, 2, 3, 4, 5] == sorted(fake_server.requests)
+
+
+def test_iterator_raises_on_failed_page(fake_server) -> None:
+    fake_server.failures = {3: [503]}
+
+    async def main():
+        records: list = []
+        async with build_api(server=fake_server, concurrency=2) as plenty:
+            with pytest.raises(PageFetchError) as error:
+                async for record in plenty.plenty_api_iter_items():
+                    records.append(record['id'])
+            fake_server.failures = {2: [500]}
+            pages = [page async for page in
+                     plenty.plenty_api_iter_items(pages=True)]
+        return records, error.value.page, pages
+
+    (records, page, pages), errors = run(main())
+    assert [1, 2, 3, 4, 5, 6] == records
+    assert 3 == page
+    assert [3, None] == [page and len(page) for page in pages]
+    assert [] == errors
+
+
+def test_shards_share_the_concurrency(fake_server) -> None:
+    fake_server.delay = 0.05
+
+    async def main():
+        async with build_api(server=fake_server, concurrency=3) as plenty:
+            return await plenty.plenty_api_get_orders_by_date(
+                start='2020-09-01', end='2020-09-10', date_type='creation',
+                refine_shards={'referrerId': ['1', '4.01', '4.02', '4.03']})
+
+    orders, errors = run(main())
+    assert list(range(1, 16)) == [order['id'] for order in orders]
+    assert 20 == len(fake_server.requests)
+    assert 3 == fake_server.max_in_flight
+
+
+def test_rejected_token_is_renewed(fake_server) -> None:
+    async def main():
+        async with build_api(server=fake_server, concurrency=3) as plenty:
+            fake_server.rejected = {'token1'}
+            items = await plenty.plenty_api_get_items()
+            return len(items), plenty.creds['Authorization']
+
+    (amount, token), errors = run(main())
+    assert 15 == amount
+    assert 'Bearer token2' == token
+    # The parallel requests share a single renewal
+    assert 2 == fake_server.logins
+
+
+def test_token_is_refreshed_before_expiry(fake_server, tmp_path) -> None:
+    fake_server.expires_in = 1
+    cache = TokenCache(path=str(tmp_path / 'tokens.json'), margin=1)
+
+    async def main():
+        async with build_api(server=fake_server, username='user',
+                             password='/path/to/password.gpg',
+                             token_cache=cache) as plenty:
+            await asyncio.sleep(1.5)
+            return plenty.creds['Authorization']
+
+    token, errors = run(main())
+    assert 'Bearer token1' != token
+    assert 2 <= fake_server.logins
+    assert [] == errors
+
+
+def test_positional_arguments_are_kept() -> None:
+    for method in [AsyncPlentyApi.plenty_api_get_variations,
+                   AsyncPlentyApi.plenty_api_iter_variations]:
+        parameters = list(inspect.signature(method).parameters)
+        assert ['self', 'refine', 'additional', 'lang'] == parameters[:4]
@@ -0,0 +1,77 @@
+from plenty_api.catalogue import CatalogueSnapshot
+
+
+class FakeApi():
+    def __init__(self):
+        self.calls = []
+        self.data = {
+            'items': [{'id': 1, 'name': 'shirt'}, {'id': 2, 'name': 'hat'}],
+            'variations': [{'id': 10, 'itemId': 1}, {'id': 11, 'itemId': 1},
+                           {'id': 20, 'itemId': 2}]
+        }
+        self.changed = {'items': [], 'variations': []}
+        self.fail = False
+
+    def __pages(self, domain: str, last_update: str = '', **kwargs):
+        self.calls.append((domain, last_update, kwargs))
+        if self.fail:
+            yield None
+            return
+        if last_update:
+            yield self.changed[domain]
+        else:
+            yield self.data[domain]
+
+    def plenty_api_iter_items(self, **kwargs):
+        return self.__pages(domain='items', **kwargs)
+
+    def plenty_api_iter_variations(self, **kwargs):
+        return self.__pages(domain='variations', **kwargs)
+
+
+def test_full_load_and_delta(tmp_path) -> None:
+    api = FakeApi()
+    path = str(tmp_path / 'catalogue.json.gz')
+    snapshot = CatalogueSnapshot(api=api, path=path)
+
+    summary = snapshot.update()
+    assert 3 == summary['variations']['changed']
+    assert [10, 11] == [v['id'] for v in snapshot.get_item_variations(1)]
+    assert '' == api.calls[0][1]
+
+    api.changed = {'items': [{'id': 2, 'name': 'cap'}],
+                   'variations': [{'id': 21, 'itemId': 2}]}
+    summary = snapshot.update()
+    assert api.calls[-1][1]
+    assert {'changed': 1, 'deleted': 0} == summary['items']
+    assert 'cap' == snapshot.get_item(item_id=2)['name']
+    assert 4 == len(snapshot.variations)
+
+    # The stored snapshot continues with the same watermark
+    stored = CatalogueSnapshot(api=api, path=path)
+    assert snapshot.watermark == stored.watermark
+    assert snapshot.variations == stored.variations
+
+
+def test_reconcile_removes_deleted_records(tmp_path) -> None:
+    api = FakeApi()
+    snapshot = CatalogueSnapshot(api=api, path=str(tmp_path / 'cat.json.gz'))
+    snapshot.update()
+
+    api.data['variations'] = api.data['variations'][:2]
+    summary = snapshot.update(reconcile=True)
+    assert 1 == summary['variations']['deleted']
+    assert ('variations', '', {'pages': True}) == api.calls[-1]
+    assert {} == snapshot.get_variation(variation_id=20)
+
+
+def test_failed_update_keeps_snapshot(tmp_path) -> None:
+    api = FakeApi()
+    snapshot = CatalogueSnapshot(api=api, path=str(tmp_path / 'cat.json.gz'))
+    snapshot.update()
+    watermark = snapshot.watermark
+
+    api.fail = True
+    assert {} == snapshot.update()
+    assert watermark == snapshot.watermark
+    assert 2 == len(snapshot.items)
@@ -0,0 +1,85 @@
+import datetime
+import queue
+
+import pytest
+
+from plenty_api.change_feed import ChangeFeed
+
+
+def now(seconds: int = 0) -> str:
+    date = datetime.datetime.now().astimezone() + \
+        datetime.timedelta(seconds=seconds)
+    return date.isoformat(timespec='seconds')
+
+
+class FakeApi():
+    def __init__(self):
+        self.windows = []
+        self.pages: list = []
+
+    def plenty_api_iter_orders_by_date(self, start, end, date_type,
+                                       additional=None, pages=False):
+        self.windows.append((start, end, date_type))
+        yield from self.pages
+
+    def plenty_api_iter_items(self, additional=None, last_update='',
+                              pages=False):
+        self.windows.append((last_update, '', 'item'))
+        yield from self.pages
+
+
+def test_invalid_domain(tmp_path) -> None:
+    with pytest.raises(ValueError):
+        ChangeFeed(api=FakeApi(), path=str(tmp_path / 'feed.json'),
+                   domains=['stock'])
+
+
+def test_invalid_start(tmp_path) -> None:
+    path = str(tmp_path / 'feed.json')
+    with pytest.raises(ValueError):
+        ChangeFeed(api=FakeApi(), path=path, start='not a date')
+    assert not (tmp_path / 'feed.json').exists()
+
+
+def test_first_poll_without_start_sets_watermark(tmp_path) -> None:
+    api = FakeApi()
+    feed = ChangeFeed(api=api, path=str(tmp_path / 'feed.json'))
+    assert 0 == feed.poll()
+    assert feed.get_watermark(domain='order')
+    assert [] == api.windows
+
+
+def test_overlapping_windows_are_deduplicated(tmp_path) -> None:
+    api = FakeApi()
+    path = str(tmp_path / 'feed.json')
+    events = queue.Queue()
+    received = []
+    feed = ChangeFeed(api=api, path=path, start='2021-01-01', queue=events)
+    feed.subscribe(callback=received.append, domain='order')
+    feed.subscribe(callback=lambda event: 1 / 0)
+
+    updated = now(seconds=-10)
+    api.pages = [[{'id': 1, 'updatedAt': updated},
+                  {'id': 2, 'updatedAt': updated}]]
+    assert 2 == feed.poll()
+    assert ('2021-01-01', 'change') == (api.windows[0][0], api.windows[0][2])
+    assert 2 == events.qsize()
+
+    # The overlap returns both orders again, only order 2 was changed
+    api.pages = [[{'id': 1, 'updatedAt': updated},
+                  {'id': 2, 'updatedAt': now()}]]
+    restarted = ChangeFeed(api=api, path=path, queue=events)
+    assert 1 == restarted.poll()
+    assert api.windows[1][0] < restarted.get_watermark(domain='order')
+    assert [1, 2] == [event['id'] for event in received]
+    assert 3 == events.qsize()
+
+
+def test_failed_poll_keeps_watermark(tmp_path) -> None:
+    api = FakeApi()
+    feed = ChangeFeed(api=api, path=str(tmp_path / 'feed.json'),
+                      domains=['item'], start='2021-01-01')
+    api.pages = [[{'id': 5, 'updatedAt': now()}], None]
+    assert -1 == feed.poll()
+    assert '' == feed.get_watermark(domain='item')
+    assert '2021-01-01' == api.windows[0][0]
@@ -0,0 +1,100 @@
+import pandas
+
+import plenty_api.constants as constants
+import plenty_api.utils as utils
+from plenty_api.dataframe import (
+    DataFrameChunker, build_dataframe, flatten_records)
+
+
+def test_flatten_records() -> None:
+    records = [
+        {'id': 1, 'amounts': [{'currency': 'EUR'}], 'owner': {'id': 3}},
+        {'id': 2, 'owner': {}}
+    ]
+    expected = {
+        'id': [1, 2],
+        'amounts': [[{'currency': 'EUR'}], None],
+        'owner.id': [3, None],
+        'owner': [None, {}]
+    }
+
+    assert expected == flatten_records(records=records)
+
+
+def test_build_dataframe_typed_columns() -> None:
+    orders = [
+        {'id': 1, 'typeId': 1, 'statusId': 5, 'referrerId': 1,
+         'roundTotalsOnly': True, 'createdAt': '2020-09-01T10:00:00+02:00',
+         'orderItems': [{'id': 11}]},
+        {'id': 2, 'typeId': None, 'statusId': 7, 'referrerId': 1,
+         'roundTotalsOnly': False, 'createdAt': 'invalid',
+         'orderItems': []}
+    ]
+
+    result = build_dataframe(data=orders, domain='order')
+
+    assert 'int64' == result['id'].dtype
+    assert 'Int64' == result['typeId'].dtype
+    assert 'bool' == result['roundTotalsOnly'].dtype
+    assert isinstance(result['statusId'].dtype, pandas.CategoricalDtype)
+    assert pandas.Timestamp('2020-09-01T08:00:00Z') == result['createdAt'][0]
+    assert pandas.isna(result['createdAt'][1])
+    assert [{'id': 11}] == result['orderItems'][0]
+    # Columns of the schema are present without a matching field
+    assert result['updatedAt'].isna().all()
+
+
+def test_build_dataframe_without_schema() -> None:
+    data = [{'id': 1, 'sub': {'a': 2}}]
+
+    result = build_dataframe(data=data, domain='unknown')
+
+    assert ['id', 'sub.a'] == list(result.columns)
+    assert 1 == len(build_dataframe(data={'DE': 1}, domain='order'))
+
+
+def test_dataframe_chunker(capsys) -> None:
+    chunker = DataFrameChunker(domain='order')
+
+    first = chunker.build(records=[
+        {'id': 1, 'statusId': 5, 'roundTotalsOnly': True, 'note': 'a'}])
+    second = chunker.build(records=[
+        {'id': 2, 'statusId': 7, 'typeId': 1, 'extra': 3}])
+
+    assert list(first.columns) == list(second.columns)
+    assert 'extra' not in second.columns
+    assert [str(dtype) for dtype in first.dtypes] == \
+        [str(dtype) for dtype in second.dtypes]
+    assert 'Int64' == first['typeId'].dtype
+    assert 'boolean' == second['roundTotalsOnly'].dtype
+    assert [5, 7] == list(second['statusId'].cat.categories)
+    assert 'a' == first['note'][0]
+    assert second['note'].isna().all()
+    assert 'dropped: extra' in capsys.readouterr().out
+
+
+def test_projected_schema() -> None:
+    schema = utils.project_schema(
+        schema=constants.DATAFRAME_SCHEMA['order'], fields=['id', 'owner'])
+    records = [{'id': 1, 'owner': {'id': 2}}]
+
+    assert ['id', 'owner.id'] == list(build_dataframe(
+        data=records, domain='order', schema=schema).columns)
+    chunker = DataFrameChunker(domain='order', schema=schema)
+    assert ['id', 'owner.id'] == list(chunker.build(records=records).columns)
+    assert constants.DATAFRAME_SCHEMA['order'] == utils.project_schema(
+        schema=constants.DATAFRAME_SCHEMA['order'], fields=None)
+
+
+def test_dataframe_chunker_columns(capsys) -> None:
+    chunker = DataFrameChunker(domain='order', columns=['id', 'extra.a'])
+
+    first = chunker.build(records=[{'id': 1, 'statusId': 5}])
+    second = chunker.build(records=[{'id': 2, 'extra': {'a': 3}}])
+
+    assert ['id', 'extra.a'] == list(first.columns)
+    assert first['extra.a'].isna().all()
+    assert [3] == list(second['extra.a'])
+    # The warning lists every dropped field only once
+    chunker.build(records=[{'id': 3, 'statusId': 7}])
+    assert 1 == capsys.readouterr().out.count('statusId')
@@ -0,0 +1,63 @@
+import io
+
+import pytest
+
+from plenty_api.decoder import (
+    CountingReader, DecodeError, JsonDecoder, iter_entries)
+
+
+def test_decode() -> None:
+    content = b'{"page": 1, "entries": [{"id": 1, "price": 9.99}]}'
+    expected = {'page': 1, 'entries': [{'id': 1, 'price': 9.99}]}
+
+    for backend in ['auto', 'orjson', 'msgspec', 'simplejson']:
+        try:
+            decoder = JsonDecoder(backend=backend)
+        except ImportError:
+            continue
+        assert expected == decoder.decode(content=content)
+        assert expected == decoder.decode(content=content.decode())
+        with pytest.raises(DecodeError):
+            decoder.decode(content=b'')
+        with pytest.raises(DecodeError):
+            decoder.decode(content=b'<html>Bad Gateway</html>')
+
+
+def test_invalid_backend() -> None:
+    with pytest.raises(ValueError):
+        JsonDecoder(backend='json5')
+
+
+def test_iter_entries() -> None:
+    pytest.importorskip('ijson')
+    content = (b'{"page": 2, "entries": [{"id": 1, "sub": [{"a": 1.5}]}, '
+               b'{"id": 2}], "isLastPage": false, "lastPageNumber": 3}')
+    meta: dict = {}
+
+    entries = iter_entries(stream=io.BytesIO(content), meta=meta)
+
+    assert {'id': 1, 'sub': [{'a': 1.5}]} == next(entries)
+    assert [{'id': 2}] == list(entries)
+    assert {'page': 2, 'isLastPage': False, 'lastPageNumber': 3} == meta
+
+
+def test_iter_entries_errors() -> None:
+    pytest.importorskip('ijson')
+    meta: dict = {}
+
+    content = b'{"error": {"message": "Unauthenticated", "code": 401}}'
+    assert [] == list(iter_entries(stream=io.BytesIO(content), meta=meta))
+    assert 'Unauthenticated' == meta['error']
+
+    for content in [b'', b'{"page": 1, "entries": [{"id": 1']:
+        with pytest.raises(DecodeError):
+            list(iter_entries(stream=io.BytesIO(content), meta={}))
+
+
+def test_counting_reader() -> None:
+    pytest.importorskip('ijson')
+    content = b'{"page": 1, "entries": [{"id": 1}], "isLastPage": true}'
+    body = CountingReader(stream=io.BytesIO(content))
+
+    assert [{'id': 1}] == list(iter_entries(stream=body, meta={}))
+    assert len(content) == body.bytes_read
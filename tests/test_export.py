@@ -0,0 +1,113 @@
+import datetime
+
+import pytest
+
+from plenty_api.export import (
+    ArrowSink, build_polars, build_table, convert_value, get_field)
+from plenty_api.utils import PageFetchError
+
+
+def test_convert_value() -> None:
+    sample_data = [
+        ('5', 'int'), ('abc', 'int'), (None, 'int'), ('2.5', 'float'),
+        (1, 'bool'), ('2020-09-01T10:00:00+02:00', 'datetime'),
+        ('2020-09-01T08:00:00Z', 'datetime'), ('invalid', 'datetime'),
+        ([{'id': 1}], 'json'), (3, 'category')
+    ]
+    date = datetime.datetime(2020, 9, 1, 8, tzinfo=datetime.timezone.utc)
+    expected = [5, None, None, 2.5, True, date, date, None, '[{"id": 1}]',
+                '3']
+    result = []
+
+    for value, column_type in sample_data:
+        result.append(convert_value(value=value, column_type=column_type))
+
+    assert expected == result
+
+
+def test_get_field() -> None:
+    record = {'id': 1, 'owner': {'id': 3}, 'tags': []}
+
+    assert 1 == get_field(record=record, path='id')
+    assert 3 == get_field(record=record, path='owner.id')
+    assert get_field(record=record, path='owner.name') is None
+    assert get_field(record=record, path='tags.id') is None
+
+
+@pytest.mark.parametrize('file_format', ['parquet', 'arrow'])
+def test_arrow_sink(tmp_path, file_format) -> None:
+    pyarrow = pytest.importorskip('pyarrow')
+    import pyarrow.ipc
+    import pyarrow.parquet
+    path = str(tmp_path / 'orders')
+    pages = [
+        [{'id': 1, 'statusId': 5, 'createdAt': '2020-09-01T10:00:00+02:00',
+          'orderItems': [{'id': 11}]},
+         {'id': 2, 'statusId': 7}],
+        [{'id': 3, 'statusId': 5}]
+    ]
+
+    with ArrowSink(path=path, domain='order', file_format=file_format,
+                   row_group_size=2, json_columns=['orderItems']) as sink:
+        assert 3 == sink.write_pages(pages=pages)
+    assert [path] == [str(file) for file in tmp_path.iterdir()]
+
+    if file_format == 'parquet':
+        table = pyarrow.parquet.read_table(path)
+    else:
+        table = pyarrow.ipc.open_file(path).read_all()
+    assert [1, 2, 3] == table.column('id').to_pylist()
+    assert ['5', '7', '5'] == table.column('statusId').to_pylist()
+    assert ['[{"id": 11}]', None, None] == \
+        table.column('orderItems').to_pylist()
+
+
+@pytest.mark.parametrize('file_format', ['parquet', 'arrow'])
+def test_arrow_sink_failed_page(tmp_path, file_format) -> None:
+    pytest.importorskip('pyarrow')
+    path = str(tmp_path / 'orders')
+    pages = [[{'id': 1}, {'id': 2}], None, [{'id': 3}]]
+
+    with pytest.raises(PageFetchError) as error:
+        with ArrowSink(path=path, domain='order', file_format=file_format,
+                       row_group_size=1) as sink:
+            sink.write_pages(pages=pages)
+    assert 2 == error.value.page
+    assert [] == list(tmp_path.iterdir())
+
+    # Any other error within the block discards the file as well
+    with pytest.raises(KeyError):
+        with ArrowSink(path=path, domain='order',
+                       file_format=file_format) as sink:
+            sink.write(records=[{'id': 1}])
+            raise KeyError('id')
+    assert [] == list(tmp_path.iterdir())
+
+
+def test_build_table() -> None:
+    pyarrow = pytest.importorskip('pyarrow')
+    orders = [
+        {'id': 1, 'statusId': 5, 'createdAt': '2020-09-01T10:00:00+02:00',
+         'orderItems': [{'id': 11, 'quantity': 2}], 'mixed': 1},
+        {'id': 2, 'statusId': 7, 'orderItems': [], 'mixed': 'a'}
+    ]
+
+    table = build_table(data=orders, domain='order')
+
+    assert pyarrow.int64() == table.schema.field('id').type
+    assert pyarrow.types.is_dictionary(table.schema.field('statusId').type)
+    assert pyarrow.types.is_timestamp(table.schema.field('updatedAt').type)
+    assert pyarrow.types.is_list(table.schema.field('orderItems').type)
+    assert [[{'id': 11, 'quantity': 2}], []] == \
+        table.column('orderItems').to_pylist()
+    assert ['1', '"a"'] == table.column('mixed').to_pylist()
+
+
+def test_build_polars() -> None:
+    polars = pytest.importorskip('polars')
+    pytest.importorskip('pyarrow')
+
+    frame = build_polars(data=[{'id': 1, 'itemId': 4}], domain='variation')
+
+    assert polars.Int64 == frame['itemId'].dtype
+    assert [1] == frame['id'].to_list()
@@ -0,0 +1,45 @@
+import subprocess
+import sys
+
+# Heavy dependencies, which are only required by specific code paths
+LAZY_MODULES = ['pandas', 'gnupg', 'keyring', 'dateutil', 'pkg_resources',
+                'aiohttp', 'pyarrow', 'polars',
+                'ijson', 'opentelemetry', 'asyncio', 'sqlite3']
+# Upper limit for the import time of the package in microseconds, without
+# the import of requests, which takes the largest share (an eager import of
+# pandas alone exceeds it several times)
+IMPORT_TIME_BUDGET = 100000
+
+
+def run_python(code: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                          capture_output=True, text=True, check=True)
+
+
+def test_import_skips_heavy_dependencies() -> None:
+    result = run_python(
+        'import sys, plenty_api\n'
+        f'print(",".join(m for m in {LAZY_MODULES} if m in sys.modules))')
+
+    assert '' == result.stdout.strip()
+
+
+def test_import_time_budget() -> None:
+    result = run_python('import plenty_api')
+    cumulative: dict = {}
+    for line in result.stderr.splitlines():
+        fields = [field.strip() for field in line.split('|')]
+        if len(fields) == 3 and fields[2] in ['plenty_api', 'requests']:
+            cumulative[fields[2]] = int(fields[1])
+
+    assert 0 < cumulative['plenty_api'] - cumulative['requests'] < \
+        IMPORT_TIME_BUDGET
+
+
+def test_lazy_classes() -> None:
+    result = run_python(
+        'import sys, plenty_api\n'
+        'assert "sqlite3" not in sys.modules\n'
+        'print(plenty_api.OrderMirror.__module__, "sqlite3" in sys.modules)')
+
+    assert 'plenty_api.mirror True' == result.stdout.strip()
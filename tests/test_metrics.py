@@ -0,0 +1,67 @@
+from plenty_api.metrics import InMemoryMetrics, MetricsSink, format_labels
+
+
+def test_counters_and_histograms() -> None:
+    metrics = InMemoryMetrics(buckets=(0.1, 1.0))
+    labels = {'domain': 'orders', 'route': '/rest/orders'}
+    metrics.increment(name='plenty_api_requests_total',
+                      labels=dict(labels, status=200))
+    metrics.increment(name='plenty_api_requests_total',
+                      labels=dict(labels, status=200))
+    metrics.increment(name='plenty_api_requests_total',
+                      labels=dict(labels, status=429))
+    for value in [0.05, 0.5, 2.0]:
+        metrics.observe(name='plenty_api_request_duration_seconds',
+                        value=value, labels=labels)
+
+    assert 3 == metrics.get('plenty_api_requests_total', domain='orders')
+    assert 2 == metrics.get('plenty_api_requests_total', status=200)
+    assert 3 == metrics.get('plenty_api_request_duration_seconds')
+
+    snapshot = metrics.snapshot()
+    assert {'domain': 'orders', 'route': '/rest/orders', 'status': '429'} == \
+        snapshot['counters']['plenty_api_requests_total'][1]['labels']
+    histogram = snapshot['histograms'][
+        'plenty_api_request_duration_seconds'][0]
+    assert [[0.1, 1], [1.0, 2], ['+Inf', 3]] == histogram['buckets']
+    assert 2.55 == histogram['sum']
+
+    metrics.reset()
+    assert 0 == metrics.get('plenty_api_requests_total')
+
+
+def test_prometheus_format() -> None:
+    metrics = InMemoryMetrics(buckets=(1.0,))
+    metrics.increment(name='plenty_api_response_bytes_total', value=512,
+                      labels={'domain': 'items'})
+    metrics.observe(name='plenty_api_decode_duration_seconds', value=0.2,
+                    labels={'domain': 'items'})
+    expected = [
+        '# HELP plenty_api_response_bytes_total Received bytes of response '
+        'bodies',
+        '# TYPE plenty_api_response_bytes_total counter',
+        'plenty_api_response_bytes_total{domain="items"} 512',
+        '# HELP plenty_api_decode_duration_seconds Time to decode response '
+        'bodies',
+        '# TYPE plenty_api_decode_duration_seconds histogram',
+        'plenty_api_decode_duration_seconds_bucket{domain="items",le="1.0"} '
+        '1',
+        'plenty_api_decode_duration_seconds_bucket{domain="items",le="+Inf"} '
+        '1',
+        'plenty_api_decode_duration_seconds_sum{domain="items"} 0.2',
+        'plenty_api_decode_duration_seconds_count{domain="items"} 1',
+        ''
+    ]
+    assert '\n'.join(expected) == metrics.to_prometheus()
+
+
+def test_format_labels_escapes_values() -> None:
+    assert '' == format_labels(labels={})
+    assert '{name="a\\"b\\\\c\\n"}' == format_labels(
+        labels={'name': 'a"b\\c\n'})
+
+
+def test_base_sink_discards_values() -> None:
+    sink = MetricsSink()
+    sink.increment(name='plenty_api_pages_total')
+    sink.observe(name='plenty_api_decode_duration_seconds', value=1.0)
@@ -0,0 +1,85 @@
+from plenty_api.mirror import OrderMirror, get_contact_id, to_utc
+
+
+def order(order_id: int, created: str, referrer: float = 1.0,
+          items: list = None) -> dict:
+    return {
+        'id': order_id, 'typeId': 1, 'statusId': 5.0, 'referrerId': referrer,
+        'plentyId': 1000, 'createdAt': created, 'updatedAt': created,
+        'relations': [{'referenceType': 'contact', 'referenceId': 7,
+                       'relation': 'receiver'}],
+        'orderItems': [{'id': item_id, 'typeId': 1, 'itemVariationId': 55,
+                        'quantity': 2} for item_id in items or []]
+    }
+
+
+class FakeApi():
+    def __init__(self, pages: list):
+        self.pages = pages
+        self.queries = []
+
+    def plenty_api_iter_orders_by_date(self, start, end, date_type,
+                                       additional=None, refine=None,
+                                       pages=False):
+        self.queries.append({'start': start, 'end': end,
+                             'date_type': date_type})
+        yield from self.pages
+
+
+def test_to_utc() -> None:
+    assert '2021-01-01T11:00:00Z' == to_utc(date='2021-01-01T12:00:00+01:00')
+    assert to_utc(date='invalid') is None
+    assert to_utc(date=None) is None
+
+
+def test_get_contact_id() -> None:
+    assert 7 == get_contact_id(order=order(1, '2021-01-01T12:00:00+01:00'))
+    assert get_contact_id(order={'id': 1}) is None
+
+
+def test_sync_and_query(tmp_path) -> None:
+    api = FakeApi(pages=[
+        [order(1, '2021-01-01T12:00:00+01:00', items=[10, 11]),
+         order(2, '2021-01-02T12:00:00+01:00', referrer=4.01)],
+        [order(3, '2021-01-03T12:00:00+01:00', items=[12])]
+    ])
+    with OrderMirror(api=api, path=str(tmp_path / 'orders.db')) as mirror:
+        assert -1 == mirror.sync()
+        assert 3 == mirror.sync(start='2021-01-01')
+        assert 'change' == api.queries[0]['date_type']
+        assert mirror.watermark
+
+        assert [1, 2, 3] == [o['id'] for o in mirror.get_orders()]
+        assert [2] == [o['id'] for o in mirror.get_orders(referrer_id=4.01)]
+        assert [2, 3] == [o['id'] for o in mirror.get_orders(
+            start='2021-01-02T00:00:00+01:00')]
+        assert 3 == len(mirror.get_orders(contact_id=7))
+        assert [10, 11] == [i['id'] for i in
+                            mirror.get_order_items(order_id=1)]
+        assert 3 == len(mirror.get_order_items(variation_id=55))
+
+        # Changed orders replace the stored order and its items
+        api.pages = [[order(1, '2021-01-01T12:00:00+01:00', items=[13])]]
+        assert 1 == mirror.sync()
+        assert api.queries[-1]['start'] < mirror.watermark
+        assert [13] == [i['id'] for i in mirror.get_order_items(order_id=1)]
+        assert 3 == len(mirror.get_orders())
+        assert {} == mirror.get_order(order_id=4)
+
+
+def test_invalid_start_keeps_watermark(tmp_path) -> None:
+    api = FakeApi(pages=[[order(1, '2021-01-01T12:00:00+01:00')]])
+    with OrderMirror(api=api, path=str(tmp_path / 'orders.db')) as mirror:
+        assert -1 == mirror.sync(start='2020-13-45')
+        assert '' == mirror.watermark
+        assert [] == api.queries
+        assert 1 == mirror.sync(start='2021-01-01')
+
+
+def test_failed_sync_keeps_watermark(tmp_path) -> None:
+    api = FakeApi(pages=[[order(1, '2021-01-01T12:00:00+01:00')], None])
+    with OrderMirror(api=api, path=str(tmp_path / 'orders.db')) as mirror:
+        assert -1 == mirror.sync(start='2021-01-01')
+        assert '' == mirror.watermark
+        # The received pages are kept and replaced by the next sync
+        assert 1 == mirror.get_order(order_id=1)['id']
@@ -0,0 +1,103 @@
+import asyncio
+import contextvars
+import threading
+
+import plenty_api.profiling as profiling
+import plenty_api.utils as utils
+from plenty_api.api import PlentyApi
+
+
+class FakeClient():
+    def __init__(self, profile: bool):
+        self.profile = profile
+        self.last_profile = None
+
+    @profiling.profiled
+    def plenty_api_get_items(self):
+        profiling.record(phase='request', seconds=0.5)
+        with profiling.measure(phase='post_process'):
+            pass
+        # Nested getters are part of the outer profile
+        return self.plenty_api_get_variations()
+
+    @profiling.profiled
+    def plenty_api_get_variations(self):
+        worker = threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(profiling.record,),
+            kwargs={'phase': 'decode', 'seconds': 0.25})
+        worker.start()
+        worker.join()
+        return 'variations'
+
+    @profiling.profiled
+    async def plenty_api_get_orders_by_date(self):
+        async def request():
+            await asyncio.sleep(0)
+            profiling.record(phase='request', seconds=1.0)
+
+        await asyncio.gather(*[request() for _ in range(3)])
+        return 'orders'
+
+
+def test_record_without_profile_is_ignored() -> None:
+    profiling.record(phase='request', seconds=1.0)
+    with profiling.measure(phase='decode'):
+        pass
+    assert profiling.CURRENT_PROFILE.get() is None
+
+
+def test_profiled_sync_call(capsys) -> None:
+    client = FakeClient(profile=True)
+    assert 'variations' == client.plenty_api_get_items()
+
+    report = client.last_profile.report()
+    assert 'plenty_api_get_items' == report['call']
+    assert {'seconds': 0.5, 'count': 1} == report['phases']['request']
+    assert {'seconds': 0.25, 'count': 1} == report['phases']['decode']
+    assert 1 == report['phases']['post_process']['count']
+    assert report['peak_memory'] > 0
+    assert 'PROFILE: plenty_api_get_items' in capsys.readouterr().out
+    assert profiling.CURRENT_PROFILE.get() is None
+
+
+def test_profiled_async_call() -> None:
+    client = FakeClient(profile=True)
+    assert 'orders' == asyncio.run(client.plenty_api_get_orders_by_date())
+    assert 3 == client.last_profile.report()['phases']['request']['count']
+
+
+def test_disabled_profile() -> None:
+    client = FakeClient(profile=False)
+    client.plenty_api_get_items()
+    assert client.last_profile is None
+
+
+def test_prefetch_keeps_profile() -> None:
+    def produce():
+        for number in range(3):
+            profiling.record(phase='request', seconds=1.0)
+            yield number
+
+    profile = profiling.CallProfile(name='iterator')
+    token = profiling.CURRENT_PROFILE.set(profile)
+    try:
+        assert [0, 1, 2] == list(utils.prefetch(iterable=produce(), depth=2))
+    finally:
+        profiling.CURRENT_PROFILE.reset(token)
+    assert 3 == profile.report()['phases']['request']['count']
+
+
+def test_profiled_client(fake_server, capsys) -> None:
+    with PlentyApi(base_url=fake_server.url, use_keyring=False,
+                   concurrency=3, profile=True) as plenty:
+        assert 15 == len(plenty.plenty_api_get_items(fields=['id']))
+        report = plenty.last_profile.report()
+
+    assert 'plenty_api_get_items' == report['call']
+    # Every page is measured, also the ones of the worker threads
+    for phase in ['request', 'decode', 'post_process']:
+        assert 5 == report['phases'][phase]['count']
+        assert report['phases'][phase]['seconds'] > 0
+    assert 1 == report['phases']['conversion']['count']
+    assert 'PROFILE: plenty_api_get_items' in capsys.readouterr().out
@@ -0,0 +1,75 @@
+import pytest
+
+from plenty_api.ratelimit import RateLimiter, parse_limit_headers
+
+
+class FakeClock():
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def sample_headers() -> dict:
+    return {
+        'Content-Type': 'application/json',
+        'X-Plenty-Global-Short-Period-Limit': '40',
+        'X-Plenty-Global-Short-Period-Calls-Left': '2',
+        'X-Plenty-Global-Short-Period-Decay': '10',
+        'X-Plenty-Global-Long-Period-Limit': '1000',
+        'X-Plenty-Global-Long-Period-Calls-Left': '500',
+        'X-Plenty-Global-Long-Period-Decay': '3600'
+    }
+
+
+def test_parse_limit_headers(sample_headers: dict) -> None:
+    expected = {
+        'global-short-period': {'limit': 40, 'calls_left': 2, 'decay': 10},
+        'global-long-period': {'limit': 1000, 'calls_left': 500,
+                               'decay': 3600}
+    }
+
+    assert expected == parse_limit_headers(headers=sample_headers)
+    assert {} == parse_limit_headers(headers={'Content-Type': 'text'})
+    assert {} == parse_limit_headers(headers=None)
+
+
+def test_acquire_without_headers() -> None:
+    limiter = RateLimiter()
+
+    assert 0 == limiter.acquire()
+
+
+def test_acquire_waits_for_decay(sample_headers: dict) -> None:
+    clock = FakeClock()
+    limiter = RateLimiter(reserve=0, clock=clock)
+    limiter.update(headers=sample_headers)
+
+    result = [limiter.acquire() for _ in range(3)]
+
+    assert [0, 0, 10] == result
+
+    clock.now += 4
+    assert 6 == limiter.acquire()
+
+    # The period ended, wait for the next response to learn the new state
+    clock.now += 6
+    assert 0 == limiter.acquire()
+
+
+def test_acquire_keeps_reserve(sample_headers: dict) -> None:
+    limiter = RateLimiter(reserve=2, clock=FakeClock())
+    limiter.update(headers=sample_headers)
+
+    assert 10 == limiter.acquire()
+
+
+def test_throttled(sample_headers: dict) -> None:
+    limiter = RateLimiter(fallback_delay=3)
+    exhausted = dict(sample_headers)
+    exhausted['X-Plenty-Global-Short-Period-Calls-Left'] = '0'
+
+    assert 10 == limiter.throttled(headers=exhausted)
+    assert 3 == limiter.throttled(headers={})
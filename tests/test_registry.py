@@ -0,0 +1,97 @@
+import datetime
+
+from plenty_api.registry import ReferenceRegistry
+
+
+class FakeFetch():
+    def __init__(self):
+        self.calls = []
+        self.data = {
+            'vat': [{'id': 1, 'countryId': 1, 'taxIdNumber': 'DE123'},
+                    {'id': 2, 'countryId': 1, 'taxIdNumber': 'DE123'},
+                    {'id': 3, 'countryId': 12, 'taxIdNumber': 'GB456'}],
+            'referrer': [{'id': 1, 'name': 'Mandant'},
+                         {'id': 4.01, 'name': 'Amazon Germany'}],
+            'prices': [{'id': 1, 'type': 'default'}],
+            'manufacturer': [{'id': 5, 'name': 'ACME'}]
+        }
+
+    def __call__(self, domain: str, query: dict, revalidate: bool = False):
+        self.calls.append((domain, query, revalidate))
+        return self.data[domain]
+
+
+def test_lookups() -> None:
+    fetch = FakeFetch()
+    registry = ReferenceRegistry(fetch=fetch)
+
+    assert 1 == registry.get_country_id(code='de')
+    assert 'GB' == registry.get_country_code(country_id=12)
+    assert 'Amazon Germany' == registry.get_referrer_name(referrer_id=4.01)
+    assert '' == registry.get_referrer_name(referrer_id=9)
+    assert [1, 2] == [vat['id'] for vat in
+                      registry.get_vat_configurations(country_id=1)]
+    assert {'1': {'config': ['1', '2'], 'TaxId': 'DE123'}} == \
+        registry.get_vat_mapping(subset=[1])
+    assert 'ACME' == registry.get_manufacturer(manufacturer_id='5')['name']
+    assert {} == registry.get_price_configuration(price_id=2)
+    # Every domain is only requested once
+    assert 4 == len(fetch.calls)
+
+
+def test_refresh() -> None:
+    fetch = FakeFetch()
+    registry = ReferenceRegistry(fetch=fetch)
+    registry.get_manufacturer(manufacturer_id=5)
+    registry.get_referrer(referrer_id=1)
+
+    fetch.data['manufacturer'] = [{'id': 6, 'name': 'Umbrella'}]
+    fetch.data['referrer'] = [{'id': 1, 'name': 'Client'}]
+    assert registry.refresh()
+
+    assert [False, False, True, True] == [call[2] for call in fetch.calls]
+    manufacturer_query = fetch.calls[2][1]
+    assert 'updatedAt' in manufacturer_query
+    assert {} == fetch.calls[3][1]
+    # Updated manufacturers are merged, referrers are replaced
+    assert 'ACME' == registry.get_manufacturer(manufacturer_id=5)['name']
+    assert 'Umbrella' == registry.get_manufacturer(manufacturer_id=6)['name']
+    assert 'Client' == registry.get_referrer_name(referrer_id=1)
+
+
+def test_failed_load() -> None:
+    fetch = FakeFetch()
+    fetch.data['vat'] = None
+    registry = ReferenceRegistry(fetch=fetch)
+
+    assert [] == registry.get_vat_configurations(country_id=1)
+    assert [] == registry.get_vat_configurations(country_id=1)
+    # Every lookup tries again, until the domain is loaded
+    assert 2 == len(fetch.calls)
+    assert not registry.load()
+
+    fetch.data['vat'] = [{'id': 1, 'countryId': 1}]
+    assert [{'id': 1, 'countryId': 1}] == \
+        registry.get_vat_configurations(country_id=1)
+    fetch.data['vat'] = None
+    assert not registry.refresh()
+    # A failed refresh keeps the previous index
+    assert [{'id': 1, 'countryId': 1}] == \
+        registry.get_vat_configurations(country_id=1)
+
+
+def test_reconcile() -> None:
+    fetch = FakeFetch()
+    registry = ReferenceRegistry(fetch=fetch, reconcile_interval=3600)
+    registry.get_manufacturer(manufacturer_id=5)
+
+    fetch.data['manufacturer'] = []
+    assert registry.refresh()
+    assert 'ACME' == registry.get_manufacturer(manufacturer_id=5)['name']
+
+    # The deleted manufacturer disappears with the next complete reload
+    registry.loaded_at['manufacturer'] -= datetime.timedelta(hours=1)
+    assert registry.refresh()
+    assert {} == fetch.calls[-1][1]
+    assert {} == registry.get_manufacturer(manufacturer_id=5)
+    assert 'updatedAt' in fetch.calls[1][1]
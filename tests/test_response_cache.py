@@ -0,0 +1,139 @@
+import os
+import time
+
+import plenty_api.response_cache
+import plenty_api.utils as utils
+from plenty_api.api import PlentyApi
+from plenty_api.response_cache import ResponseCache
+from plenty_api.retry import RetryPolicy
+
+
+def test_build_key() -> None:
+    key = ResponseCache.build_key(route='/rest/vat',
+                                  query={'page': 1, 'with': ['a', 'b']})
+
+    assert key == ResponseCache.build_key(
+        route='/rest/vat', query={'with': ['a', 'b'], 'page': 1})
+    assert key != ResponseCache.build_key(
+        route='/rest/vat', query={'page': 2, 'with': ['a', 'b']})
+    assert key != ResponseCache.build_key(
+        route='/rest/vat', path='1', query={'page': 1, 'with': ['a', 'b']})
+
+    # Every system has its own responses
+    url = 'https://first.plentymarkets-cloud01.com'
+    first = ResponseCache.build_key(route='/rest/vat', url=url)
+    assert first == ResponseCache.build_key(route='/rest/vat', url=url + '/')
+    assert first != ResponseCache.build_key(
+        route='/rest/vat', url='https://second.plentymarkets-cloud01.com')
+
+
+def test_get_ttl(tmp_path) -> None:
+    cache = ResponseCache(path=str(tmp_path), ttl={'item': 60, 'vat': 0})
+
+    assert 60 == cache.get_ttl(domain='items')
+    assert 0 == cache.get_ttl(domain='vat')
+    assert 0 == cache.get_ttl(domain='orders')
+    assert 3600 == cache.get_ttl(domain='manufacturer')
+
+
+def test_set_and_get(tmp_path) -> None:
+    cache = ResponseCache(path=str(tmp_path / 'responses'),
+                          ttl={'referrer': 60}, stale_ttl=60)
+    response = [{'id': 1, 'name': 'Amazon'}]
+    key = cache.build_key(route='/rest/orders/referrers')
+
+    assert {} == cache.get(domain='referrer', key=key)
+
+    cache.set(domain='referrer', key=key, response=response)
+    cache.set(domain='orders', key='orders', response=response)
+
+    assert {'response': response, 'state': 'fresh'} == \
+        cache.get(domain='referrer', key=key)
+    assert {} == cache.get(domain='orders', key='orders')
+    assert ['%s.json.gz' % key] == os.listdir(cache.path)
+
+
+def test_states(tmp_path, monkeypatch) -> None:
+    cache = ResponseCache(path=str(tmp_path), ttl={'vat': 10}, stale_ttl=10)
+    cache.set(domain='vat', key='vat', response={'entries': []})
+    stored = time.time()
+    result = []
+
+    for age in [5, 15, 25]:
+        monkeypatch.setattr(time, 'time', lambda age=age: stored + age)
+        result.append(cache.get(domain='vat', key='vat')['state'])
+
+    assert ['fresh', 'stale', 'expired'] == result
+
+
+def test_revalidation_and_clear(tmp_path) -> None:
+    cache = ResponseCache(path=str(tmp_path))
+    cache.set(domain='vat', key='vat', response={'entries': []})
+
+    assert cache.start_revalidation(key='vat')
+    assert not cache.start_revalidation(key='vat')
+    cache.finish_revalidation(key='vat')
+    assert cache.start_revalidation(key='vat')
+
+    cache.clear()
+    assert {} == cache.get(domain='vat', key='vat')
+
+
+def age_cache(monkeypatch, seconds: float) -> None:
+    stored = time.time()
+    monkeypatch.setattr(plenty_api.response_cache, 'time', type(
+        'Clock', (), {'time': staticmethod(lambda: stored + seconds)}))
+
+
+def build_api(server, cache) -> PlentyApi:
+    return PlentyApi(base_url=server.url, use_keyring=False,
+                     response_cache=cache,
+                     retry_policy=RetryPolicy(max_attempts=1))
+
+
+def test_client_revalidates_stale_responses(fake_server, tmp_path,
+                                            monkeypatch) -> None:
+    fake_server.pages = 1
+    cache = ResponseCache(path=str(tmp_path), ttl={'prices': 10},
+                          stale_ttl=100)
+    with build_api(server=fake_server, cache=cache) as plenty:
+        assert 3 == len(plenty.plenty_api_get_price_configuration())
+        assert 3 == len(plenty.plenty_api_get_price_configuration())
+        assert [1] == fake_server.requests
+
+        age_cache(monkeypatch=monkeypatch, seconds=20)
+        fake_server.per_page = 2
+        # The stale response is served, while it is renewed in the background
+        assert 3 == len(plenty.plenty_api_get_price_configuration())
+        for _ in range(50):
+            if len(plenty.plenty_api_get_price_configuration()) == 2:
+                break
+            time.sleep(0.05)
+        assert [1, 1] == fake_server.requests
+        assert 2 == len(plenty.plenty_api_get_price_configuration())
+        assert [1, 1] == fake_server.requests
+
+
+def test_client_serves_cache_offline(fake_server, tmp_path,
+                                     monkeypatch) -> None:
+    fake_server.pages = 1
+    cache = ResponseCache(path=str(tmp_path), ttl={'prices': 10},
+                          stale_ttl=0, offline=True)
+    with build_api(server=fake_server, cache=cache) as plenty:
+        assert 3 == len(plenty.plenty_api_get_price_configuration())
+        age_cache(monkeypatch=monkeypatch, seconds=100)
+
+        # The expired response replaces a failed request
+        fake_server.failures = {1: [500]}
+        assert 3 == len(plenty.plenty_api_get_price_configuration())
+        assert [1, 1] == fake_server.requests
+
+        # and a request without a connection
+        monkeypatch.setattr(utils, 'build_endpoint',
+                            lambda url, route, path='':
+                            'http://127.0.0.1:9' + route + path)
+        assert 3 == len(plenty.plenty_api_get_price_configuration())
+
+    cache.offline = False
+    with build_api(server=fake_server, cache=cache) as plenty:
+        assert plenty.plenty_api_get_price_configuration() is None
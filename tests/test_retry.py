@@ -0,0 +1,69 @@
+import email.utils
+import time
+
+from plenty_api.retry import RetryPolicy, parse_retry_after
+
+
+def test_is_retryable() -> None:
+    policy = RetryPolicy()
+    sample_data = [
+        ('get', 502), ('get', 503), ('get', None), ('get', 404),
+        ('get', 200), ('post', 502), ('post', None), ('post', 429)
+    ]
+    expected = [True, True, True, False, False, False, False, True]
+    result = []
+
+    for method, status in sample_data:
+        result.append(policy.is_retryable(method=method, status=status))
+
+    assert expected == result
+
+
+def test_allows() -> None:
+    policy = RetryPolicy(max_attempts=3, status_rules={500: 1, 429: 10})
+
+    assert policy.allows(attempt=2, status=502)
+    assert not policy.allows(attempt=3, status=502)
+    assert not policy.allows(attempt=1, status=500)
+    assert policy.allows(attempt=9, status=429)
+    assert not policy.allows(attempt=3)
+
+
+def test_delay_backoff() -> None:
+    policy = RetryPolicy(backoff_factor=1, max_backoff=5, jitter=False)
+    expected = [1, 2, 4, 5, 5]
+    result = []
+
+    for attempt in range(1, 6):
+        result.append(policy.delay(attempt=attempt))
+
+    assert expected == result
+
+
+def test_delay_jitter() -> None:
+    policy = RetryPolicy(backoff_factor=1, max_backoff=60, jitter=True)
+
+    for attempt in range(1, 6):
+        assert 0 <= policy.delay(attempt=attempt) <= 2 ** (attempt - 1)
+
+
+def test_delay_retry_after() -> None:
+    policy = RetryPolicy(backoff_factor=1, max_backoff=30, jitter=False)
+
+    assert 7 == policy.delay(attempt=1, headers={'Retry-After': '7'})
+    assert 30 == policy.delay(attempt=1, headers={'Retry-After': '120'})
+
+    policy = RetryPolicy(backoff_factor=1, jitter=False,
+                         respect_retry_after=False)
+
+    assert 1 == policy.delay(attempt=1, headers={'Retry-After': '7'})
+
+
+def test_parse_retry_after() -> None:
+    future = email.utils.formatdate(time.time() + 100, usegmt=True)
+
+    assert 12 == parse_retry_after(headers={'Retry-After': '12'})
+    assert 95 < parse_retry_after(headers={'Retry-After': future}) <= 100
+    assert parse_retry_after(headers={'Retry-After': 'invalid'}) is None
+    assert parse_retry_after(headers={}) is None
+    assert parse_retry_after(headers=None) is None
@@ -0,0 +1,82 @@
+import os
+import threading
+import time
+
+from plenty_api.token_cache import TokenCache, build_key
+
+
+def test_build_key() -> None:
+    url = 'https://test.plentymarkets-cloud01.com'
+
+    assert f'{url}|user' == build_key(base_url=url + '/', username='user')
+    assert f'{url}|' == build_key(base_url=url)
+
+
+def test_set_and_get(tmp_path) -> None:
+    cache = TokenCache(path=str(tmp_path / 'cache' / 'tokens.json'))
+
+    assert {} == cache.get(key='shop|user')
+
+    entry = cache.set(key='shop|user', token='Bearer abc', expires_in=3600)
+
+    assert entry == cache.get(key='shop|user')
+    assert 'Bearer abc' == entry['token']
+    assert 0o600 == os.stat(cache.path).st_mode & 0o777
+    # Another process reads the same file
+    assert entry == TokenCache(path=cache.path).get(key='shop|user')
+
+
+def test_get_ignores_outdated_tokens(tmp_path) -> None:
+    cache = TokenCache(path=str(tmp_path / 'tokens.json'), margin=300)
+    cache.set(key='short', token='Bearer abc', expires_in=200)
+    cache.set(key='expired', token='Bearer def', expires_in=-10)
+
+    assert {} == cache.get(key='short')
+    assert {} == cache.get(key='expired')
+
+
+def test_set_removes_expired_tokens(tmp_path) -> None:
+    cache = TokenCache(path=str(tmp_path / 'tokens.json'))
+    cache.set(key='expired', token='Bearer abc', expires_in=-10)
+    cache.set(key='valid', token='Bearer def', expires_in=3600)
+
+    with open(cache.path) as cache_file:
+        content = cache_file.read()
+
+    assert 'expired' not in content
+    assert 'valid' in content
+
+
+def test_delete(tmp_path) -> None:
+    cache = TokenCache(path=str(tmp_path / 'tokens.json'))
+    cache.set(key='shop', token='Bearer new', expires_in=3600)
+
+    # A token renewed by another process is kept
+    cache.delete(key='shop', token='Bearer old')
+    assert 'Bearer new' == cache.get(key='shop')['token']
+
+    cache.delete(key='shop', token='Bearer new')
+    assert {} == cache.get(key='shop')
+
+    cache.delete(key='missing')
+    assert {} == cache.get(key='missing')
+
+
+def test_login_lock(tmp_path) -> None:
+    cache = TokenCache(path=str(tmp_path / 'tokens.json'))
+    order: list = []
+
+    def login():
+        with TokenCache(path=cache.path).login_lock():
+            order.append('second')
+
+    with cache.login_lock():
+        waiting = threading.Thread(target=login)
+        waiting.start()
+        time.sleep(0.2)
+        # The cache stays usable while the login lock is held
+        cache.set(key='shop', token='Bearer abc', expires_in=3600)
+        order.append('first')
+    waiting.join()
+
+    assert ['first', 'second'] == order
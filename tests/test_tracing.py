@@ -0,0 +1,114 @@
+import asyncio
+import contextlib
+import contextvars
+
+import plenty_api.tracing as tracing
+from plenty_api.api import PlentyApi
+
+CURRENT_SPAN: contextvars.ContextVar = contextvars.ContextVar(
+    'span', default=None)
+
+
+class FakeSpan():
+    def __init__(self, name: str, attributes: dict, parent):
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.parent = parent
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def set_status(self, status) -> None:
+        self.attributes['status'] = status
+
+    def is_recording(self) -> bool:
+        return True
+
+
+class FakeTracer():
+    def __init__(self):
+        self.spans: list = []
+
+    @contextlib.contextmanager
+    def start_as_current_span(self, name: str, attributes: dict = None):
+        span = FakeSpan(name=name, attributes=attributes,
+                        parent=CURRENT_SPAN.get())
+        self.spans.append(span)
+        token = CURRENT_SPAN.set(span)
+        try:
+            yield span
+        finally:
+            CURRENT_SPAN.reset(token)
+
+
+class FakeClient():
+    def __init__(self, tracer):
+        self.tracer = tracer
+        self.data_format = 'json'
+
+    @tracing.traced
+    def plenty_api_get_items(self):
+        with tracing.start_span(tracer=self.tracer, name='GET /rest/items',
+                                attributes={'plenty.page': 1}) as span:
+            span.set_attribute('http.response.status_code', 200)
+        return []
+
+    @tracing.traced
+    def plenty_api_set_image_availability(self):
+        return False
+
+    @tracing.traced
+    async def plenty_api_get_variations(self):
+        return None
+
+
+def test_spans_of_a_call() -> None:
+    tracer = FakeTracer()
+    client = FakeClient(tracer=tracer)
+    assert [] == client.plenty_api_get_items()
+
+    call, request = tracer.spans
+    assert 'plenty_api_get_items' == call.name
+    assert {'plenty.data_format': 'json'} == call.attributes
+    assert call is request.parent
+    assert {'plenty.page': 1, 'http.response.status_code': 200} == \
+        request.attributes
+
+
+def test_failed_calls_are_marked() -> None:
+    tracer = FakeTracer()
+    client = FakeClient(tracer=tracer)
+    assert client.plenty_api_set_image_availability() is False
+    assert asyncio.run(client.plenty_api_get_variations()) is None
+    assert all('status' in span.attributes or 'error.type' in span.attributes
+               for span in tracer.spans)
+
+
+def test_disabled_tracing() -> None:
+    client = FakeClient(tracer=None)
+    assert [] == client.plenty_api_get_items()
+    with tracing.start_span(tracer=None, name='GET /rest/items') as span:
+        assert span is tracing.NULL_SPAN
+        span.set_attribute('plenty.page', 1)
+        tracing.set_error(span=span, description='request failed')
+
+
+def test_spans_of_the_client(fake_server) -> None:
+    tracer = FakeTracer()
+    fake_server.delays = {2: 0.1}
+    with PlentyApi(base_url=fake_server.url, use_keyring=False,
+                   concurrency=3, tracer=tracer) as plenty:
+        assert 15 == len(plenty.plenty_api_get_items())
+
+    call, *requests = tracer.spans
+    assert 'plenty_api_get_items' == call.name
+    assert call.parent is None
+    assert 'json' == call.attributes['plenty.data_format']
+    # The parallel page requests are children of the call
+    assert [1, 2, 3, 4, 5] == sorted(request.attributes['plenty.page']
+                                     for request in requests)
+    for request in requests:
+        assert 'GET /rest/items' == request.name
+        assert call is request.parent
+        assert 200 == request.attributes['http.response.status_code']
+        assert 0 < request.attributes['plenty.response_bytes']
@@ -1,4 +1,5 @@
 import copy
+import time
 import pytest
 import requests
 
@@ -6,7 +7,10 @@ from plenty_api.utils import (
     get_route, build_endpoint, check_date_range, parse_date, build_date_range,
     get_utc_offset, build_query_date, create_vat_mapping, date_to_timestamp,
     get_language, shrink_price_configuration, sanity_check_parameter,
-    attribute_variation_mapping
+    attribute_variation_mapping, build_session, flatten_query,
+    build_referrer_query, prefetch, split_date_range, shard_order_query,
+    merge_unique_records, chunk_records, build_projection, project_record,
+    split_concurrency
 )
 
 
@@ -707,3 +711,202 @@ def test_attribute_variation_mapping(sample_attributes: list,
     result.append(attribute_variation_mapping(variation=None, attribute=None))
 
     assert expected_attribute_variation_map == result
+
+
+def test_build_session() -> None:
+    session = build_session(pool_connections=4, pool_maxsize=8)
+    adapter = session.get_adapter('https://test.plentymarkets-cloud01.com')
+
+    assert adapter._pool_connections == 4
+    assert adapter._pool_maxsize == 8
+    assert adapter is session.get_adapter('http://localhost:8080')
+    assert session.headers['Connection'] == 'keep-alive'
+
+    session = build_session(keep_alive=False)
+
+    assert session.headers['Connection'] == 'close'
+
+
+def test_flatten_query() -> None:
+    sample_data = [
+        {'with[]': ['documents', 'addresses'], 'orderType': '1,4'},
+        {'page': 2, 'isMain': True},
+        {},
+        None
+    ]
+    expected = [
+        [('with[]', 'documents'), ('with[]', 'addresses'),
+         ('orderType', '1,4')],
+        [('page', '2'), ('isMain', 'True')],
+        [],
+        []
+    ]
+    result = []
+
+    for sample in sample_data:
+        result.append(flatten_query(query=sample))
+
+    assert expected == result
+
+
+def test_build_referrer_query() -> None:
+    sample_data = ['name', 'id', 'invalid', '']
+    expected = [{'columns': 'name'}, {'columns': 'id'}, {}, {}]
+    result = []
+
+    for sample in sample_data:
+        result.append(build_referrer_query(column=sample))
+
+    assert expected == result
+
+
+def test_prefetch() -> None:
+    assert list(range(20)) == list(prefetch(iterable=range(20), depth=3))
+    assert [] == list(prefetch(iterable=[], depth=3))
+
+
+def test_prefetch_raises_producer_error() -> None:
+    def failing_pages():
+        yield 1
+        raise ValueError('page failed')
+
+    result = []
+    with pytest.raises(ValueError):
+        for element in prefetch(iterable=failing_pages(), depth=2):
+            result.append(element)
+
+    assert [1] == result
+
+
+def test_prefetch_closes_source() -> None:
+    closed = []
+
+    def pages():
+        try:
+            for page in range(100):
+                yield page
+        finally:
+            closed.append(True)
+
+    consumer = prefetch(iterable=pages(), depth=2)
+    assert 0 == next(consumer)
+    consumer.close()
+
+    for _ in range(50):
+        if closed:
+            break
+        time.sleep(0.01)
+    assert [True] == closed
+
+
+def test_split_date_range() -> None:
+    date_range = {'start': '2020-09-01T00:00:00+02:00',
+                  'end': '2020-09-04T00:00:00+02:00'}
+    expected = [
+        [date_range],
+        [{'start': '2020-09-01T00:00:00+02:00',
+          'end': '2020-09-02T00:00:00+02:00'},
+         {'start': '2020-09-02T00:00:00+02:00',
+          'end': '2020-09-03T00:00:00+02:00'},
+         {'start': '2020-09-03T00:00:00+02:00',
+          'end': '2020-09-04T00:00:00+02:00'}]
+    ]
+    result = []
+
+    for parts in [1, 3]:
+        result.append(split_date_range(date_range=date_range, parts=parts))
+
+    assert expected == result
+
+
+def test_shard_order_query() -> None:
+    query = {'paidAtFrom': '2020-09-01T00:00:00+02:00',
+             'paidAtTo': '2020-09-03T00:00:00+02:00',
+             'orderType': '1'}
+    expected = [
+        {'paidAtFrom': '2020-09-01T00:00:00+02:00',
+         'paidAtTo': '2020-09-02T00:00:00+02:00',
+         'orderType': '1', 'referrerId': '1'},
+        {'paidAtFrom': '2020-09-01T00:00:00+02:00',
+         'paidAtTo': '2020-09-02T00:00:00+02:00',
+         'orderType': '1', 'referrerId': '4.01'},
+        {'paidAtFrom': '2020-09-02T00:00:00+02:00',
+         'paidAtTo': '2020-09-03T00:00:00+02:00',
+         'orderType': '1', 'referrerId': '1'},
+        {'paidAtFrom': '2020-09-02T00:00:00+02:00',
+         'paidAtTo': '2020-09-03T00:00:00+02:00',
+         'orderType': '1', 'referrerId': '4.01'}
+    ]
+
+    result = shard_order_query(query=query, date_type='payment',
+                               date_shards=2,
+                               refine_shards={'referrerId': ['1', '4.01']})
+
+    assert expected == result
+    assert [query] == shard_order_query(query=query, date_type='Payment',
+                                        refine_shards={'invalid': [1, 2]})
+
+
+def test_merge_unique_records() -> None:
+    sample_data = [
+        [{'id': 1, 'shard': 1}, {'id': 2, 'shard': 1}],
+        [{'id': 2, 'shard': 2}, {'id': 3, 'shard': 2}],
+        []
+    ]
+    expected = [{'id': 1, 'shard': 1}, {'id': 2, 'shard': 1},
+                {'id': 3, 'shard': 2}]
+
+    assert expected == merge_unique_records(record_lists=sample_data)
+    assert [] == merge_unique_records(record_lists=[])
+
+
+def test_split_concurrency() -> None:
+    sample_data = [(8, 4), (4, 8), (1, 3), (5, 2), (3, 1)]
+    expected = [(4, 2), (4, 1), (1, 1), (2, 2), (1, 3)]
+    result = []
+
+    for concurrency, shards in sample_data:
+        result.append(split_concurrency(concurrency=concurrency,
+                                        shards=shards))
+
+    assert expected == result
+
+
+def test_chunk_records() -> None:
+    records = iter([{'id': 1}, {'id': 2}, {'id': 3}])
+
+    result = list(chunk_records(records=records, chunk_size=2,
+                                data_format='json'))
+
+    assert [[{'id': 1}, {'id': 2}], [{'id': 3}]] == result
+
+    frames = list(chunk_records(records=iter(result[0]), chunk_size=1,
+                                data_format='dataframe', domain='order'))
+    assert [1, 2] == [frame['id'][0] for frame in frames]
+
+
+def test_project_record() -> None:
+    projection = build_projection(
+        fields=['id', 'orderItems.amounts.priceGross', 'owner.id',
+                'orderItems.id'])
+    record = {
+        'id': 1, 'statusId': 5, 'owner': None,
+        'orderItems': [
+            {'id': 11, 'quantity': 1,
+             'amounts': [{'priceGross': 9.99, 'currency': 'EUR'}]},
+            {'id': 12, 'quantity': 2}
+        ]
+    }
+    expected = {
+        'id': 1, 'owner': None,
+        'orderItems': [
+            {'id': 11, 'amounts': [{'priceGross': 9.99}]},
+            {'id': 12}
+        ]
+    }
+
+    assert {'id': {}, 'owner': {'id': {}},
+            'orderItems': {'amounts': {'priceGross': {}}, 'id': {}}} == \
+        projection
+    assert expected == project_record(record=record, projection=projection)
+    assert record == project_record(record=record, projection={})